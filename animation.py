@@ -0,0 +1,209 @@
+"""
+Máquina de estados de animación por capas.
+
+Cada capa del personaje (teclado, mouse, boca) tiene un estado explícito, una
+tabla de transiciones y un único QTimer reiniciable para volver a su estado
+de reposo. El número de temporizadores es constante sin importar lo rápido
+que llegue la entrada: una pulsación nueva reinicia el temporizador de su
+capa en lugar de crear otro QTimer.singleShot pendiente.
+
+RelojAnimacion marca el paso de los fotogramas: aplica el estado pendiente
+a ritmo fijo, pinta como máximo una vez por tick y se detiene en reposo.
+"""
+import time
+
+from PyQt5.QtCore import QObject, QTimer, Qt, pyqtSignal
+
+from input_bus import REPOSO_TECLADO_MS, REPOSO_MOUSE_MS
+
+# Tablas de transiciones: evento -> (estado destino, estado de retorno, ms hasta el retorno)
+TRANSICIONES_TECLADO = {
+    "pulsar": ("typing_handdown", None, 0),
+    "soltar": ("typing_handup", "keyboard_idle", REPOSO_TECLADO_MS),
+    "reposo": ("keyboard_idle", None, 0),
+    "ocultar": ("idle", None, 0),
+}
+
+TRANSICIONES_MOUSE = {
+    "mover": ("mouse_move", "mouse_idle", REPOSO_MOUSE_MS),
+    "presionar": ("mouse_move", None, 0),
+    "soltar": ("mouse_idle", None, 0),
+    "reposo": ("mouse_idle", None, 0),
+    "ocultar": ("idle", None, 0),
+}
+
+TRANSICIONES_BOCA = {
+    "abrir": ("abierta", None, 0),
+    "cerrar": ("cerrada", None, 0),
+}
+
+
+class CapaAnimada:
+    """
+    Capa con estado propio y un único temporizador reiniciable.
+
+    Detalles técnicos:
+        - disparar(evento): busca la transición en la tabla de la capa
+        - Si la transición tiene retorno, (re)inicia el temporizador de la capa;
+          QTimer.start() sobre un temporizador activo lo reinicia, así que
+          nunca hay más de un retorno pendiente por capa
+        - Si no tiene retorno, detiene el temporizador: un retorno antiguo
+          no puede devolver la capa al reposo mientras el usuario sigue activo
+        - aplicar(estado) solo se llama cuando el estado cambia realmente
+    """
+    def __init__(self, nombre, transiciones, estado_inicial, aplicar, parent=None):
+        self.nombre = nombre
+        self.transiciones = transiciones
+        self.estado = estado_inicial
+        self._aplicar = aplicar
+        self._retorno = None
+        self.cambios = 0  # Cambios de estado aplicados
+
+        self.timer = QTimer(parent)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self._expirar)
+
+    def disparar(self, evento):
+        """Ejecuta la transición asociada a un evento de la tabla"""
+        estado, retorno, ms = self.transiciones[evento]
+        self.cambiar(estado, retorno, ms)
+
+    def cambiar(self, estado, retorno=None, ms=0):
+        """
+        Lleva la capa a un estado, programando opcionalmente su retorno.
+
+        Parámetros:
+            estado (str): Estado destino
+            retorno (str | None): Estado al que volver cuando expire el temporizador
+            ms (int): Milisegundos hasta el retorno
+        """
+        if retorno is None:
+            self.timer.stop()
+        else:
+            self._retorno = retorno
+            self.timer.start(ms)
+
+        if estado != self.estado:
+            self.estado = estado
+            self.cambios += 1
+            self._aplicar(estado)
+
+    def _expirar(self):
+        self.cambiar(self._retorno)
+
+
+class MaquinaAnimacion:
+    """
+    Conjunto de capas animadas del personaje.
+
+    Uso:
+        animacion = MaquinaAnimacion(widget, update_keyboard_state,
+                                     update_mouse_state, aplicar_boca)
+        animacion.teclado.disparar("pulsar")
+        animacion.mouse.disparar("mover")
+    """
+    def __init__(self, parent, aplicar_teclado, aplicar_mouse, aplicar_boca):
+        self.teclado = CapaAnimada("teclado", TRANSICIONES_TECLADO, "idle", aplicar_teclado, parent)
+        self.mouse = CapaAnimada("mouse", TRANSICIONES_MOUSE, "idle", aplicar_mouse, parent)
+        self.boca = CapaAnimada("boca", TRANSICIONES_BOCA, "cerrada", aplicar_boca, parent)
+        self.capas = (self.teclado, self.mouse, self.boca)
+
+    def timers(self):
+        """Temporizadores de la máquina (siempre uno por capa)"""
+        return [capa.timer for capa in self.capas]
+
+    def timers_activos(self):
+        """Temporizadores con un retorno pendiente en este momento"""
+        return sum(1 for capa in self.capas if capa.timer.isActive())
+
+    def detener(self):
+        for capa in self.capas:
+            capa.timer.stop()
+
+
+class RelojAnimacion(QObject):
+    """
+    Reloj de fotogramas de paso fijo que se detiene cuando no hay nada que hacer.
+
+    Detalles técnicos:
+        - Un único QTimer preciso a fps fotogramas por segundo llama a
+          funcion(), que aplica todo el estado pendiente y pinta como máximo
+          un fotograma; retorna True si hubo trabajo en este tick
+        - Un tick sin trabajo detiene el temporizador: en reposo no hay
+          ningún despertar del hilo principal
+        - solicitar() lo reanuda (hilo principal); despertar_desde_hilo() lo
+          reanuda desde cualquier hilo mediante una señal encolada
+        - Al reanudarse, el primer tick se ejecuta en el acto si ya pasó un
+          intervalo desde el anterior; si no, espera al siguiente intervalo,
+          así que nunca hay más de fps ticks por segundo
+        - ahora: tiempo monótono (time.monotonic) del tick en curso, la base
+          de tiempo común para limitar frecuencias dentro del tick
+        - continuo: no se detiene nunca (estado que solo se puede sondear,
+          como la memoria compartida de la captura aislada)
+    """
+    despertado = pyqtSignal()
+
+    def __init__(self, fps, funcion, parent=None):
+        super().__init__(parent)
+        self._funcion = funcion
+        self.continuo = False
+        self.ahora = time.monotonic()
+        self.retraso_ms = None     # Retraso del último tick respecto a su intervalo (None tras reanudar)
+        self._ultimo = float("-inf")
+        self._inmediato = False
+        self._seguido = False      # Si el tick anterior vino del temporizador en marcha
+        self.ticks = 0
+        self.reanudaciones = 0
+
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self._tick_temporizador)
+        self.cambiar_fps(fps)
+        self.despertado.connect(self.solicitar)  # Desde otros hilos la conexión queda encolada
+
+    def cambiar_fps(self, fps):
+        self.timer.setInterval(max(1, int(1000 / fps)))
+
+    @property
+    def activo(self):
+        return self.timer.isActive() or self._inmediato
+
+    def solicitar(self):
+        """Reanuda el reloj si está detenido (hilo principal)"""
+        if self.activo:
+            return
+        self.reanudaciones += 1
+        self._seguido = False
+        if time.monotonic() - self._ultimo >= self.timer.interval() / 1000.0:
+            self._inmediato = True
+            QTimer.singleShot(0, self._tick_inmediato)
+        else:
+            self.timer.start()
+
+    def despertar_desde_hilo(self):
+        """Reanuda el reloj desde un hilo que no es el principal"""
+        self.despertado.emit()
+
+    def _tick_inmediato(self):
+        seguir = self._tick()
+        self._inmediato = False  # Después del tick: un solicitar() durante el tick no lo duplica
+        if seguir:
+            self.timer.start()
+
+    def _tick_temporizador(self):
+        if not self._tick():
+            self.timer.stop()
+
+    def _tick(self):
+        ahora = time.monotonic()
+        self.retraso_ms = ((ahora - self._ultimo) * 1000.0 - self.timer.interval()
+                           if self._seguido else None)
+        self.ahora = self._ultimo = ahora
+        self.ticks += 1
+        seguir = bool(self._funcion()) or self.continuo
+        self._seguido = seguir
+        return seguir
+
+    def detener(self):
+        self.timer.stop()
+        self._seguido = False
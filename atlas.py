@@ -0,0 +1,272 @@
+"""
+Atlas de sprites empaquetado y cargador de recursos.
+
+Formato (generado por build_atlas.py):
+    - assets/atlas.png: una sola imagen con todos los sprites recortados a su
+      zona opaca y empaquetados por estantes
+    - assets/atlas.json: índice con, por cada nombre de sprite (el nombre del
+      PNG original sin extensión), su rectángulo dentro del atlas, el ancla
+      (desplazamiento del recorte dentro de la imagen original) y el tamaño
+      de la imagen original; y en "fuentes", la fecha de modificación y el
+      tamaño en bytes de cada PNG con que se generó
+
+El cargador hace una lectura y una decodificación del atlas y entrega cada
+sprite como un rectángulo origen sobre el mismo QPixmap, sin copiar píxeles:
+se dibuja con QPainter.drawPixmap(destino, atlas, rect). Si no hay atlas,
+carga los PNG sueltos de assets/motions y assets/gui como antes. Si algún PNG
+cambió, se añadió o se quitó desde que se generó el atlas, lo regenera antes
+de cargarlo (un os.stat por imagen basta para comprobarlo).
+
+Sprite.escalado() crea la variante suavizada de un sprite para una escala y
+un devicePixelRatio; frames.CacheFotogramas guarda esas variantes.
+"""
+import math
+import json
+import os
+import time
+
+from PyQt5.QtCore import QPoint, QRect, QSize, Qt
+from PyQt5.QtGui import QPainter, QPixmap, QRegion
+
+from log import obtener_logger
+
+logger = obtener_logger("recursos")
+
+# Obtener la ruta del directorio donde se encuentra el script
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+ATLAS_IMAGEN = os.path.join(script_dir, "assets/atlas.png")
+ATLAS_INDICE = os.path.join(script_dir, "assets/atlas.json")
+
+# Carpetas con los PNG sueltos que forman el atlas
+CARPETAS_SPRITES = ("assets/motions", "assets/gui")
+
+
+class Sprite:
+    """
+    Imagen con nombre dentro de un atlas (o de un PNG suelto).
+
+    Atributos:
+        fuente (QPixmap): Atlas completo, o la imagen suelta
+        rect (QRect): Zona de la fuente que ocupa el sprite (píxeles de la fuente)
+        ancla (QPoint): Posición del recorte dentro de la imagen original
+        tamano (QSize): Tamaño de la imagen original, antes del recorte
+
+    rect está en píxeles del dispositivo de la fuente; ancla y tamano en
+    píxeles lógicos. Solo difieren en las variantes de escalado() con
+    devicePixelRatio distinto de 1.
+    """
+    __slots__ = ("nombre", "fuente", "rect", "ancla", "tamano", "_pixmap")
+
+    def __init__(self, nombre, fuente, rect=None, ancla=None, tamano=None):
+        self.nombre = nombre
+        self.fuente = fuente
+        self.rect = rect if rect is not None else fuente.rect()
+        self.ancla = ancla if ancla is not None else QPoint(0, 0)
+        self.tamano = tamano if tamano is not None else fuente.size()
+        self._pixmap = None
+
+    @property
+    def recortado(self):
+        return self.rect.size() != self.tamano or not self.ancla.isNull()
+
+    def isNull(self):
+        return self.fuente.isNull()
+
+    def size(self):
+        return QSize(self.tamano)
+
+    def width(self):
+        return self.tamano.width()
+
+    def height(self):
+        return self.tamano.height()
+
+    def dibujar(self, painter, x=0, y=0):
+        """Dibuja el sprite con su esquina superior izquierda original en (x, y)"""
+        if not self.rect.isEmpty():
+            painter.drawPixmap(QPoint(x, y) + self.ancla, self.fuente, self.rect)
+
+    def rect_opaco(self):
+        """Rectángulo que contiene los píxeles no transparentes, en coordenadas de la imagen original"""
+        if self.isNull():
+            return QRect()
+        if self.recortado:
+            dpr = self.fuente.devicePixelRatioF()
+            return QRect(self.ancla, QSize(math.ceil(self.rect.width() / dpr),
+                                           math.ceil(self.rect.height() / dpr)))
+        if not self.fuente.hasAlphaChannel():
+            return QRect(QPoint(0, 0), self.tamano)
+        return QRegion(self.fuente.copy(self.rect).mask()).boundingRect()
+
+    def escalado(self, escala, dpr=1.0):
+        """
+        Variante del sprite a escala × dpr píxeles del dispositivo por píxel original.
+
+        Escala solo el recorte (SmoothTransformation) a un QPixmap propio con
+        setDevicePixelRatio(dpr): dibujado con dibujar() ocupa escala veces
+        el tamaño original en píxeles lógicos, con nitidez completa en
+        pantallas HiDPI. Es caro: el resultado se guarda y se reutiliza
+        (frames.CacheFotogramas), nunca se llama al pintar.
+        """
+        factor = escala * dpr
+        if self.isNull() or self.rect.isEmpty():
+            return Sprite(self.nombre, QPixmap())
+        recorte = self.fuente.copy(self.rect)
+        fuente = recorte.scaled(max(1, round(self.rect.width() * factor)),
+                                max(1, round(self.rect.height() * factor)),
+                                Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+        fuente.setDevicePixelRatio(dpr)
+        return Sprite(
+            self.nombre, fuente, fuente.rect(),
+            QPoint(round(self.ancla.x() * escala), round(self.ancla.y() * escala)),
+            QSize(round(self.tamano.width() * escala), round(self.tamano.height() * escala)),
+        )
+
+    def pixmap(self):
+        """
+        QPixmap independiente del tamaño original.
+
+        Solo para las APIs que necesitan un pixmap propio (QIcon, setPixmap);
+        se materializa una vez. Un PNG suelto sin recorte se devuelve tal cual.
+        """
+        if not self.recortado and self.rect == self.fuente.rect():
+            return self.fuente
+        if self._pixmap is None:
+            self._pixmap = QPixmap(self.tamano)
+            self._pixmap.fill(Qt.transparent)
+            painter = QPainter(self._pixmap)
+            self.dibujar(painter)
+            painter.end()
+        return self._pixmap
+
+
+class AtlasSprites:
+    """
+    Conjunto de sprites cargados desde el atlas o desde PNG sueltos.
+
+    Uso:
+        sprites = cargar_sprites()
+        sprites["cat_idle"].dibujar(painter)
+
+    Atributos de diagnóstico:
+        origen (str): "atlas" o "archivos"
+        lecturas (int): Archivos de imagen leídos y decodificados
+        tiempo_ms (float): Tiempo total de carga en frío
+        regenerado (bool): Si el atlas estaba desactualizado y se regeneró al cargar
+    """
+    def __init__(self, sprites, origen, lecturas, tiempo_ms, regenerado=False):
+        self.sprites = sprites
+        self.origen = origen
+        self.lecturas = lecturas
+        self.tiempo_ms = tiempo_ms
+        self.regenerado = regenerado
+
+    @classmethod
+    def cargar(cls, imagen=ATLAS_IMAGEN, indice=ATLAS_INDICE, base=script_dir):
+        """
+        Carga el atlas si existe; si no, o si está dañado, los PNG sueltos.
+
+        Si las "fuentes" del índice no coinciden con firmas_sprites(base), el
+        atlas está desactualizado: se regenera con build_atlas.construir y se
+        carga el nuevo. Si no se puede regenerar, se usan las imágenes sueltas.
+        """
+        inicio = time.perf_counter()
+        if os.path.exists(imagen) and os.path.exists(indice):
+            try:
+                with open(indice, "r") as f:
+                    datos = json.load(f)
+                regenerado = datos.get("fuentes") != firmas_sprites(base)
+                if regenerado:
+                    logger.info("Las imágenes cambiaron desde que se generó el atlas, regenerándolo")
+                    from build_atlas import construir  # Importa numpy: solo con un atlas desactualizado
+                    datos = construir(imagen_destino=imagen, indice_destino=indice, base=base)
+                sprites = cls._cargar_atlas(imagen, datos)
+                lecturas = 1 + len(sprites) if regenerado else 1
+                return cls(sprites, "atlas", lecturas, (time.perf_counter() - inicio) * 1000.0, regenerado)
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning("Atlas no válido (%s), usando las imágenes sueltas", e)
+        sprites = cls._cargar_archivos(base)
+        return cls(sprites, "archivos", len(sprites), (time.perf_counter() - inicio) * 1000.0)
+
+    @staticmethod
+    def _cargar_atlas(imagen, datos):
+        with open(imagen, "rb") as f:
+            contenido = f.read()
+        fuente = QPixmap()
+        if not fuente.loadFromData(contenido, "PNG"):
+            raise ValueError(f"no se pudo decodificar {imagen}")
+
+        sprites = {}
+        for nombre, entrada in datos["sprites"].items():
+            x, y, ancho, alto = entrada["rect"]
+            sprites[nombre] = Sprite(
+                nombre, fuente,
+                QRect(x, y, ancho, alto),
+                QPoint(*entrada["ancla"]),
+                QSize(*entrada["tamano"]),
+            )
+        return sprites
+
+    @staticmethod
+    def _cargar_archivos(base=script_dir):
+        sprites = {}
+        for nombre, ruta in archivos_sprites(base).items():
+            pixmap = QPixmap(ruta)
+            if pixmap.isNull():
+                logger.error("No se pudo cargar la imagen %s", ruta)
+            sprites[nombre] = Sprite(nombre, pixmap)
+        return sprites
+
+    def __getitem__(self, nombre):
+        sprite = self.sprites.get(nombre)
+        if sprite is None:
+            logger.warning("Sprite no encontrado: %s", nombre)
+            sprite = Sprite(nombre, QPixmap())
+            self.sprites[nombre] = sprite
+        return sprite
+
+    def __contains__(self, nombre):
+        return nombre in self.sprites
+
+    def __len__(self):
+        return len(self.sprites)
+
+    def resumen(self):
+        origen = "atlas regenerado" if self.regenerado else self.origen
+        return (f"{len(self.sprites)} sprites desde {origen} "
+                f"({self.lecturas} lecturas) en {self.tiempo_ms:.1f} ms")
+
+
+def archivos_sprites(base=script_dir):
+    """Nombre de sprite -> ruta de cada PNG de CARPETAS_SPRITES (sin subcarpetas)"""
+    archivos = {}
+    for carpeta in CARPETAS_SPRITES:
+        ruta_carpeta = os.path.join(base, carpeta)
+        if not os.path.isdir(ruta_carpeta):
+            continue
+        for archivo in sorted(os.listdir(ruta_carpeta)):
+            if archivo.lower().endswith(".png"):
+                archivos[os.path.splitext(archivo)[0]] = os.path.join(ruta_carpeta, archivo)
+    return archivos
+
+
+def firmas_sprites(base=script_dir):
+    """Nombre de sprite -> [mtime_ns, bytes] de cada PNG (las "fuentes" del índice del atlas)"""
+    firmas = {}
+    for nombre, ruta in archivos_sprites(base).items():
+        info = os.stat(ruta)
+        firmas[nombre] = [info.st_mtime_ns, info.st_size]
+    return firmas
+
+
+_sprites = None
+
+
+def cargar_sprites():
+    """Sprites compartidos por todo el proceso (se cargan una sola vez)"""
+    global _sprites
+    if _sprites is None:
+        _sprites = AtlasSprites.cargar()
+        logger.info("Recursos: %s", _sprites.resumen())
+    return _sprites
@@ -0,0 +1,568 @@
+"""
+Procesamiento de audio independiente de la interfaz gráfica.
+
+Este módulo no importa PyQt5 ni sounddevice: contiene únicamente la lógica
+que se ejecuta en el hilo de audio, de modo que pueda reutilizarse y medirse
+sin una ventana ni un micrófono reales.
+"""
+import math
+
+import numpy as np
+
+from log import obtener_logger
+from vad import crear_detector
+
+logger = obtener_logger("audio")
+
+
+class DetectorHabla:
+    """
+    Detector del estado "hablando" con histéresis y tiempo de retención.
+
+    Arquitectura técnica:
+        - Umbral de ataque: el nivel debe superarlo para empezar a hablar
+        - Umbral de liberación: fracción del umbral de ataque por debajo de la
+          cual se considera que el usuario dejó de hablar
+        - Retención (hangover): tiempo que el nivel debe mantenerse por debajo
+          del umbral de liberación antes de volver a silencio
+
+    Solo informa de transiciones reales (silencio → habla y habla → silencio),
+    por lo que el hilo de audio deja de publicar un evento en la GUI por cada
+    bloque y el overlay no parpadea cuando el RMS ronda el umbral.
+    """
+    def __init__(self, umbral_ataque, factor_liberacion=0.6, retencion=0.25):
+        self.hablando = False
+        self.bloques = 0          # Bloques de audio procesados
+        self.transiciones = 0     # Cambios de estado notificados a la GUI
+        self._retencion_restante = 0.0
+        self.configurar(umbral_ataque, factor_liberacion, retencion)
+
+    def configurar(self, umbral_ataque, factor_liberacion=0.6, retencion=0.25):
+        """
+        Actualiza los parámetros del detector sin perder su estado actual.
+
+        Parámetros:
+            umbral_ataque (float): Nivel a superar para pasar a "hablando"
+            factor_liberacion (float): Umbral de liberación relativo al de ataque (0-1]
+            retencion (float): Tiempo de retención en segundos
+        """
+        self.factor_liberacion = max(0.0, min(1.0, factor_liberacion))
+        self.umbral_ataque = umbral_ataque
+        self.umbral_liberacion = umbral_ataque * self.factor_liberacion
+        self.retencion = max(0.0, retencion)
+
+    def ajustar_umbral(self, umbral_ataque):
+        """Cambia solo el umbral de ataque conservando la histéresis (sin asignar memoria)"""
+        self.umbral_ataque = umbral_ataque
+        self.umbral_liberacion = umbral_ataque * self.factor_liberacion
+
+    def procesar(self, nivel, duracion):
+        """
+        Procesa el nivel de un bloque de audio.
+
+        Parámetros:
+            nivel (float): Nivel del bloque (RMS u otra medida de voz)
+            duracion (float): Duración del bloque en segundos (frames / samplerate)
+
+        Retorna:
+            bool | None: True al empezar a hablar, False al dejar de hablar,
+                         None si no hubo transición
+        """
+        self.bloques += 1
+
+        if self.hablando:
+            if nivel >= self.umbral_liberacion:
+                # Sigue hablando: reiniciar la retención
+                self._retencion_restante = self.retencion
+                return None
+            self._retencion_restante -= duracion
+            if self._retencion_restante > 0:
+                return None
+            self.hablando = False
+        else:
+            if nivel <= self.umbral_ataque:
+                return None
+            self.hablando = True
+            self._retencion_restante = self.retencion
+
+        self.transiciones += 1
+        return self.hablando
+
+    @property
+    def publicaciones_ahorradas(self):
+        """Eventos que la versión anterior habría publicado en la GUI y este detector evitó"""
+        return self.bloques - self.transiciones
+
+    def estadisticas(self):
+        """Retorna un resumen de la actividad del detector"""
+        return {
+            "bloques": self.bloques,
+            "transiciones": self.transiciones,
+            "publicaciones_ahorradas": self.publicaciones_ahorradas,
+        }
+
+
+class BufferNiveles:
+    """
+    Buffer circular preasignado con los niveles de cada bloque de audio.
+
+    Arquitectura técnica:
+        - Un único escritor (callback de sounddevice) y uno o varios lectores
+          (temporizador de la GUI, ventana de configuración, estadísticas)
+        - Array estructurado de NumPy con campos rms, pico y tiempo, reservado
+          una sola vez: escribir un bloque no asigna memoria
+        - Sin locks: el escritor guarda primero el registro y después publica
+          el contador de bloques escritos; la asignación de un entero es
+          atómica bajo el GIL, así que un lector nunca ve un índice cuyo
+          registro aún no se escribió
+    """
+    DTYPE = np.dtype([("rms", np.float32), ("pico", np.float32), ("tiempo", np.float64)])
+
+    def __init__(self, capacidad=256):
+        self.capacidad = capacidad
+        self._datos = np.zeros(capacidad, dtype=self.DTYPE)
+        self.escritos = 0  # Total de bloques escritos desde el inicio
+
+    def escribir(self, rms, pico, tiempo):
+        """Añade un registro (llamado únicamente desde el hilo de audio)"""
+        self._datos[self.escritos % self.capacidad] = (rms, pico, tiempo)
+        self.escritos += 1
+
+    def ultimo(self):
+        """
+        Retorna el registro más reciente.
+
+        Retorna:
+            tuple | None: (rms, pico, tiempo) o None si aún no hay datos
+        """
+        escritos = self.escritos
+        if escritos == 0:
+            return None
+        rms, pico, tiempo = self._datos[(escritos - 1) % self.capacidad]
+        return float(rms), float(pico), float(tiempo)
+
+
+class EstimadorPisoRuido:
+    """
+    Estimador del piso de ruido en streaming con memoria constante.
+
+    Algoritmo (seguidor exponencial del mínimo):
+        - Si el nivel cae por debajo del piso, el piso baja rápido hacia él
+          (constante de tiempo tau_bajada)
+        - Si el nivel está por encima, el piso sube lentamente
+          (constante de tiempo tau_subida)
+        - Mientras se habla, el piso solo sube hacia el mínimo de los
+          últimos ventana_s segundos (estadística de mínimos): las pausas
+          entre palabras mantienen ese mínimo cerca del ruido, pero un
+          escalón sostenido de ruido o de ganancia lo eleva, el umbral lo
+          sigue y el detector puede liberar en lugar de quedarse "hablando"
+        - El mínimo de la ventana se lleva en SUBVENTANAS mínimos parciales
+          preasignados: O(1) en tiempo y memoria, sin asignaciones dentro del
+          callback de audio
+
+    El umbral automático es max(piso * margen, umbral_minimo), de modo que
+    sigue los cambios de habitación, micrófono o ganancia sin ajuste manual.
+    """
+    SUBVENTANAS = 5
+
+    def __init__(self, margen=3.0, umbral_minimo=0.001, tau_bajada=0.3, tau_subida=8.0, ventana_s=10.0):
+        self.margen = margen
+        self.umbral_minimo = umbral_minimo
+        self.tau_bajada = tau_bajada
+        self.tau_subida = tau_subida
+        self.duracion_subventana = ventana_s / self.SUBVENTANAS
+        self.piso = None  # Sin estimación hasta el primer bloque
+        self._minimos = [math.inf] * self.SUBVENTANAS  # Mínimo de cada subventana cerrada
+        self._posicion = 0
+        self._minimo_actual = math.inf
+        self._transcurrido = 0.0
+
+    def _registrar_minimo(self, nivel, duracion):
+        if nivel < self._minimo_actual:
+            self._minimo_actual = nivel
+        self._transcurrido += duracion
+        if self._transcurrido >= self.duracion_subventana:
+            self._minimos[self._posicion] = self._minimo_actual
+            self._posicion = (self._posicion + 1) % self.SUBVENTANAS
+            self._minimo_actual = math.inf
+            self._transcurrido = 0.0
+
+    @property
+    def minimo_ventana(self):
+        """Mínimo de la ventana completa (inf hasta cerrar SUBVENTANAS subventanas)"""
+        return min(self._minimos) if math.inf not in self._minimos else math.inf
+
+    def actualizar(self, nivel, duracion, hablando=False):
+        """
+        Incorpora el nivel de un bloque.
+
+        Parámetros:
+            nivel (float): RMS del bloque
+            duracion (float): Duración del bloque en segundos
+            hablando (bool): Si el detector considera que hay voz (la subida se
+                limita al mínimo de la ventana)
+
+        Retorna:
+            float: Umbral automático resultante
+        """
+        self._registrar_minimo(nivel, duracion)
+        if self.piso is None:
+            self.piso = nivel
+        elif nivel < self.piso:
+            self.piso += (1.0 - math.exp(-duracion / self.tau_bajada)) * (nivel - self.piso)
+        else:
+            objetivo = min(nivel, self.minimo_ventana) if hablando else nivel
+            if objetivo > self.piso:
+                self.piso += (1.0 - math.exp(-duracion / self.tau_subida)) * (objetivo - self.piso)
+        return self.umbral
+
+    @property
+    def umbral(self):
+        """Umbral de ataque sugerido a partir del piso actual"""
+        if self.piso is None:
+            return self.umbral_minimo
+        return max(self.piso * self.margen, self.umbral_minimo)
+
+
+class FormatoCaptura:
+    """
+    Formato de captura del micrófono configurable desde config.json.
+
+    Parámetros técnicos:
+        samplerate (int): Frecuencia de muestreo pedida al dispositivo (Hz)
+        canales (int): Canales capturados; solo se analiza el primero
+        dtype (str): "int16" o "float32" (int16 reduce a la mitad los bytes)
+        blocksize (int): Muestras por bloque entregadas al callback
+        diezmado (int): Se analiza una muestra por cada N capturadas (1 = sin diezmado)
+
+    Para detectar voz no hace falta calidad CD estéreo: 16 kHz mono reduce
+    los bytes por segundo y el cálculo por bloque en un orden de magnitud
+    respecto a 44.1 kHz con todos los canales del dispositivo.
+
+    Diezmado: cada muestra analizada es la media de N muestras consecutivas
+    (filtro de caja) y no una de cada N tomada a saltos. Sin ese paso bajo,
+    el ruido por encima de la nueva frecuencia de Nyquist (ventiladores,
+    clics de teclas) se plegaría sobre la banda de voz y engañaría a los
+    detectores "energia_zcr" y "espectral". La media atenúa poco la banda
+    de voz (por debajo de ~4 kHz) y anula la frecuencia de Nyquist original;
+    no es un filtro de corte abrupto, pero no asigna memoria ni guarda estado
+    entre bloques. Además de "audio_diezmado", validar() lo ajusta cuando el
+    dispositivo no acepta la frecuencia pedida.
+    """
+    ESCALAS = {"int16": 1.0 / 32768.0, "float32": 1.0}
+
+    def __init__(self, samplerate=16000, canales=1, dtype="float32", blocksize=512, diezmado=1):
+        self.samplerate = int(samplerate)
+        self.canales = max(1, int(canales))
+        self.dtype = dtype if dtype in self.ESCALAS else "float32"
+        self.blocksize = max(1, int(blocksize))
+        self.diezmado = max(1, int(diezmado))
+
+    @classmethod
+    def desde_config(cls, config):
+        return cls(
+            samplerate=config.get("audio_samplerate", 16000),
+            canales=config.get("audio_canales", 1),
+            dtype=config.get("audio_dtype", "float32"),
+            blocksize=config.get("audio_blocksize", 512),
+            diezmado=config.get("audio_diezmado", 1),
+        )
+
+    @property
+    def escala(self):
+        """Factor que convierte las muestras capturadas a float en [-1, 1]"""
+        return self.ESCALAS[self.dtype]
+
+    @property
+    def samplerate_efectivo(self):
+        """Frecuencia de las muestras que llegan a los detectores (tras el diezmado)"""
+        return self.samplerate / self.diezmado
+
+    @property
+    def bytes_por_segundo(self):
+        return self.samplerate * self.canales * (2 if self.dtype == "int16" else 4)
+
+    def validar(self, sd, dispositivo=None):
+        """
+        Comprueba el formato contra el dispositivo de entrada.
+
+        Detalles técnicos:
+            1. sd.check_input_settings con los valores configurados
+            2. Si la frecuencia no es soportada, usa la frecuencia por defecto
+               del dispositivo y ajusta el diezmado para acercarse a la pedida
+            3. Si el dtype o los canales no son soportados, recurre a float32 mono
+
+        Parámetros:
+            sd: Módulo sounddevice (se recibe para no importarlo aquí)
+            dispositivo: Dispositivo de entrada (None = por defecto)
+
+        Retorna:
+            FormatoCaptura: Este formato o uno ajustado que el dispositivo acepta
+        """
+        try:
+            sd.check_input_settings(device=dispositivo, channels=self.canales,
+                                    dtype=self.dtype, samplerate=self.samplerate)
+            return self
+        except Exception as e:
+            logger.warning("Formato de captura no soportado (%s), buscando alternativa...", e)
+
+        info = sd.query_devices(dispositivo, "input")
+        samplerate = int(info["default_samplerate"])
+        objetivo = self.samplerate_efectivo
+        diezmado = max(1, int(round(samplerate / objetivo)))
+        blocksize = max(1, int(round(self.blocksize * samplerate / self.samplerate)))  # Misma duración
+        for canales, dtype in ((self.canales, self.dtype), (1, "float32")):
+            try:
+                sd.check_input_settings(device=dispositivo, channels=canales,
+                                        dtype=dtype, samplerate=samplerate)
+                ajustado = FormatoCaptura(samplerate, canales, dtype, blocksize, diezmado)
+                logger.info("Formato de captura ajustado: %s", ajustado)
+                return ajustado
+            except Exception:
+                continue
+        return FormatoCaptura(samplerate, 1, "float32", blocksize, 1)
+
+    def con_bloque(self, blocksize):
+        """Mismo formato con otro tamaño de bloque"""
+        return FormatoCaptura(self.samplerate, self.canales, self.dtype, blocksize, self.diezmado)
+
+    def __repr__(self):
+        return (f"FormatoCaptura({self.samplerate} Hz, {self.canales} canal(es), {self.dtype}, "
+                f"bloque={self.blocksize}, diezmado={self.diezmado})")
+
+
+class ProcesadorAudio:
+    """
+    Ruta de detección bloque a bloque, compartida por el callback de audio.
+
+    Algoritmo por bloque:
+        1. Toma el primer canal como una vista (sin copia); un bloque de
+           ceros exactos (silencio digital) se detecta con any() y pasa
+           directamente al detector de habla como nivel 0, sin conversión,
+           RMS, piso de ruido ni VAD
+        2. Con diezmado, promedia cada grupo de `diezmado` muestras (paso bajo
+           antes de diezmar, ver FormatoCaptura); con int16 escala a float32.
+           Ambos escriben en un buffer preasignado
+        3. Calcula RMS (producto escalar) y pico, y los escribe en BufferNiveles
+        4. El detector de voz convierte el bloque en un nivel de voz
+        5. EstimadorPisoRuido sigue el piso de ruido; en modo automático su
+           umbral reemplaza al umbral de ataque del detector de habla
+        6. DetectorHabla aplica la histéresis y retorna la transición, si la hay
+    """
+    def __init__(self, formato, detector_voz, detector_habla, niveles, piso_ruido=None, umbral_auto=False):
+        self.formato = formato
+        self.detector_voz = detector_voz
+        self.detector_habla = detector_habla
+        self.niveles = niveles
+        self.piso_ruido = piso_ruido if piso_ruido is not None else EstimadorPisoRuido()
+        self.umbral_auto = umbral_auto
+        self._conversion = np.empty(formato.blocksize // formato.diezmado + 1, dtype=np.float32)
+        self._parametros = None  # Última tupla publicada por configurar() (escribe otro hilo)
+        self._aplicados = None   # Última tupla aplicada por procesar() (escribe el hilo de audio)
+        self.bloques_silencio = 0  # Bloques de silencio digital (sin piso de ruido ni VAD)
+
+    def cambiar_formato(self, formato):
+        """Adopta un formato nuevo (p. ej. ajustado al dispositivo) recreando lo que depende de él"""
+        self.formato = formato
+        self._conversion = np.empty(formato.blocksize // formato.diezmado + 1, dtype=np.float32)
+        self.detector_voz = type(self.detector_voz)(formato.samplerate_efectivo)
+
+    def cambiar_bloque(self, blocksize):
+        """
+        Adopta otro tamaño de bloque conservando los detectores y su estado.
+
+        Llamar solo con el stream detenido (AdaptadorBloque reinicia el stream
+        desde el hilo principal). Los detectores de vad.py se adaptan solos a
+        la longitud de cada bloque.
+        """
+        self.formato = self.formato.con_bloque(blocksize)
+        self._conversion = np.empty(blocksize // self.formato.diezmado + 1, dtype=np.float32)
+
+    def configurar(self, volumen_umbral, habla_liberacion, habla_retencion,
+                   detector_voz, umbral_auto, umbral_auto_margen):
+        """
+        Publica los parámetros de detección de config.json.
+
+        Se puede llamar desde cualquier hilo. Los parámetros se publican como
+        una sola tupla (una asignación de referencia) y procesar() los aplica
+        al empezar el siguiente bloque, en el hilo de audio: ningún bloque ve
+        una mezcla de parámetros viejos y nuevos. El detector de voz solo se
+        recrea si cambia su nombre; el resto se actualiza en el lugar, sin
+        interrumpir el stream.
+        """
+        self._parametros = (volumen_umbral, habla_liberacion, habla_retencion,
+                            detector_voz, umbral_auto, umbral_auto_margen)
+
+    def _aplicar(self, parametros):
+        volumen_umbral, habla_liberacion, habla_retencion, detector_voz, umbral_auto, umbral_auto_margen = parametros
+        self.piso_ruido.margen = umbral_auto_margen
+        self.umbral_auto = umbral_auto
+        umbral = self.piso_ruido.umbral if umbral_auto else volumen_umbral
+        self.detector_habla.configurar(umbral, habla_liberacion, habla_retencion)
+        if detector_voz != self.detector_voz.nombre:
+            self.detector_voz = crear_detector(detector_voz, self.formato.samplerate_efectivo)
+
+    def procesar(self, indata, frames, tiempo):
+        """
+        Procesa un bloque (frames, canales) tal como lo entrega sounddevice.
+
+        Retorna:
+            bool | None: Transición de DetectorHabla (ver DetectorHabla.procesar)
+        """
+        parametros = self._parametros
+        if parametros is not self._aplicados:
+            self._aplicar(parametros)
+            self._aplicados = parametros
+
+        diezmado = self.formato.diezmado
+        canal = indata[:, 0]
+        if diezmado == 1:
+            muestras = canal
+            n = len(muestras)
+        else:
+            n = len(canal) // diezmado
+            muestras = canal[:n * diezmado].reshape(n, diezmado)  # Una fila por grupo de muestras (vista)
+        if n == 0:
+            return None
+
+        duracion = frames / self.formato.samplerate
+        if not canal.any():
+            # Silencio digital (micrófono silenciado o dispositivo en pausa): ni RMS, ni piso de ruido ni VAD
+            self.niveles.escribir(0.0, 0.0, tiempo)
+            self.bloques_silencio += 1
+            return self.detector_habla.procesar(0.0, duracion)
+
+        escala = self.formato.escala
+        if diezmado > 1 or escala != 1.0:
+            if n > len(self._conversion):
+                self._conversion = np.empty(n, dtype=np.float32)
+            convertidas = self._conversion[:n]
+            if diezmado > 1:
+                # Paso bajo antes de diezmar: media de cada grupo (filtro de caja), ya escalada
+                np.add.reduce(muestras, axis=1, dtype=np.float32, out=convertidas)
+                np.multiply(convertidas, escala / diezmado, out=convertidas)
+            else:
+                np.multiply(muestras, escala, out=convertidas, casting="unsafe")
+            muestras = convertidas
+
+        volumen = float(np.sqrt(np.dot(muestras, muestras) / n))
+        pico = float(max(muestras.max(), -muestras.min()))
+        self.niveles.escribir(volumen, pico, tiempo)
+
+        umbral = self.piso_ruido.actualizar(volumen, duracion, self.detector_habla.hablando)
+        if self.umbral_auto:
+            self.detector_habla.ajustar_umbral(umbral)
+
+        nivel_voz = self.detector_voz.medir(muestras, volumen)
+        return self.detector_habla.procesar(nivel_voz, duracion)
+
+
+class AdaptadorBloque:
+    """
+    Elige el tamaño de bloque de audio según el coste medido del callback y los desbordes.
+
+    Un bloque más pequeño reduce la latencia de detección (128 muestras a
+    16 kHz son 8 ms, frente a 32 ms con 512), pero multiplica los callbacks
+    por segundo y deja menos margen antes de que el dispositivo desborde.
+
+    Arquitectura técnica:
+        - registrar() se llama en el hilo de audio tras cada callback: solo
+          actualiza contadores (un único escritor, sin bloqueos)
+        - evaluar() se llama periódicamente en el hilo principal y decide, a
+          partir de lo ocurrido desde la evaluación anterior:
+            * Crecer (x2, hasta maximo) si hubo desbordes o si algún callback
+              usó más de CARGA_MAXIMA de su periodo
+            * Reducir (/2, hasta minimo) tras `espera` evaluaciones seguidas
+              sin desbordes y con el peor callback por debajo de CARGA_MINIMA
+        - Si una reducción provoca problemas, la espera antes de volver a
+          reducir se duplica (hasta ESPERA_MAXIMA): una máquina que no
+          aguanta bloques pequeños se estabiliza en lugar de oscilar
+        - Quien llama reinicia el stream con el nuevo tamaño y luego llama a
+          descartar(), para no juzgar el tamaño nuevo por el arranque
+    """
+    CARGA_MAXIMA = 0.5    # Fracción del periodo del bloque a partir de la cual crecer
+    CARGA_MINIMA = 0.15   # Fracción por debajo de la cual se puede reducir
+    ESPERA_INICIAL = 5    # Evaluaciones estables antes de reducir
+    ESPERA_MAXIMA = 80
+
+    def __init__(self, minimo=128, maximo=1024):
+        self.minimo = max(16, int(minimo))
+        self.maximo = max(self.minimo, int(maximo))
+        # Escritos solo por el hilo de audio
+        self.callbacks = 0
+        self.desbordes = 0
+        self.peor_carga = 0.0
+        self._ventana_audio = 0
+        # Estado del hilo principal
+        self.ventana = 0
+        self._vistos = (0, 0)
+        self._estables = 0
+        self._ultimo = None  # "crecer" o "reducir"
+        self.espera = self.ESPERA_INICIAL
+        self.cambios = 0
+
+    def acotar(self, blocksize):
+        return max(self.minimo, min(self.maximo, int(blocksize)))
+
+    def registrar(self, duracion, periodo, desborde):
+        """Hilo de audio: duración del callback y periodo del bloque (segundos)"""
+        carga = duracion / periodo if periodo > 0 else 0.0
+        if self._ventana_audio != self.ventana:
+            # Nueva ventana de evaluación: el peor valor empieza de cero
+            self._ventana_audio = self.ventana
+            self.peor_carga = carga
+        elif carga > self.peor_carga:
+            self.peor_carga = carga
+        if desborde:
+            self.desbordes += 1
+        self.callbacks += 1
+
+    def descartar(self):
+        """Ignora lo registrado hasta ahora (tras reiniciar el stream)"""
+        self._vistos = (self.callbacks, self.desbordes)
+        self.ventana += 1
+        self._estables = 0
+
+    def evaluar(self, blocksize):
+        """
+        Hilo principal: retorna el nuevo tamaño de bloque, o None para mantenerlo.
+        """
+        callbacks, desbordes, peor = self.callbacks, self.desbordes, self.peor_carga
+        nuevos = callbacks - self._vistos[0]
+        desbordes_nuevos = desbordes - self._vistos[1]
+        self._vistos = (callbacks, desbordes)
+        self.ventana += 1
+        if nuevos == 0:
+            return None  # Stream detenido o sin datos: nada que juzgar
+
+        if desbordes_nuevos or peor > self.CARGA_MAXIMA:
+            self._estables = 0
+            if self._ultimo == "reducir":
+                self.espera = min(self.espera * 2, self.ESPERA_MAXIMA)
+            if blocksize >= self.maximo:
+                return None
+            return self._cambiar(self.acotar(blocksize * 2), "crecer",
+                                 desbordes_nuevos, peor)
+
+        self._estables += 1
+        if (self._estables >= self.espera and peor < self.CARGA_MINIMA
+                and blocksize > self.minimo):
+            self._estables = 0
+            return self._cambiar(self.acotar(blocksize // 2), "reducir",
+                                 desbordes_nuevos, peor)
+        return None
+
+    def _cambiar(self, blocksize, direccion, desbordes, peor):
+        self._ultimo = direccion
+        self.cambios += 1
+        logger.info("Tamaño de bloque: %s a %d (desbordes %d, peor carga %.0f%%)",
+                    direccion, blocksize, desbordes, peor * 100)
+        return blocksize
+
+    def estadisticas(self):
+        return {
+            "callbacks": self.callbacks,
+            "desbordes": self.desbordes,
+            "cambios": self.cambios,
+            "espera": self.espera,
+        }
@@ -0,0 +1,51 @@
+"""
+Benchmark de carga en frío de recursos: atlas empaquetado vs PNG sueltos.
+
+Cada medición corre en un proceso nuevo, para que ninguna caché de Qt del
+proceso anterior favorezca al segundo modo. Requiere haber generado el atlas
+con build_atlas.py.
+
+Uso:
+    QT_QPA_PLATFORM=offscreen python benchmarks/asset_load.py [repeticiones]
+"""
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MEDICION = """
+import json, sys
+from PyQt5.QtWidgets import QApplication
+app = QApplication([])
+from atlas import AtlasSprites
+sprites = AtlasSprites.cargar() if sys.argv[1] == "atlas" else AtlasSprites.cargar(imagen="")
+print(json.dumps({"origen": sprites.origen, "lecturas": sprites.lecturas, "carga_ms": sprites.tiempo_ms}))
+"""
+
+
+def medir(modo, repeticiones):
+    resultados = []
+    for _ in range(repeticiones):
+        salida = subprocess.run([sys.executable, "-c", MEDICION, modo], cwd=RAIZ,
+                                capture_output=True, text=True, check=True).stdout
+        resultados.append(json.loads(salida.strip().splitlines()[-1]))
+    tiempos = np.array([r["carga_ms"] for r in resultados])
+    return {
+        "origen": resultados[0]["origen"],
+        "lecturas": resultados[0]["lecturas"],
+        "carga_p50_ms": round(float(np.percentile(tiempos, 50)), 2),
+        "carga_max_ms": round(float(tiempos.max()), 2),
+    }
+
+
+if __name__ == "__main__":
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    print(json.dumps({
+        "repeticiones": repeticiones,
+        "atlas": medir("atlas", repeticiones),
+        "archivos": medir("archivos", repeticiones),
+    }, indent=4))
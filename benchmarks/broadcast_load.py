@@ -0,0 +1,192 @@
+"""
+Prueba de carga del servidor de difusión (broadcast.py) con cientos de clientes locales.
+
+Arranca ServidorEstado en un socket Unix temporal y conecta --clientes
+suscriptores repartidos en --procesos procesos hijos (para que los clientes
+no compitan por el GIL del productor). Una fracción (--lentos) se conecta y
+no lee nunca: sus colas se llenan y el servidor descarta los mensajes más
+antiguos. El productor publica --hz estados por segundo desde el hilo
+principal, como lo haría on_frame.
+
+Mide:
+    - Coste de publicar() en el productor (p50/p99/máximo): no debe crecer
+      con el número de clientes ni con los clientes lentos
+    - Mensajes recibidos por los clientes normales y su latencia (del
+      publicar() a la lectura, con time.monotonic(), común a los procesos)
+    - Mensajes descartados por las colas de los clientes lentos
+    - CPU del proceso servidor (productor + hilo del servidor)
+
+El resultado es JSON; el código de salida es 1 si se superan los UMBRALES.
+
+Uso:
+    python benchmarks/broadcast_load.py [--clientes 300] [--lentos 0.1] [--hz 60] [--segundos 20]
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from broadcast import ServidorEstado  # noqa: E402
+from metrics import metricas  # noqa: E402
+
+# Límites absolutos (menor es mejor). publicar() comparte el GIL con el hilo del
+# servidor: su p99 queda acotado por el intervalo de cambio de hilo (5 ms)
+UMBRALES = {
+    "publicar_p99_us": 5000.0,
+    "latencia_p99_ms": 50.0,
+}
+
+
+async def _cliente(ruta, recibidos, indice, latencias):
+    lector, escritor = await asyncio.open_unix_connection(ruta)
+    try:
+        while True:
+            linea = await lector.readline()
+            if not linea:
+                break
+            # {"t":12.3456,... : basta con el primer campo, sin decodificar todo el JSON
+            t = float(linea[5:linea.index(b",")])
+            latencias.append(time.monotonic() - t)
+            recibidos[indice] += 1
+    except (ConnectionError, OSError):
+        pass
+    finally:
+        escritor.close()
+
+
+async def _clientes(ruta, normales, lentos, listos, fin):
+    latencias = []
+    recibidos = [0] * normales
+    tareas = [asyncio.ensure_future(_cliente(ruta, recibidos, i, latencias)) for i in range(normales)]
+    # Clientes lentos: sockets simples que nunca se leen (un StreamReader leería por su cuenta
+    # hasta llenar su propio buffer)
+    sin_leer = []
+    for _ in range(lentos):
+        conexion = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        conexion.connect(ruta)
+        sin_leer.append(conexion)
+    await asyncio.sleep(0.5)  # Dar tiempo a que se establezcan las conexiones
+    listos.set()
+    while not fin.is_set():
+        await asyncio.sleep(0.05)
+    for tarea in tareas:
+        tarea.cancel()
+    await asyncio.gather(*tareas, return_exceptions=True)
+    for conexion in sin_leer:
+        conexion.close()
+    return recibidos, latencias
+
+
+def proceso_clientes(ruta, normales, lentos, listos, fin, resultados):
+    recibidos, latencias = asyncio.run(_clientes(ruta, normales, lentos, listos, fin))
+    # Solo una muestra de las latencias: el resultado cruza procesos por una cola
+    muestra = latencias[::max(1, len(latencias) // 20000)]
+    resultados.put((recibidos, muestra))
+
+
+def percentil(valores, p):
+    return round(float(np.percentile(valores, p)), 3) if len(valores) else None
+
+
+def ejecutar(clientes, fraccion_lentos, hz, segundos, procesos):
+    ruta = os.path.join(tempfile.mkdtemp(prefix="catnipy_difusion_"), "estado.sock")
+    servidor = ServidorEstado(f"unix:{ruta}")
+    servidor.iniciar()
+
+    lentos = int(clientes * fraccion_lentos)
+    normales = clientes - lentos
+    fin = multiprocessing.Event()
+    resultados = multiprocessing.Queue()
+    hijos = []
+    for i in range(procesos):
+        listos = multiprocessing.Event()
+        hijo = multiprocessing.Process(target=proceso_clientes, daemon=True, args=(
+            ruta, normales // procesos + (i < normales % procesos),
+            lentos // procesos + (i < lentos % procesos), listos, fin, resultados))
+        hijo.start()
+        hijos.append((hijo, listos))
+    for _, listos in hijos:
+        listos.wait(30)
+    limite = time.monotonic() + 10.0
+    while servidor.suscriptores < clientes and time.monotonic() < limite:
+        time.sleep(0.05)
+    conectados = servidor.suscriptores
+
+    costes = []
+    periodo = 1.0 / hz
+    cpu_inicial = time.process_time()
+    inicio = time.perf_counter()
+    siguiente = inicio
+    publicados = 0
+    while time.perf_counter() - inicio < segundos:
+        antes = time.perf_counter_ns()
+        servidor.publicar({"t": round(time.monotonic(), 4), "hablando": publicados % 2 == 0,
+                           "escribiendo": False, "moviendo": True, "nivel": 0.031})
+        costes.append((time.perf_counter_ns() - antes) / 1000.0)
+        publicados += 1
+        siguiente += periodo
+        espera = siguiente - time.perf_counter()
+        if espera > 0:
+            time.sleep(espera)
+    duracion = time.perf_counter() - inicio
+    time.sleep(0.5)  # Dejar que se vacíen las colas de los clientes normales
+    cpu = time.process_time() - cpu_inicial
+
+    fin.set()
+    recibidos, latencias = [], []
+    for _ in hijos:
+        parciales, muestra = resultados.get(timeout=30)
+        recibidos.extend(parciales)
+        latencias.extend(muestra)
+    for hijo, _ in hijos:
+        hijo.join(5)
+    servidor.detener()
+
+    contadores = metricas().instantanea()["contadores"]
+    return {
+        "clientes": clientes,
+        "clientes_conectados": conectados,
+        "clientes_lentos": lentos,
+        "publicados": publicados,
+        "segundos": round(duracion, 2),
+        "cpu_por_segundo": round(cpu / duracion, 3),
+        "publicar_p50_us": percentil(costes, 50),
+        "publicar_p99_us": percentil(costes, 99),
+        "publicar_max_us": round(max(costes), 1),
+        "recibidos_min": min(recibidos) if recibidos else 0,
+        "recibidos_completos": sum(r >= publicados for r in recibidos),
+        "latencia_p50_ms": percentil([l * 1000.0 for l in latencias], 50),
+        "latencia_p99_ms": percentil([l * 1000.0 for l in latencias], 99),
+        "descartados": contadores.get("difusion.descartados", 0),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga del servidor de difusión de estado")
+    parser.add_argument("--clientes", type=int, default=300, help="Suscriptores conectados")
+    parser.add_argument("--lentos", type=float, default=0.1, help="Fracción de clientes que no leen")
+    parser.add_argument("--hz", type=float, default=60.0, help="Estados publicados por segundo")
+    parser.add_argument("--segundos", type=float, default=20.0,
+                        help="Duración de la carga (lo bastante larga para llenar los buffers de los lentos)")
+    parser.add_argument("--procesos", type=int, default=4, help="Procesos entre los que repartir los clientes")
+    args = parser.parse_args(argv)
+
+    resultado = ejecutar(args.clientes, args.lentos, args.hz, args.segundos, args.procesos)
+    superados = [{"metrica": nombre, "valor": resultado[nombre], "limite": limite}
+                 for nombre, limite in UMBRALES.items()
+                 if resultado.get(nombre) is not None and resultado[nombre] > limite]
+    print(json.dumps({"resultado": resultado, "regresiones": superados}, indent=4))
+    return 1 if superados else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
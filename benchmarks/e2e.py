@@ -0,0 +1,383 @@
+"""
+Benchmark de extremo a extremo de CatNipy sin pantalla, micrófono ni dispositivos de entrada.
+
+Arranca la aplicación real (CatNipy, con su superficie, animaciones, bus de
+entrada y ventana de configuración abierta) bajo QT_QPA_PLATFORM=offscreen y
+reemplaza solo las fuentes externas:
+
+    - Audio: un hilo entrega bloques al ritmo real por audio_callback,
+      alternando voz (tono de 220 Hz) y silencio (ruido de fondo)
+    - Mouse: ráfagas de 1000 movimientos por segundo por on_global_mouse_move
+    - Teclado: auto-repetición sostenida (pulsaciones a 30 Hz sin soltar)
+      por on_global_key_press, y una liberación al final de cada ráfaga
+
+Registra tiempo de CPU, despertares (cambios de contexto del proceso,
+incluidos los hilos de las fuentes sintéticas, que son constantes entre
+ejecuciones), eventos recibidos y aplicados, pintados y la latencia desde el
+inicio de cada ráfaga hasta el cambio de estado de la capa correspondiente
+(boca, teclado, mouse). Al final detiene las fuentes y comprueba que el
+reloj de fotogramas queda detenido (ticks_en_reposo = 0).
+
+Con --modo motor se ejecuta solo el motor de detección (engine.py) con las
+mismas fuentes y su bucle sin interfaz, sin importar PyQt5, para comparar
+CPU, despertares y memoria (RSS) con la aplicación completa. La latencia se
+mide entonces hasta el cambio de la bandera correspondiente (hablando,
+escribiendo, moviendo).
+
+El resultado es JSON. Con --base se compara con una ejecución anterior y se
+marcan como regresión las métricas que empeoran más que TOLERANCIA; además
+se comprueban los límites absolutos de UMBRALES. El código de salida es 1 si
+hay alguna regresión.
+
+Uso:
+    python benchmarks/e2e.py [--modo gui|motor] [--segundos 10] [--salida e2e.json] [--base anterior.json]
+                             [--traza traza.json]
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np  # noqa: E402
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tracing  # noqa: E402
+from config import Configuracion, DEFAULT_CONFIG  # noqa: E402
+from engine import MotorDeteccion, ejecutar as ejecutar_motor  # noqa: E402
+from metrics import metricas, memoria_residente_mb  # noqa: E402
+
+MOVIMIENTOS_POR_SEGUNDO = 1000
+REPETICION_TECLA_HZ = 30
+RAFAGA_S = 1.5       # Duración de cada ráfaga de mouse / teclado / voz
+PAUSA_S = 0.75       # Pausa entre ráfagas (más que los retornos a reposo de animation.py)
+REPOSO_S = 1.0       # Espera tras detener las fuentes, y duración de la medición en reposo
+
+# Límites absolutos (menor es mejor); se marcan como regresión si se superan
+UMBRALES = {
+    "cpu_por_segundo": 0.5,
+    "latencia_boca_p99_ms": 150.0,
+    "latencia_teclado_p99_ms": 100.0,
+    "latencia_mouse_p99_ms": 100.0,
+    "retraso_gui_p99_ms": 50.0,
+    "ticks_en_reposo": 0,
+}
+
+# Empeoramiento relativo tolerado respecto a --base
+TOLERANCIA = 0.25
+
+# Métricas comparadas con --base (todas: menor es mejor)
+COMPARADAS = ("cpu_por_segundo", "despertares_por_segundo", "rss_mb", "pintados_por_segundo", "ticks_por_segundo",
+              "latencia_boca_p50_ms", "latencia_boca_p99_ms",
+              "latencia_teclado_p50_ms", "latencia_teclado_p99_ms",
+              "latencia_mouse_p50_ms", "latencia_mouse_p99_ms", "retraso_gui_p99_ms")
+
+
+class MotorBanco(MotorDeteccion):
+    """MotorDeteccion con fuentes de audio y entrada sintéticas (reemplazan a sounddevice y pynput)"""
+    def __init__(self, cfg):
+        super().__init__(cfg)
+        self.parar = threading.Event()
+        self.hilos = []
+        self.marcas = {}       # capa -> instante del inicio de la ráfaga pendiente de reflejarse
+        self.latencias = {"boca": [], "teclado": [], "mouse": []}
+
+    def iniciar_audio(self):
+        self._hilo(self._fuente_audio)
+        return True
+
+    def iniciar_monitores(self):
+        self._hilo(self._fuente_mouse)
+        self._hilo(self._fuente_teclado)
+
+    def detener(self):
+        self.parar.set()
+        for hilo in self.hilos:
+            hilo.join(timeout=2.0)
+
+    def _hilo(self, funcion):
+        hilo = threading.Thread(target=funcion, daemon=True)
+        self.hilos.append(hilo)
+        hilo.start()
+
+    def _marcar(self, capa):
+        self.marcas.setdefault(capa, time.perf_counter())
+
+    def medir(self, capa):
+        """Registra la latencia de la ráfaga pendiente de la capa (hilo consumidor)"""
+        marca = self.marcas.pop(capa, None)
+        if marca is not None:
+            self.latencias[capa].append((time.perf_counter() - marca) * 1000.0)
+
+    def _rafagas(self):
+        """Itera (activo, instante) cada milisegundo alternando ráfagas y pausas"""
+        inicio = time.perf_counter()
+        ciclo = RAFAGA_S + PAUSA_S
+        while not self.parar.is_set():
+            ahora = time.perf_counter()
+            yield (ahora - inicio) % ciclo < RAFAGA_S, ahora
+            time.sleep(0.001)
+
+    def _fuente_audio(self):
+        formato = self.procesador.formato
+        n = formato.blocksize
+        periodo = n / formato.samplerate
+        t = np.arange(n) / formato.samplerate
+        voz = (0.1 * np.sin(2 * np.pi * 220 * t)).astype(np.float32).reshape(n, 1)
+        rng = np.random.default_rng(0)
+        silencio = (rng.standard_normal((n, 1)) * 0.001).astype(np.float32)
+        inicio = time.perf_counter()
+        siguiente = inicio
+        hablando = False
+        ciclo = RAFAGA_S + PAUSA_S
+        while not self.parar.is_set():
+            activo = (siguiente - inicio) % ciclo < RAFAGA_S
+            if activo and not hablando:
+                self._marcar("boca")
+            hablando = activo
+            self.audio_callback(voz if activo else silencio, n, None, None)
+            siguiente += periodo
+            espera = siguiente - time.perf_counter()
+            if espera > 0:
+                time.sleep(espera)
+
+    def _fuente_mouse(self):
+        publicados = 0
+        anterior = False
+        inicio_rafaga = None
+        for activo, ahora in self._rafagas():
+            if activo and not anterior:
+                self._marcar("mouse")
+                inicio_rafaga, publicados = ahora, 0
+            if activo:
+                debidos = int((ahora - inicio_rafaga) * MOVIMIENTOS_POR_SEGUNDO)
+                for i in range(publicados, debidos):
+                    self.on_global_mouse_move(i % 1920, 500)
+                publicados = debidos
+            anterior = activo
+
+    def _fuente_teclado(self):
+        anterior = False
+        siguiente = 0.0
+        for activo, ahora in self._rafagas():
+            if activo and not anterior:
+                self._marcar("teclado")
+                siguiente = ahora
+            if activo and ahora >= siguiente:
+                self.on_global_key_press("a")  # Auto-repetición: pulsaciones sin liberación
+                siguiente += 1.0 / REPETICION_TECLA_HZ
+            if anterior and not activo:
+                self.on_global_key_release("a")
+            anterior = activo
+
+
+def clase_catnipy_banco():
+    """
+    CatNipy que mide la latencia entrada -> cambio de estado de cada capa (hilo principal).
+
+    Se crea bajo demanda para que --modo motor no importe PyQt5.
+    """
+    from brain import CatNipy
+
+    class CatNipyBanco(CatNipy):
+        def update_mouth_state(self, estado):
+            if estado == "abierta":
+                self.motor.medir("boca")
+            super().update_mouth_state(estado)
+
+        def update_keyboard_state(self, estado):
+            if estado == "typing_handdown":
+                self.motor.medir("teclado")
+            super().update_keyboard_state(estado)
+
+        def update_mouse_state(self, estado):
+            if estado == "mouse_move":
+                self.motor.medir("mouse")
+            super().update_mouse_state(estado)
+
+    return CatNipyBanco
+
+
+class SalidaBanco:
+    """Salida del bucle sin interfaz que mide la latencia hasta cada bandera activada"""
+    def __init__(self, motor):
+        self.motor = motor
+        self.cambios = 0
+
+    def escribir(self, estado, ahora):
+        self.cambios += 1
+        for capa, activa in zip(("boca", "teclado", "mouse"), estado.como_tupla()):
+            if activa:
+                self.motor.medir(capa)
+
+
+def percentil(valores, p):
+    return round(float(np.percentile(valores, p)), 2) if valores else None
+
+
+def config_banco():
+    """Configuración por defecto en un directorio temporal, sin instantáneas periódicas de métricas"""
+    directorio = tempfile.mkdtemp(prefix="catnipy_e2e_")
+    ruta_config = os.path.join(directorio, "config.json")
+    with open(ruta_config, "w") as f:
+        json.dump(dict(DEFAULT_CONFIG, metricas_intervalo=0), f)
+    return ruta_config
+
+
+def medir(carga):
+    """Ejecuta carga() y retorna (duración, cpu, despertares) del proceso"""
+    uso_inicial = resource.getrusage(resource.RUSAGE_SELF)
+    cpu_inicial = time.process_time()
+    inicio = time.perf_counter()
+    carga()
+    duracion = time.perf_counter() - inicio
+    cpu = time.process_time() - cpu_inicial
+    uso_final = resource.getrusage(resource.RUSAGE_SELF)
+    despertares = ((uso_final.ru_nvcsw - uso_inicial.ru_nvcsw)
+                   + (uso_final.ru_nivcsw - uso_inicial.ru_nivcsw))
+    return duracion, cpu, despertares
+
+
+def ejecutar_gui(segundos):
+    from PyQt5.QtCore import QTimer
+    from PyQt5.QtWidgets import QApplication
+    from config_store import AlmacenConfig
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    almacen = AlmacenConfig(config_banco(), DEFAULT_CONFIG)
+    motor = MotorBanco(almacen.actual)
+    cat = clase_catnipy_banco()(almacen, motor)
+    cat.show()
+    cat.open_settings_window()
+    app.processEvents()
+
+    def carga():
+        QTimer.singleShot(int(segundos * 1000), app.quit)
+        app.exec_()
+    ticks = cat.reloj.ticks
+    duracion, cpu, despertares = medir(carga)
+    ticks = cat.reloj.ticks - ticks
+    pintados = cat.superficie.pintados
+
+    # Reposo: sin fuentes, tras los retornos de las capas, el reloj de fotogramas debe estar detenido
+    motor.detener()
+    QTimer.singleShot(int(REPOSO_S * 1000), app.quit)
+    app.exec_()
+    ticks_reposo = cat.reloj.ticks
+    QTimer.singleShot(int(REPOSO_S * 1000), app.quit)
+    app.exec_()
+    ticks_reposo = cat.reloj.ticks - ticks_reposo
+
+    rss = memoria_residente_mb()
+    cat.settings_window.close()
+    cat.close()
+    return duracion, cpu, despertares, rss, motor, {
+        "pintados": pintados,
+        "pintados_por_segundo": round(pintados / duracion, 1),
+        "ticks_por_segundo": round(ticks / duracion, 1),
+        "ticks_en_reposo": ticks_reposo,
+        "retraso_gui_p99_ms": metricas().instantanea()["histogramas"]["gui.retraso_ms"]["p99"],
+    }
+
+
+def ejecutar_sin_interfaz(segundos):
+    cfg = Configuracion.cargar(config_banco(), DEFAULT_CONFIG)
+    motor = MotorBanco(cfg)
+    salida = SalidaBanco(motor)
+    parar = threading.Event()
+    motor.iniciar()
+
+    def carga():
+        temporizador = threading.Timer(segundos, lambda: (parar.set(), motor.despertar.set()))
+        temporizador.start()
+        ejecutar_motor(motor, salida, cfg.fps_ui, parar)
+    duracion, cpu, despertares = medir(carga)
+
+    motor.detener()
+    return duracion, cpu, despertares, memoria_residente_mb(), motor, {"cambios_estado": salida.cambios}
+
+
+def ejecutar(segundos, modo="gui"):
+    duracion, cpu, despertares, rss, motor, propios = (
+        ejecutar_gui if modo == "gui" else ejecutar_sin_interfaz)(segundos)
+    entrada = motor.bus_entrada.estadisticas()
+    resultado = {
+        "modo": modo,
+        "segundos": round(duracion, 2),
+        "cpu_s": round(cpu, 3),
+        "cpu_por_segundo": round(cpu / duracion, 3),
+        "despertares_por_segundo": round(despertares / duracion, 1),
+        "rss_mb": rss,
+        "callbacks_audio": metricas().instantanea()["contadores"].get("audio.callbacks", 0),
+        "eventos_recibidos": entrada["recibidos"],
+        "eventos_descartados": entrada["descartados"],
+        "eventos_aplicados": entrada["aplicados"],
+    }
+    resultado.update(propios)
+    for capa, valores in motor.latencias.items():
+        resultado[f"rafagas_{capa}"] = len(valores)
+        resultado[f"latencia_{capa}_p50_ms"] = percentil(valores, 50)
+        resultado[f"latencia_{capa}_p99_ms"] = percentil(valores, 99)
+    return resultado
+
+
+def regresiones(resultado, base=None):
+    """Lista de métricas que superan UMBRALES o empeoran más que TOLERANCIA respecto a base"""
+    encontradas = []
+    for nombre, limite in UMBRALES.items():
+        valor = resultado.get(nombre)
+        if valor is not None and valor > limite:
+            encontradas.append({"metrica": nombre, "valor": valor, "limite": limite})
+    if base is not None:
+        for nombre in COMPARADAS:
+            valor, anterior = resultado.get(nombre), base.get(nombre)
+            if valor is None or not anterior:
+                continue
+            if valor > anterior * (1 + TOLERANCIA):
+                encontradas.append({"metrica": nombre, "valor": valor, "base": anterior,
+                                    "cambio": f"+{100.0 * (valor / anterior - 1):.0f}%"})
+    return encontradas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de extremo a extremo de CatNipy (sin pantalla)")
+    parser.add_argument("--modo", choices=("gui", "motor"), default="gui",
+                        help="Aplicación completa o solo el motor de detección sin interfaz")
+    parser.add_argument("--segundos", type=float, default=10.0, help="Duración de la carga")
+    parser.add_argument("--salida", help="Archivo JSON donde guardar el resultado")
+    parser.add_argument("--base", help="Resultado JSON anterior con el que comparar")
+    parser.add_argument("--traza", help="Guardar también una traza trace-event (tracing.py) en este archivo")
+    args = parser.parse_args(argv)
+
+    if args.traza:
+        tracing.activar(args.traza)
+        if args.modo == "gui":
+            from brain import instrumentar_traza
+            instrumentar_traza()
+        else:
+            tracing.instrumentar(MotorDeteccion, ("audio_callback", "on_global_key_press",
+                                                  "on_global_mouse_move"), "motor")
+
+    resultado = ejecutar(args.segundos, args.modo)
+    base = None
+    if args.base:
+        with open(args.base, "r") as f:
+            base = json.load(f)
+            base = base.get("resultado", base)
+    informe = {"resultado": resultado, "regresiones": regresiones(resultado, base)}
+    texto = json.dumps(informe, indent=4)
+    if args.salida:
+        with open(args.salida, "w") as f:
+            f.write(texto)
+    print(texto)
+    return 1 if informe["regresiones"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""
+Benchmark del coste de pintado por cambio de estado.
+
+Compara el antiguo apilado de cuatro QLabel translúcidos (base, teclado,
+mouse, boca) con las superficies únicas que muestran fotogramas de
+CacheFotogramas: SuperficieGato ("fotogramas", repinta todo el widget) y
+LienzoGato ("regiones", repinta solo el rectángulo de la capa que cambió).
+Recorre la misma secuencia de cambios de estado en todos los casos y pinta
+las regiones pendientes de forma síncrona con QApplication.processEvents().
+
+Con una escala (y QT_SCALE_FACTOR para simular una pantalla HiDPI) las
+superficies muestran fotogramas escalados: las imágenes se suavizan una vez
+al precomponer y el recuento de escalamientos no crece con los cambios. El
+apilado de referencia sigue a tamaño original.
+
+Uso:
+    QT_QPA_PLATFORM=offscreen python benchmarks/frame_paint.py [cambios] [escala]
+"""
+import itertools
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtCore import Qt  # noqa: E402
+from PyQt5.QtGui import QPixmap  # noqa: E402
+from PyQt5.QtWidgets import QApplication, QLabel, QWidget  # noqa: E402
+
+from atlas import cargar_sprites  # noqa: E402
+from brain import CAT_TALKING  # noqa: E402
+from frames import (CacheFotogramas, LienzoGato, SuperficieGato,  # noqa: E402
+                    ESTADOS_MOUSE, ESTADOS_TECLADO)
+
+
+def cargar():
+    sprites = cargar_sprites()
+    teclado = {
+        "keyboard_idle": sprites["cat_keyboard_idle"],
+        "typing_handdown": sprites["cat_typing_handdown"],
+        "typing_handup": sprites["cat_typing_handup"],
+    }
+    mouse = {
+        "mouse_idle": sprites["cat_mouse_idle"],
+        "mouse_move": sprites["cat_mouse_move"],
+    }
+    return sprites["cat_idle"], teclado, mouse, sprites[CAT_TALKING]  # La boca que dibuja el gato
+
+
+def secuencia(cambios):
+    combinaciones = list(itertools.product(ESTADOS_TECLADO, ESTADOS_MOUSE, (False, True)))
+    rng = np.random.default_rng(0)
+    return [combinaciones[i] for i in rng.integers(0, len(combinaciones), cambios)]
+
+
+def capas_apiladas(base, teclado, mouse, boca, pasos):
+    """Cuatro QLabel translúcidos, como el init_ui original"""
+    base, boca = base.pixmap(), boca.pixmap()
+    teclado = {estado: sprite.pixmap() for estado, sprite in teclado.items()}
+    mouse = {estado: sprite.pixmap() for estado, sprite in mouse.items()}
+    ventana = QWidget()
+    ventana.setAttribute(Qt.WA_TranslucentBackground)
+    etiquetas = [QLabel(ventana) for _ in range(4)]
+    for etiqueta in etiquetas:
+        etiqueta.setAttribute(Qt.WA_TranslucentBackground)
+        etiqueta.resize(base.size())
+    etiqueta_base, etiqueta_teclado, etiqueta_mouse, etiqueta_boca = etiquetas
+    etiqueta_base.setPixmap(base)
+    etiqueta_boca.setPixmap(boca)
+    ventana.resize(base.size())
+    ventana.show()
+    QApplication.processEvents()  # Esperar a que la ventana quede expuesta
+
+    tiempos = []
+    for estado_teclado, estado_mouse, hablando in pasos:
+        inicio = time.perf_counter()
+        etiqueta_teclado.setPixmap(teclado.get(estado_teclado, QPixmap()))
+        etiqueta_mouse.setPixmap(mouse.get(estado_mouse, QPixmap()))
+        etiqueta_boca.setVisible(hablando)
+        QApplication.processEvents()
+        tiempos.append((time.perf_counter() - inicio) * 1e6)
+    ventana.close()
+    return np.array(tiempos)
+
+
+def fotograma_cacheado(clase, base, teclado, mouse, boca, pasos, escala=1.0):
+    """Una sola superficie (SuperficieGato o LienzoGato) con fotogramas pre-compuestos"""
+    cache = CacheFotogramas(base, teclado, mouse, boca, escala=escala, dpr=QApplication.instance().devicePixelRatio())
+    inicio = time.perf_counter()
+    cache.precomponer()
+    precomposicion_ms = (time.perf_counter() - inicio) * 1000.0
+
+    ventana = QWidget()
+    ventana.setAttribute(Qt.WA_TranslucentBackground)
+    superficie = clase(cache, ventana)
+    superficie.resize(cache.tamano())
+    ventana.resize(cache.tamano())
+    ventana.show()
+    QApplication.processEvents()  # Esperar a que la ventana quede expuesta
+
+    tiempos = []
+    for estado_teclado, estado_mouse, hablando in pasos:
+        inicio = time.perf_counter()
+        superficie.mostrar(estado_teclado, estado_mouse, hablando)
+        QApplication.processEvents()  # Pinta solo las regiones invalidadas
+        tiempos.append((time.perf_counter() - inicio) * 1e6)
+    ventana.close()
+    estadisticas = superficie.estadisticas()
+    estadisticas["escalamientos"] = cache.escalamientos  # Una vez por imagen, no por cambio ni por pintado
+    return np.array(tiempos), precomposicion_ms, estadisticas
+
+
+def resumen(tiempos):
+    return {
+        "cambios": int(len(tiempos)),
+        "medio_us": round(float(tiempos.mean()), 1),
+        "p50_us": round(float(np.percentile(tiempos, 50)), 1),
+        "p99_us": round(float(np.percentile(tiempos, 99)), 1),
+    }
+
+
+if __name__ == "__main__":
+    cambios = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    escala = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+    QApplication.setAttribute(Qt.AA_EnableHighDpiScaling)
+    app = QApplication(sys.argv)
+    imagenes = cargar()
+    pasos = secuencia(cambios)
+    apiladas = capas_apiladas(*imagenes, pasos)
+    resultado = {"capas_apiladas": resumen(apiladas)}
+    for clase in (SuperficieGato, LienzoGato):
+        tiempos, precomposicion_ms, pintado = fotograma_cacheado(clase, *imagenes, pasos, escala)
+        datos = resumen(tiempos)
+        datos.update(pintado)
+        datos["precomposicion_ms"] = round(precomposicion_ms, 2)
+        datos["mejora"] = round(float(apiladas.mean() / tiempos.mean()), 2)
+        resultado[clase.NOMBRE] = datos
+    print(json.dumps(resultado, indent=4))
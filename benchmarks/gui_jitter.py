@@ -0,0 +1,118 @@
+"""
+Benchmark de jitter del hilo de la GUI con y sin captura aislada.
+
+Mide cuánto se retrasa un QTimer periódico del hilo principal mientras se
+procesan audio y eventos de entrada sintéticos (sin micrófono ni dispositivos
+de entrada):
+
+    - en_proceso: las fuentes sintéticas corren como hilos del mismo proceso
+      que la GUI, compitiendo por el mismo GIL (equivalente al modo normal)
+    - aislada: las mismas fuentes corren en el proceso hijo de CapturaAislada
+
+Uso:
+    QT_QPA_PLATFORM=offscreen python benchmarks/gui_jitter.py [segundos]
+"""
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtCore import QTimer, Qt  # noqa: E402
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+
+from audio import BufferNiveles, DetectorHabla, FormatoCaptura, ProcesadorAudio  # noqa: E402
+from capture_process import (CapturaAislada, NUM_CAMPOS,  # noqa: E402
+                             _iniciar_fuentes_sinteticas)
+from vad import crear_detector  # noqa: E402
+
+PERIODO_MS = 5
+
+CONFIG = {
+    "volumen_umbral": 0.01,
+    "habla_liberacion": 0.6,
+    "habla_retencion": 0.25,
+    "detector_voz": "espectral",
+    "umbral_auto": True,
+    "umbral_auto_margen": 3.0,
+}
+
+
+def medir_jitter(app, segundos):
+    """Retrasos (ms) de un QTimer de PERIODO_MS respecto a su periodo nominal"""
+    retrasos = []
+    ultimo = [time.perf_counter()]
+
+    def tick():
+        ahora = time.perf_counter()
+        retrasos.append((ahora - ultimo[0]) * 1000.0 - PERIODO_MS)
+        ultimo[0] = ahora
+
+    timer = QTimer()
+    timer.setTimerType(Qt.PreciseTimer)
+    timer.timeout.connect(tick)
+    timer.start(PERIODO_MS)
+    QTimer.singleShot(int(segundos * 1000), app.quit)
+    app.exec_()
+    timer.stop()
+    return np.array(retrasos[1:])
+
+
+def resumen(retrasos):
+    return {
+        "muestras": int(len(retrasos)),
+        "p50_ms": round(float(np.percentile(retrasos, 50)), 3),
+        "p99_ms": round(float(np.percentile(retrasos, 99)), 3),
+        "max_ms": round(float(retrasos.max()), 3),
+    }
+
+
+def escenario_en_proceso(app, segundos):
+    formato = FormatoCaptura()
+    procesador = ProcesadorAudio(
+        formato,
+        crear_detector(CONFIG["detector_voz"], formato.samplerate_efectivo),
+        DetectorHabla(CONFIG["volumen_umbral"]),
+        BufferNiveles(),
+        umbral_auto=True,
+    )
+    estado = np.zeros(NUM_CAMPOS)
+
+    def procesar_bloque(indata, frames):
+        procesador.procesar(indata, frames, time.monotonic())
+
+    def contar(campo):
+        estado[campo] += 1
+
+    detener = _iniciar_fuentes_sinteticas(procesador, procesar_bloque, contar)
+    try:
+        return medir_jitter(app, segundos)
+    finally:
+        detener()
+
+
+def escenario_aislada(app, segundos):
+    config = dict(CONFIG)
+    config.update({"audio_samplerate": 16000, "audio_canales": 1, "audio_dtype": "float32",
+                   "audio_blocksize": 512, "audio_diezmado": 1})
+    captura = CapturaAislada(config, sintetico=True)
+    captura.iniciar()
+    time.sleep(1.0)  # Dar tiempo al proceso hijo para arrancar
+    try:
+        return medir_jitter(app, segundos)
+    finally:
+        captura.detener()
+
+
+if __name__ == "__main__":
+    segundos = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    app = QApplication(sys.argv)
+    resultados = {
+        "periodo_ms": PERIODO_MS,
+        "en_proceso": resumen(escenario_en_proceso(app, segundos)),
+        "aislada": resumen(escenario_aislada(app, segundos)),
+    }
+    print(json.dumps(resultados, indent=4))
@@ -0,0 +1,229 @@
+"""
+Benchmark de arranque: tiempo hasta el primer fotograma e informe de importaciones.
+
+Cada medición arranca CatNipy en un proceso nuevo con `python -X importtime`
+bajo QT_QPA_PLATFORM=offscreen y una configuración temporal, en dos modos:
+
+    - diferido: arranque_diferido = True (el gato en reposo se pinta antes
+      de crear el motor, abrir el audio e iniciar los listeners)
+    - sincrono: arranque_diferido = False (todo antes de mostrar la ventana)
+
+El proceso hijo marca en stderr el momento del primer pintado de la
+superficie y el de los subsistemas en marcha, así que el informe de
+-X importtime se separa en las importaciones pagadas antes del primer
+fotograma y las de después. Los tiempos se miden desde antes de lanzar el
+proceso (incluyen el arranque del intérprete). Sin servidor X ni PortAudio
+los listeners y el stream fallan al abrirse, pero sus módulos se importan
+igual, que es lo que se mide.
+
+El resultado es JSON con la mediana de las repeticiones de cada modo y las
+IMPORTACIONES_MOSTRADAS importaciones más caras de cada tramo. El código de
+salida es 1 si el modo diferido supera UMBRALES, si importa antes del primer
+fotograma algún módulo de MODULOS_DIFERIDOS, o si con --base empeora más que
+TOLERANCIA.
+
+Uso:
+    python benchmarks/startup.py [--repeticiones 5] [--salida arranque.json] [--base anterior.json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from config import DEFAULT_CONFIG  # noqa: E402
+
+MARCA_FOTOGRAMA = "## primer fotograma"
+MARCA_SUBSISTEMAS = "## subsistemas"
+
+# Módulos que el arranque diferido no debe importar antes del primer fotograma
+MODULOS_DIFERIDOS = ("numpy", "sounddevice", "pynput", "asyncio", "multiprocessing",
+                     "engine", "audio", "settings", "broadcast", "capture_process")
+
+# Límites absolutos del modo diferido (menor es mejor)
+UMBRALES = {
+    "primer_fotograma_ms": 1500.0,
+}
+
+# Empeoramiento relativo tolerado respecto a --base, y métricas comparadas
+TOLERANCIA = 0.25
+COMPARADAS = ("primer_fotograma_ms", "importaciones_antes_ms")
+
+IMPORTACIONES_MOSTRADAS = 10
+
+MEDICION = """
+import sys, time
+from PyQt5.QtCore import QEvent, QObject, QTimer
+from PyQt5.QtWidgets import QApplication
+app = QApplication([])
+from config import DEFAULT_CONFIG
+from config_store import AlmacenConfig
+from brain import CatNipy
+
+class CatNipyArranque(CatNipy):
+    def crear_motor(self):
+        motor = super().crear_motor()
+        pasos = (motor.iniciar_monitores, motor.iniciar_audio)
+        def iniciar():
+            for paso in pasos:
+                try:
+                    paso()
+                except Exception as e:  # Sin servidor X ni PortAudio: el módulo ya se importó
+                    print("## error", paso.__name__, type(e).__name__, file=sys.stderr)
+        motor.iniciar = iniciar
+        return motor
+
+class PrimerPintado(QObject):
+    def eventFilter(self, objeto, evento):
+        if evento.type() == QEvent.Paint:
+            objeto.removeEventFilter(self)
+            QTimer.singleShot(0, fotograma)
+        return False
+
+def fotograma():
+    pesados = [m for m in sys.argv[2].split(",") if m in sys.modules]
+    print("{} {!r} {}".format("%(fotograma)s", time.time(), ",".join(pesados)), file=sys.stderr, flush=True)
+    esperar()
+
+def esperar():
+    if cat.arranque["subsistemas_ms"] is None:
+        QTimer.singleShot(1, esperar)
+        return
+    print("{} {!r}".format("%(subsistemas)s", time.time()), file=sys.stderr, flush=True)
+    cat.detener_subsistemas()
+    app.quit()
+
+cat = CatNipyArranque(AlmacenConfig(sys.argv[1], DEFAULT_CONFIG))
+filtro = PrimerPintado()
+cat.superficie.installEventFilter(filtro)
+cat.show()
+app.exec_()
+""" % {"fotograma": MARCA_FOTOGRAMA, "subsistemas": MARCA_SUBSISTEMAS}
+
+
+def config_arranque(diferido):
+    """Configuración por defecto en un directorio temporal con el modo de arranque pedido"""
+    directorio = tempfile.mkdtemp(prefix="catnipy_arranque_")
+    ruta_config = os.path.join(directorio, "config.json")
+    with open(ruta_config, "w") as f:
+        json.dump(dict(DEFAULT_CONFIG, metricas_intervalo=0, arranque_diferido=diferido), f)
+    return ruta_config
+
+
+def importaciones(lineas):
+    """[(ms acumulados, módulo)] de las importaciones de primer nivel en líneas de -X importtime"""
+    resultado = []
+    for linea in lineas:
+        if not linea.startswith("import time:") or "cumulative" in linea:
+            continue
+        _, acumulado, modulo = linea[len("import time:"):].split("|")
+        if not modulo[1:].startswith(" "):  # Las anidadas van sangradas bajo quien las importa
+            resultado.append((int(acumulado) / 1000.0, modulo.strip()))
+    return resultado
+
+
+def medir_una(ruta_config):
+    """Un arranque en un proceso nuevo: marcas de tiempo e importaciones antes/después del fotograma"""
+    entorno = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    inicio = time.time()
+    proceso = subprocess.run([sys.executable, "-X", "importtime", "-c", MEDICION, ruta_config,
+                              ",".join(MODULOS_DIFERIDOS)],
+                             cwd=RAIZ, env=entorno, capture_output=True, text=True, timeout=60)
+    lineas = proceso.stderr.splitlines()
+    marcas = {linea.split()[1]: (indice, linea.split()) for indice, linea in enumerate(lineas)
+              if linea.startswith((MARCA_FOTOGRAMA, MARCA_SUBSISTEMAS))}
+    if "primer" not in marcas or "subsistemas" not in marcas:
+        raise RuntimeError("El arranque no llegó al primer fotograma:\n" + proceso.stderr[-2000:])
+    indice_fotograma, fotograma = marcas["primer"]
+    indice_subsistemas, subsistemas = marcas["subsistemas"]
+    antes = importaciones(lineas[:indice_fotograma])
+    despues = importaciones(lineas[indice_fotograma:indice_subsistemas])
+    return {
+        "primer_fotograma_ms": (float(fotograma[3]) - inicio) * 1000.0,
+        "subsistemas_ms": (float(subsistemas[2]) - inicio) * 1000.0,
+        "importaciones_antes_ms": sum(ms for ms, _ in antes),
+        "importaciones_despues_ms": sum(ms for ms, _ in despues),
+        "diferidos_antes": fotograma[4].split(",") if len(fotograma) > 4 else [],
+        "antes": antes,
+        "despues": despues,
+        "errores": [" ".join(linea.split()[2:]) for linea in lineas if linea.startswith("## error")],
+    }
+
+
+def mas_caras(lista):
+    return [{"modulo": modulo, "ms": round(ms, 1)}
+            for ms, modulo in sorted(lista, reverse=True)[:IMPORTACIONES_MOSTRADAS]]
+
+
+def medir(diferido, repeticiones):
+    ruta_config = config_arranque(diferido)
+    mediciones = [medir_una(ruta_config) for _ in range(repeticiones)]
+    mediana = lambda clave: round(float(np.median([m[clave] for m in mediciones])), 1)  # noqa: E731
+    ultima = mediciones[-1]
+    return {
+        "primer_fotograma_ms": mediana("primer_fotograma_ms"),
+        "primer_fotograma_max_ms": round(max(m["primer_fotograma_ms"] for m in mediciones), 1),
+        "subsistemas_ms": mediana("subsistemas_ms"),
+        "importaciones_antes_ms": mediana("importaciones_antes_ms"),
+        "importaciones_despues_ms": mediana("importaciones_despues_ms"),
+        "diferidos_antes_del_fotograma": sorted({m for medicion in mediciones
+                                                 for m in medicion["diferidos_antes"]}),
+        "importaciones_antes": mas_caras(ultima["antes"]),
+        "importaciones_despues": mas_caras(ultima["despues"]),
+        "errores_de_dispositivo": sorted(set(ultima["errores"])),
+    }
+
+
+def regresiones(resultado, base=None):
+    """Lista de problemas del modo diferido: UMBRALES, módulos importados antes de tiempo y --base"""
+    diferido = resultado["diferido"]
+    encontradas = []
+    for nombre, limite in UMBRALES.items():
+        if diferido[nombre] > limite:
+            encontradas.append({"metrica": nombre, "valor": diferido[nombre], "limite": limite})
+    if diferido["diferidos_antes_del_fotograma"]:
+        encontradas.append({"metrica": "diferidos_antes_del_fotograma",
+                            "valor": diferido["diferidos_antes_del_fotograma"], "limite": []})
+    if base is not None:
+        for nombre in COMPARADAS:
+            valor, anterior = diferido.get(nombre), base["diferido"].get(nombre)
+            if valor is None or not anterior:
+                continue
+            if valor > anterior * (1 + TOLERANCIA):
+                encontradas.append({"metrica": nombre, "valor": valor, "base": anterior,
+                                    "cambio": f"+{100.0 * (valor / anterior - 1):.0f}%"})
+    return encontradas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tiempo hasta el primer fotograma e importaciones del arranque")
+    parser.add_argument("--repeticiones", type=int, default=5, help="Arranques por modo (se toma la mediana)")
+    parser.add_argument("--salida", help="Archivo JSON donde guardar el resultado")
+    parser.add_argument("--base", help="Resultado JSON anterior con el que comparar")
+    args = parser.parse_args(argv)
+
+    resultado = {
+        "diferido": medir(True, args.repeticiones),
+        "sincrono": medir(False, args.repeticiones),
+    }
+    base = None
+    if args.base:
+        with open(args.base, "r") as f:
+            base = json.load(f)["resultado"]
+    encontradas = regresiones(resultado, base)
+    if args.salida:
+        with open(args.salida, "w") as f:
+            json.dump({"resultado": resultado}, f, indent=4)
+    print(json.dumps({"resultado": resultado, "regresiones": encontradas}, indent=4))
+    return 1 if encontradas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,80 +1,31 @@
-import sounddevice as sd
-from PyQt5.QtWidgets import QApplication, QLabel, QWidget, QVBoxLayout, QPushButton
-from PyQt5.QtGui import QPixmap
-from PyQt5.QtCore import QTimer, Qt, pyqtSignal, QObject
-import numpy as np
+from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QPushButton
+from PyQt5.QtCore import QEvent, QPoint, QTimer, Qt
 import sys
-import os
 import time
-import json
-from pynput import keyboard, mouse
-from settings import open_settings, CONFIG_FILE, DEFAULT_CONFIG
+# engine (numpy, sounddevice, pynput), settings, broadcast (asyncio) y capture_process
+# (multiprocessing) se importan al iniciar los subsistemas, después del primer fotograma
+from config import CONFIG_FILE, DEFAULT_CONFIG
+from config_store import AlmacenConfig
+from animation import MaquinaAnimacion, RelojAnimacion
+from atlas import cargar_sprites
+from log import configurar_logging, cambiar_nivel, obtener_logger, mensajes_omitidos
+from metrics import metricas, memoria_residente_mb, mostrar_estadisticas, METRICAS_ARCHIVO, CUBETAS_MS
+from frames import CacheFotogramas, crear_superficie, ESTADOS_TECLADO, ESTADOS_MOUSE, SuperficieGato, LienzoGato
+import tracing
+from input_bus import Lote
 
-# Obtener la ruta del directorio donde se encuentra el script
-script_dir = os.path.dirname(os.path.abspath(__file__))
+logger = obtener_logger("gui")
 
-# Rutas de imágenes (ahora con rutas absolutas)
-CAT_IDLE = os.path.join(script_dir, "assets/motions/cat_idle.png")
-CAT_KEYBOARD_IDLE = os.path.join(script_dir, "assets/motions/cat_keyboard_idle.png")
-CAT_MOUSE_IDLE = os.path.join(script_dir, "assets/motions/cat_mouse_idle.png")
-CAT_TYPING_HANDUP = os.path.join(script_dir, "assets/motions/cat_typing_handup.png")
-CAT_TYPING_HANDDOWN = os.path.join(script_dir, "assets/motions/cat_typing_handdown.png")
-CAT_MOUSE_MOVE = os.path.join(script_dir, "assets/motions/cat_mouse_move.png")
-CAT_TALKING = os.path.join(script_dir, "assets/motions/cat_onlytalking__nomic.png")
+# Nombres de los sprites (atlas.py; el nombre es el del PNG sin extensión)
+CAT_IDLE = "cat_idle"
+CAT_KEYBOARD_IDLE = "cat_keyboard_idle"
+CAT_MOUSE_IDLE = "cat_mouse_idle"
+CAT_TYPING_HANDUP = "cat_typing_handup"
+CAT_TYPING_HANDDOWN = "cat_typing_handdown"
+CAT_MOUSE_MOVE = "cat_mouse_move"
+CAT_TALKING = "cat_onlytalking__nomic"
 
-# Verificar que los archivos existen
-def check_file_exists(filepath):
-    if os.path.exists(filepath):
-        print(f"Archivo encontrado: {filepath}")
-        return True
-    else:
-        print(f"ADVERTENCIA: Archivo no encontrado: {filepath}")
-        return False
-
-# Verificar todas las imágenes
-print("Verificando archivos de imágenes...")
-check_file_exists(CAT_IDLE)
-check_file_exists(CAT_KEYBOARD_IDLE)
-check_file_exists(CAT_MOUSE_IDLE)
-check_file_exists(CAT_TYPING_HANDUP)
-check_file_exists(CAT_TYPING_HANDDOWN)
-check_file_exists(CAT_MOUSE_MOVE)
-check_file_exists(CAT_TALKING)
-
-# Parámetros para la captura de audio
-samplerate = 44100  # Frecuencia de muestreo (Hz)
-chunk_size = 1024   # Tamaño del bloque de datos
-
-"""
-Configuración técnica del sistema de audio:
-    samplerate (int): Frecuencia de muestreo en Hz (44.1 KHz, calidad CD)
-    chunk_size (int): Tamaño del buffer de audio por bloque
-                      Valor óptimo para equilibrar latencia y rendimiento
-                      - Valores bajos: menor latencia pero más carga de CPU
-                      - Valores altos: mayor latencia pero menos procesamiento
-
-El sistema utiliza sounddevice para procesar audio en tiempo real
-y detectar cuando el usuario está hablando mediante análisis RMS.
-"""
-
-# Cargar configuración o usar valores por defecto
-def cargar_configuracion():
-    try:
-        if os.path.exists(CONFIG_FILE):
-            with open(CONFIG_FILE, 'r') as f:
-                config = json.load(f)
-                return config
-        else:
-            # Si no existe el archivo, usar valores por defecto
-            return DEFAULT_CONFIG.copy()
-    except Exception as e:
-        print(f"Error al cargar la configuración: {e}")
-        return DEFAULT_CONFIG.copy()
-
-# Obtener configuración
-config = cargar_configuracion()
-volumen_umbral = config.get("volumen_umbral", 0.005)  # Valor más bajo = más sensible
-mouse_sensibilidad = config.get("mouse_sensibilidad", 0.1)  # Sensibilidad del mouse
+ESPERA_PRIMER_FOTOGRAMA_MS = 1000  # Si la ventana no llega a pintarse, iniciar los subsistemas igualmente
 
 class CatNipy(QWidget):
     """
@@ -82,7 +33,7 @@ class CatNipy(QWidget):
     
     Arquitectura técnica:
         - Hereda de QWidget para crear una ventana personalizada sin bordes
-        - Utiliza un sistema de capas (QLabels) para componer animaciones modulares
+        - Utiliza un sistema de capas compuestas en fotogramas cacheados para animaciones modulares
         - Implementa monitores globales de teclado/ratón/audio para detectar actividad
         - Gestiona estados múltiples con transiciones visuales
     
@@ -92,20 +43,187 @@ class CatNipy(QWidget):
         - Sistema de eventos: Captura global de teclado y mouse
         - Sistema de estados: Gestión de animaciones y comportamientos
     """
-    def __init__(self):
+    def __init__(self, almacen_config=None, motor=None):
+        inicio = time.perf_counter()
         super().__init__()
+        # Configuración vigente: instantánea inmutable que se reemplaza al cambiar config.json
+        self.almacen_config = almacen_config or AlmacenConfig(CONFIG_FILE, DEFAULT_CONFIG, self)
+        self.config = cfg = self.almacen_config.actual
         self.dragging = False
         self.drag_position = None
         self.is_talking = False  # Inicializar is_talking para evitar errores
-        self.last_mouse_move_time = 0  # Para limitar frecuencia de eventos de mouse
+        self.last_mouse_move_time = float("-inf")  # Para limitar frecuencia de eventos de mouse (tiempo monótono)
+        self.nivel_actual = 0.0         # Último RMS leído por la GUI
         
-        # Inicializar señales para eventos globales
-        self.signals = GlobalEventSignals()
-        self.setup_signals()
+        # Motor de detección sin Qt (engine.py), captura y servidores: los crea iniciar_subsistemas
+        self.motor = None
+        self.captura = None
+        self.ahorro = None
+        self.servidor_estado = None
+        self.adaptacion_timer = None
+        self._inicio = inicio
+        self.arranque = {"primer_fotograma_ms": None, "subsistemas_ms": None, "diferido": False}
+        self._subsistemas_iniciados = False
+        
+        # Reloj de fotogramas: aplica el estado pendiente y pinta a fps_ui como máximo, detenido en reposo
+        self.reloj = RelojAnimacion(cfg.fps_ui, self.on_frame, self)
+        self._fotograma_pendiente = False
         
         self.init_ui()
-        self.init_audio()
+        
+        # Máquina de estados de animación: un temporizador reiniciable por capa
+        self.animacion = MaquinaAnimacion(
+            self, self.update_keyboard_state, self.update_mouse_state, self.update_mouth_state)
+        
+        # Revisión periódica del modo de ahorro y de las métricas (los programa iniciar_subsistemas)
+        self.ahorro_timer = QTimer(self)
+        self.ahorro_timer.setTimerType(Qt.VeryCoarseTimer)
+        self.ahorro_timer.timeout.connect(self.revisar_ahorro)
+        self.metricas_timer = QTimer(self)
+        self.metricas_timer.timeout.connect(self.escribir_metricas)
+        # Con teclas presionadas, reanuda el reloj cuando el bus deba liberarlas por inactividad
+        self.teclas_timer = QTimer(self)
+        self.teclas_timer.setSingleShot(True)
+        self.teclas_timer.timeout.connect(self.reloj.solicitar)
+        self._estado_difundido = None
+        
+        # Recarga por eventos del sistema de archivos en lugar de releer config.json periódicamente
+        self.almacen_config.cambiada.connect(self.aplicar_config)
+        self.almacen_config.vigilar()
+        
+        # Arranque rápido: el gato en reposo se pinta primero y el audio, los listeners y
+        # sus importaciones llegan justo después. Con un motor ya creado no hay nada que diferir
+        if cfg.arranque_diferido and motor is None:
+            self.arranque["diferido"] = True
+            self.superficie.installEventFilter(self)
+            QTimer.singleShot(ESPERA_PRIMER_FOTOGRAMA_MS, self.iniciar_subsistemas)
+        else:
+            self.iniciar_subsistemas(motor)
+        
+        # Primer tick: aplica lo que haya llegado durante el arranque (y se detiene si no hay nada)
+        self.reloj.solicitar()
+
+    def eventFilter(self, objeto, evento):
+        # Primer pintado de la superficie: registrarlo e iniciar los subsistemas en cuanto termine
+        if objeto is self.superficie and evento.type() == QEvent.Paint:
+            self.superficie.removeEventFilter(self)
+            self.arranque["primer_fotograma_ms"] = round((time.perf_counter() - self._inicio) * 1000.0, 1)
+            QTimer.singleShot(0, self.iniciar_subsistemas)
+        return False
+        
+    def crear_motor(self):
+        """Crea el motor de detección (importa engine.py, y con él numpy)"""
+        from engine import MotorDeteccion
+        return MotorDeteccion(self.config)
+        
+    def iniciar_subsistemas(self, motor=None):
+        """
+        Crea el motor e inicia la captura, el modo de ahorro, las métricas y la difusión.
+        
+        Detalles técnicos:
+            - Con arranque_diferido se llama una vez pintado el primer
+              fotograma (o tras ESPERA_PRIMER_FOTOGRAMA_MS si la ventana no
+              llega a pintarse); si no, desde __init__
+            - Hasta entonces on_frame solo pinta y aplicar_config solo
+              guarda la instantánea, que se lee aquí
+            - Con captura_aislada no se crea el motor (self.motor queda en
+              None): el proceso hijo tiene su propio ProcesadorAudio y
+              BusEntrada. Solo si el proceso no arranca se crea aquí
+            - Registra en self.arranque (y en el medidor "arranque") los ms
+              desde la creación del widget hasta tener los subsistemas en
+              marcha; primer_fotograma_ms lo registra eventFilter con el
+              evento Paint real (queda en None si el respaldo llega antes)
+            - Es idempotente: el temporizador de respaldo no repite nada, y
+              quita el filtro de eventos del primer pintado, así que un
+              pintado posterior al respaldo no registra nada
+        """
+        if self._subsistemas_iniciados:
+            return
+        self._subsistemas_iniciados = True
+        self.superficie.removeEventFilter(self)
+        cfg = self.config
+        
+        # Captura de audio y entrada: aislada en un proceso hijo o en este proceso (motor)
+        if cfg.captura_aislada and motor is None:
+            self.init_captura_aislada()
+        if self.captura is None:
+            self.iniciar_motor(motor or self.crear_motor())
+        
+        # Métricas de ejecución (metrics.py)
+        self.init_metricas()
+        self.programar_ahorro()
+        
+        # Difusión opcional del estado a otros procesos (broadcast.py)
+        if cfg.servidor_estado:
+            self.init_servidor_estado(cfg.servidor_estado)
+        
+        self.arranque["subsistemas_ms"] = round((time.perf_counter() - self._inicio) * 1000.0, 1)
+        if self.arranque["diferido"]:
+            logger.info("Arranque: primer fotograma en %s ms, subsistemas en marcha en %s ms",
+                        self.arranque["primer_fotograma_ms"], self.arranque["subsistemas_ms"])
+        self.reloj.solicitar()  # Aplicar lo que llegó mientras se abrían el audio y los listeners
 
+    def init_metricas(self):
+        """
+        Registra las métricas de CatNipy y programa su instantánea periódica.
+        
+        Detalles técnicos:
+            - audio.*: los registra el motor (engine.py), escritos solo por
+              el hilo de audio
+            - Con captura aislada no hay motor, bus de entrada ni modo de
+              ahorro en este proceso: en lugar de entrada, habla.transiciones
+              y energia.modos se registra "captura", con los contadores que
+              publica el proceso hijo en la memoria compartida
+            - gui.retraso_ms: cuánto llega tarde cada tick del reloj de
+              fotogramas respecto a su intervalo (retraso del bucle de
+              eventos); solo entre ticks seguidos, no al reanudarse
+            - gui.ticks / gui.reanudaciones: ticks del reloj y veces que se
+              reanudó tras detenerse en reposo
+            - energia.modos: segundos, despertares y callbacks de audio por
+              segundo en modo normal y en modo de ahorro (PoliticaAhorro)
+            - render.pintado_us: duración de cada paintEvent (frames.py)
+            - arranque: ms hasta el primer fotograma y hasta tener los
+              subsistemas en marcha (iniciar_subsistemas)
+            - Medidores: se evalúan solo al tomar la instantánea, en el hilo
+              principal, a partir de los contadores que ya llevan el bus de
+              entrada, el detector de habla y la máquina de animación
+            - metricas_timer escribe METRICAS_ARCHIVO cada metricas_intervalo s
+        """
+        registro = metricas()
+        self.m_retraso = registro.histograma("gui.retraso_ms", CUBETAS_MS)
+        
+        if self.captura is not None:
+            registro.medidor("captura", self.captura.estadisticas)  # Contadores del proceso hijo
+        else:
+            registro.medidor("entrada", self.bus_entrada.estadisticas)  # Eventos recibidos vs. cambios aplicados
+            registro.medidor("habla.transiciones", lambda: self.procesador.detector_habla.transiciones)
+            registro.medidor("energia.modos", self.ahorro.estadisticas)  # Despertares por segundo en cada modo
+        registro.medidor("animacion.cambios", lambda: {capa.nombre: capa.cambios for capa in self.animacion.capas})
+        registro.medidor("timers.activos", lambda: self.animacion.timers_activos() + sum(
+            t.isActive() for t in (self.reloj.timer, self.metricas_timer, self.adaptacion_timer, self.ahorro_timer,
+                                   self.teclas_timer)
+            if t is not None))
+        registro.medidor("gui.ticks", lambda: self.reloj.ticks)
+        registro.medidor("gui.reanudaciones", lambda: self.reloj.reanudaciones)
+        registro.medidor("proceso.rss_mb", memoria_residente_mb)
+        registro.medidor("arranque", lambda: dict(self.arranque))
+        
+        self.programar_metricas(self.config.metricas_intervalo)
+        
+    def programar_metricas(self, intervalo):
+        """Arranca, reprograma o detiene (intervalo 0) la instantánea periódica"""
+        if intervalo and intervalo > 0:
+            self.metricas_timer.start(int(intervalo * 1000))
+        else:
+            self.metricas_timer.stop()
+        
+    def escribir_metricas(self):
+        """Escribe la instantánea de métricas en METRICAS_ARCHIVO"""
+        try:
+            metricas().guardar(METRICAS_ARCHIVO)
+        except OSError as e:
+            logger.warning("No se pudieron guardar las métricas: %s", e)
+        
     def init_ui(self):
         """
         Inicializa la interfaz de usuario del personaje.
@@ -113,18 +231,23 @@ class CatNipy(QWidget):
         Componentes técnicos:
             - Ventana sin bordes (FramelessWindowHint)
             - Fondo transparente (TranslucentBackground)
-            - Sistema de capas para composición de animaciones:
-                * base_label: Imagen de fondo del personaje
-                * keyboard_label: Capa de animación de teclado
-                * mouse_label: Capa de animación de ratón
-                * overlay_label: Capa de animación de boca/habla
+            - Composición de animaciones por capas (base, teclado, mouse y boca):
+                * CacheFotogramas compone cada combinación de estados una sola
+                  vez en un QPixmap (unas 24 combinaciones en total)
+                * superficie: único widget que muestra el fotograma compuesto,
+                  en lugar de cuatro QLabel translúcidos apilados. Según
+                  config "renderizador" es un QLabel ("fotogramas") o un
+                  lienzo que solo repinta la región de la capa que cambió
+                  ("regiones")
+                * Los fotogramas se componen a la escala de config y al
+                  devicePixelRatio de la pantalla (actualizar_variante)
             
-            - Posicionamiento preciso de cada capa para alineación visual
+            - Posición inicial: esquina inferior derecha del área disponible
+              de la pantalla principal (posicion_inicial)
             - Botón de configuración oculto con estilo CSS personalizado
             - Sistema de delegación de eventos para manejar interacciones en todas las capas
         """
         self.setWindowTitle("CatNipy")
-        self.setGeometry(1620, 750, 20, 20)
         self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint)  # Ventana sin bordes y siempre encima
         self.setAttribute(Qt.WA_TranslucentBackground)  # Fondo transparente
         self.setFocusPolicy(Qt.StrongFocus)  # Permitir que la ventana reciba eventos de teclado
@@ -134,20 +257,6 @@ class CatNipy(QWidget):
         layout.setContentsMargins(0, 0, 0, 0)
         self.setLayout(layout)
         
-        # Crear labels para mostrar las diferentes capas del personaje
-        self.base_label = QLabel(self)          # Imagen base (gato)
-        self.keyboard_label = QLabel(self)      # Acción de teclado
-        self.mouse_label = QLabel(self)         # Acción de mouse
-        self.overlay_label = QLabel(self)       # Boca (hablando)
-        
-        # Hacer transparente el fondo de las etiquetas
-        self.base_label.setAttribute(Qt.WA_TranslucentBackground)
-        self.keyboard_label.setAttribute(Qt.WA_TranslucentBackground)
-        self.mouse_label.setAttribute(Qt.WA_TranslucentBackground)
-        self.overlay_label.setAttribute(Qt.WA_TranslucentBackground)
-        
-        # Inicializar los monitores globales de eventos de teclado y mouse
-        self.init_global_monitors()
         
         # Botón de configuración (inicialmente oculto, se muestra al hacer clic derecho)
         self.settings_button = QPushButton("⚙", self)
@@ -168,88 +277,95 @@ class CatNipy(QWidget):
         self.settings_button.hide()  # Inicialmente oculto
         
         
-        # Cargar todas las imágenes
-        print("Cargando imágenes...")
-        self.idle_pixmap = QPixmap(CAT_IDLE)
-        self.keyboard_idle_pixmap = QPixmap(CAT_KEYBOARD_IDLE)
-        self.mouse_idle_pixmap = QPixmap(CAT_MOUSE_IDLE)
-        self.typing_handup_pixmap = QPixmap(CAT_TYPING_HANDUP)
-        self.typing_handdown_pixmap = QPixmap(CAT_TYPING_HANDDOWN)
-        self.mouse_move_pixmap = QPixmap(CAT_MOUSE_MOVE)
-        self.overlay_pixmap = QPixmap(CAT_TALKING)
+        # Cargar todas las imágenes (una lectura del atlas, o los PNG sueltos si no existe)
+        sprites = cargar_sprites()
+        self.idle_sprite = sprites[CAT_IDLE]
+        self.keyboard_idle_sprite = sprites[CAT_KEYBOARD_IDLE]
+        self.mouse_idle_sprite = sprites[CAT_MOUSE_IDLE]
+        self.typing_handup_sprite = sprites[CAT_TYPING_HANDUP]
+        self.typing_handdown_sprite = sprites[CAT_TYPING_HANDDOWN]
+        self.mouse_move_sprite = sprites[CAT_MOUSE_MOVE]
+        self.overlay_sprite = sprites[CAT_TALKING]
         
-        # Verificar que las imágenes se cargaron correctamente
-        if self.idle_pixmap.isNull():
-            print(f"Error: No se pudo cargar la imagen {CAT_IDLE}")
-        else:
-            print(f"Imagen cargada con éxito: {CAT_IDLE}")
-            
-        if self.keyboard_idle_pixmap.isNull():
-            print(f"Error: No se pudo cargar la imagen {CAT_KEYBOARD_IDLE}")
-        else:
-            print(f"Imagen cargada con éxito: {CAT_KEYBOARD_IDLE}")
-            
-        if self.mouse_idle_pixmap.isNull():
-            print(f"Error: No se pudo cargar la imagen {CAT_MOUSE_IDLE}")
-        else:
-            print(f"Imagen cargada con éxito: {CAT_MOUSE_IDLE}")
-            
-        if self.typing_handup_pixmap.isNull():
-            print(f"Error: No se pudo cargar la imagen {CAT_TYPING_HANDUP}")
-        else:
-            print(f"Imagen cargada con éxito: {CAT_TYPING_HANDUP}")
-            
-        if self.typing_handdown_pixmap.isNull():
-            print(f"Error: No se pudo cargar la imagen {CAT_TYPING_HANDDOWN}")
-        else:
-            print(f"Imagen cargada con éxito: {CAT_TYPING_HANDDOWN}")
-            
-        if self.mouse_move_pixmap.isNull():
-            print(f"Error: No se pudo cargar la imagen {CAT_MOUSE_MOVE}")
-        else:
-            print(f"Imagen cargada con éxito: {CAT_MOUSE_MOVE}")
-            
-        if self.overlay_pixmap.isNull():
-            print(f"Error: No se pudo cargar la imagen {CAT_TALKING}")
-        else:
-            print(f"Imagen cargada con éxito: {CAT_TALKING}")
-        
-        # Configurar la imagen base inicial (gato idle)
-        self.base_label.setPixmap(self.idle_pixmap)
-        self.base_label.resize(self.idle_pixmap.size())
+        # Caché de fotogramas compuestos (base + teclado + mouse + boca)
+        self.fotogramas = CacheFotogramas(
+            self.idle_sprite,
+            {
+                "keyboard_idle": self.keyboard_idle_sprite,
+                "typing_handdown": self.typing_handdown_sprite,
+                "typing_handup": self.typing_handup_sprite,
+            },
+            {
+                "mouse_idle": self.mouse_idle_sprite,
+                "mouse_move": self.mouse_move_sprite,
+            },
+            self.overlay_sprite,
+            escala=self.config.escala,
+            dpr=self.devicePixelRatioF(),
+        )
         
-        # Configurar las capas de acción (inicialmente vacías)
-        self.keyboard_label.resize(self.idle_pixmap.size())
-        self.keyboard_label.setPixmap(QPixmap())  # Pixmap vacío
-        
-        self.mouse_label.resize(self.idle_pixmap.size())
-        self.mouse_label.setPixmap(QPixmap())  # Pixmap vacío
-        
-        # Configurar la capa de superposición (boca)
-        self.overlay_label.resize(self.overlay_pixmap.size())
-        self.overlay_label.setPixmap(self.overlay_pixmap)
-        self.overlay_label.hide()  # Inicialmente oculto
-        
-        # Posicionar las etiquetas una encima de otra
-        self.base_label.move(0, 0)
-        self.keyboard_label.move(0, 0)
-        self.mouse_label.move(0, 0)
-        self.overlay_label.move(0, 0)
-        
-        # Ajustar el tamaño de la ventana al tamaño de la imagen base
-        self.resize(self.idle_pixmap.size())
+        # Superficie única donde se muestra el fotograma compuesto
+        self.superficie = crear_superficie(self.config.renderizador, self.fotogramas, self)
+        self.settings_button.raise_()  # El botón queda por encima de la superficie
         
         # Indicadores de estado
         self.estado_actual = "idle"  # Estado inicial
+        self.estado_teclado = "idle"
+        self.estado_mouse = "idle"
         self.is_typing = False
         self.is_moving_mouse = False
+        
+        # Configurar la imagen inicial (gato idle) y ajustar la ventana a su tamaño a escala
+        tamano = self.fotogramas.tamano()
+        self.superficie.move(0, 0)
+        self.superficie.resize(tamano)
+        self.superficie.mostrar(self.estado_teclado, self.estado_mouse, self.is_talking)  # Sin esperar al reloj
+        self.resize(tamano)
+        self.move(self.posicion_inicial())
+        self._pantalla_conectada = False
 
-        # Configurar eventos para todos los labels
-        for label in [self.base_label, self.keyboard_label, self.mouse_label, self.overlay_label]:
-            label.mousePressEvent = self.label_mouse_press
-            label.mouseMoveEvent = self.label_mouse_move
-            label.mouseReleaseEvent = self.label_mouse_release
-            label.mouseDoubleClickEvent = self.label_mouse_double_click
+        # Configurar eventos de la superficie
+        self.superficie.mousePressEvent = self.label_mouse_press
+        self.superficie.mouseMoveEvent = self.label_mouse_move
+        self.superficie.mouseReleaseEvent = self.label_mouse_release
+        self.superficie.mouseDoubleClickEvent = self.label_mouse_double_click
+        
+    def posicion_inicial(self):
+        """Esquina superior izquierda que deja al gato en la esquina inferior derecha de la pantalla"""
+        pantalla = QApplication.primaryScreen()
+        if pantalla is None:
+            return QPoint(0, 0)
+        area = pantalla.availableGeometry()
+        return QPoint(area.right() - self.width() + 1, area.bottom() - self.height() + 1)
+        
+    def actualizar_variante(self, pantalla=None):
+        """
+        Adopta la escala de la configuración y el devicePixelRatio de la pantalla.
+        
+        Detalles técnicos:
+            - Se llama al cambiar "escala" (aplicar_config) y cuando la
+              ventana pasa a otra pantalla (QWindow.screenChanged)
+            - CacheFotogramas descarta solo las entradas de la escala anterior;
+              las del dpr anterior se conservan para volver a esa pantalla
+            - La ventana cambia de tamaño manteniendo fija su esquina
+              inferior derecha, y el fotograma actual se muestra de inmediato
+            
+        Retorna:
+            bool: Si la escala o el dpr cambiaron
+        """
+        dpr = pantalla.devicePixelRatio() if pantalla is not None else self.devicePixelRatioF()
+        if not self.fotogramas.cambiar_variante(self.config.escala, dpr):
+            return False
+        esquina = self.geometry().bottomRight()
+        tamano = self.fotogramas.tamano()
+        self.superficie.invalidar()
+        self.superficie.resize(tamano)
+        self.resize(tamano)
+        self.move(esquina.x() - tamano.width() + 1, esquina.y() - tamano.height() + 1)
+        self.superficie.mostrar(self.estado_teclado, self.estado_mouse, self.is_talking)
+        logger.info("Escala %s con devicePixelRatio %s (%dx%d)", self.fotogramas.escala,
+                    self.fotogramas.dpr, tamano.width(), tamano.height())
+        return True
         
     # Métodos de eventos para labels
     def label_mouse_press(self, event):
@@ -282,11 +398,11 @@ class CatNipy(QWidget):
         if event.button() == Qt.LeftButton:
             self.dragging = True
             self.drag_position = event.globalPos() - self.frameGeometry().topLeft()
-            self.update_mouse_state("mouse_move")
+            self.animacion.mouse.disparar("presionar")
             event.accept()
         elif event.button() == Qt.RightButton:
             # Abrir configuración directamente con clic derecho
-            print("Clic derecho detectado - abriendo configuración")
+            logger.debug("Clic derecho detectado - abriendo configuración")
             self.open_settings_window()
             event.accept()
             
@@ -306,7 +422,7 @@ class CatNipy(QWidget):
         """
         if event.button() == Qt.LeftButton:
             self.dragging = False
-            self.update_mouse_state("mouse_idle")
+            self.animacion.mouse.disparar("soltar")
             event.accept()
             
     def mouseDoubleClickEvent(self, event):
@@ -321,17 +437,15 @@ class CatNipy(QWidget):
         """
         Se ejecuta cuando se presiona cualquier tecla mientras la ventana tiene foco.
         """
-        self.update_keyboard_state("typing_handdown")
+        self.animacion.teclado.disparar("pulsar")
         event.accept()
         
     def keyReleaseEvent(self, event):
         """
         Se ejecuta cuando se suelta cualquier tecla.
         """
-        self.update_keyboard_state("typing_handup")
-        
-        # Volver al estado keyboard_idle después de un breve momento
-        QTimer.singleShot(500, lambda: self.update_keyboard_state("keyboard_idle"))
+        # typing_handup y vuelta a keyboard_idle con el temporizador de la capa
+        self.handle_key_release()
         event.accept()
     
     def update_keyboard_state(self, estado):
@@ -346,35 +460,22 @@ class CatNipy(QWidget):
                 - "idle": Oculta completamente la capa del teclado
         
         Implementación:
-            1. Actualiza el QLabel correspondiente con la imagen apropiada
+            1. Guarda el estado de la capa de teclado
             2. Establece el flag is_typing para seguimiento interno
-            3. Preserva el estado de habla si está activo
+            3. Muestra el fotograma compuesto para la nueva combinación,
+               conservando el estado de habla y del mouse
             
         Este método utiliza un sistema de capas independientes que permite
         combinar diferentes estados de teclado, mouse y habla simultáneamente.
         """
-        print(f"Cambiando estado de teclado a: {estado}")
+        logger.debug("Cambiando estado de teclado a: %s", estado)
         
-        # Actualizar estado de teclado
-        if estado == "keyboard_idle":
-            self.keyboard_label.setPixmap(self.keyboard_idle_pixmap)
-            self.is_typing = True
-            
-        elif estado == "typing_handdown":
-            self.keyboard_label.setPixmap(self.typing_handdown_pixmap)
-            self.is_typing = True
+        # Actualizar estado de teclado ("idle" oculta la capa)
+        if estado in ESTADOS_TECLADO:
+            self.estado_teclado = estado
+            self.is_typing = estado != "idle"
             
-        elif estado == "typing_handup":
-            self.keyboard_label.setPixmap(self.typing_handup_pixmap)
-            self.is_typing = True
-            
-        elif estado == "idle":
-            self.keyboard_label.setPixmap(QPixmap())  # Ocultar teclado
-            self.is_typing = False
-            
-        # Mantener el estado del habla si está activo
-        if self.is_talking:
-            self.overlay_label.show()
+        self.actualizar_fotograma()
             
     def update_mouse_state(self, estado):
         """
@@ -388,34 +489,63 @@ class CatNipy(QWidget):
                 - "idle": Oculta completamente la capa del mouse
         
         Funcionamiento:
-            1. Actualiza el QLabel correspondiente con la imagen apropiada
+            1. Guarda el estado de la capa de mouse
             2. Establece el flag is_moving_mouse para seguimiento interno
-            3. Conserva el estado de habla si está activo
+            3. Muestra el fotograma compuesto para la nueva combinación,
+               conservando el estado de habla y del teclado
         """
-        print(f"Cambiando estado de mouse a: {estado}")
+        logger.debug("Cambiando estado de mouse a: %s", estado)
         
-        # Actualizar estado de mouse
-        if estado == "mouse_idle":
-            self.mouse_label.setPixmap(self.mouse_idle_pixmap)
-            self.is_moving_mouse = True
+        # Actualizar estado de mouse ("idle" oculta la capa)
+        if estado in ESTADOS_MOUSE:
+            self.estado_mouse = estado
+            self.is_moving_mouse = estado != "idle"
             
-        elif estado == "mouse_move":
-            self.mouse_label.setPixmap(self.mouse_move_pixmap)
-            self.is_moving_mouse = True
+        self.actualizar_fotograma()
             
-        elif estado == "idle":
-            self.mouse_label.setPixmap(QPixmap())  # Ocultar mouse usando un pixmap vacío
-            self.is_moving_mouse = False
+    def actualizar_fotograma(self):
+        """
+        Marca el fotograma como pendiente; el siguiente tick del reloj lo muestra.
+        
+        Así varios cambios de capa entre dos ticks (una pulsación y el
+        retorno de otra capa, por ejemplo) producen un solo pintado.
+        """
+        self._fotograma_pendiente = True
+        self.reloj.solicitar()
+        
+    def pintar_fotograma(self):
+        """
+        Muestra el fotograma compuesto de la combinación de estados actual si está pendiente.
+        
+        La superficie solo repinta cuando la combinación cambia; el fotograma
+        sale de la caché salvo la primera vez.
+        
+        Retorna:
+            bool: Si había un fotograma pendiente
+        """
+        if not self._fotograma_pendiente:
+            return False
+        self._fotograma_pendiente = False
+        self.superficie.mostrar(self.estado_teclado, self.estado_mouse, self.is_talking)
+        return True
             
-        # Mantener el estado del habla si está activo
-        if self.is_talking:
-            self.overlay_label.show()
+    def update_mouth_state(self, estado):
+        """
+        Muestra u oculta la boca según el estado de la capa "boca".
+        
+        Parámetros técnicos:
+            estado (str): "abierta" (hablando) o "cerrada"
+        """
+        if estado == "abierta":
+            self.show_sound()
+        else:
+            self.show_idle()
             
     def cambiar_estado(self, nuevo_estado):
         """
         Cambia el estado general del gato.
         Este método es mantenido por compatibilidad, pero se prefiere usar
-        update_keyboard_state y update_mouse_state por separado.
+        las capas de self.animacion (teclado, mouse, boca) por separado.
         
         Parámetros técnicos:
             nuevo_estado (str): Estado general deseado del personaje
@@ -427,161 +557,318 @@ class CatNipy(QWidget):
                 
         Funcionamiento:
             1. Actualiza el estado interno del personaje
-            2. Delega a métodos específicos para actualizar cada capa visual
+            2. Lleva cada capa de la máquina de animación al estado pedido,
+               cancelando cualquier retorno pendiente de su temporizador
             3. Preserva estados de superposición (como hablar)
         """
-        print(f"Cambiando estado general: {self.estado_actual} -> {nuevo_estado}")
+        logger.debug("Cambiando estado general: %s -> %s", self.estado_actual, nuevo_estado)
         
         self.estado_actual = nuevo_estado
         
         if nuevo_estado == "idle":
-            self.update_keyboard_state("idle")
-            self.update_mouse_state("idle")
+            self.animacion.teclado.cambiar("idle")
+            self.animacion.mouse.cambiar("idle")
             
-        elif nuevo_estado == "keyboard_idle":
-            self.update_keyboard_state("keyboard_idle")
+        elif nuevo_estado in ("keyboard_idle", "typing_handdown", "typing_handup"):
+            self.animacion.teclado.cambiar(nuevo_estado)
             
-        elif nuevo_estado == "mouse_idle":
-            self.update_mouse_state("mouse_idle")
+        elif nuevo_estado in ("mouse_idle", "mouse_move"):
+            self.animacion.mouse.cambiar(nuevo_estado)
             
-        elif nuevo_estado == "typing_handdown":
-            self.update_keyboard_state("typing_handdown")
+    def iniciar_motor(self, motor):
+        """
+        Inicia la captura en este proceso a través del motor (engine.py).
+        
+        Comparte con la GUI el procesador, los niveles y el bus de entrada
+        del motor, y crea la política de ahorro. En el modo de baja latencia,
+        adaptacion_timer llama a motor.adaptar_bloque cada
+        INTERVALO_ADAPTACION_MS desde el hilo principal y se detiene si el
+        motor deja de adaptar.
+        """
+        from engine import INTERVALO_ADAPTACION_MS, PoliticaAhorro
+        cfg = self.config
+        self.motor = motor
+        self.procesador = motor.procesador
+        self.niveles = motor.niveles
+        self.bus_entrada = motor.bus_entrada  # Los listeners encolan, on_frame drena una vez por fotograma
+        motor.al_despertar = self.reloj.despertar_desde_hilo
+        # Modo de ahorro tras un periodo sin actividad (solo con la captura en proceso)
+        self.ahorro = PoliticaAhorro(motor, cfg.ahorro_minutos, cfg.ahorro_audio)
+        self.motor.iniciar()
+        if self.motor.adaptador_bloque is not None:
+            self.adaptacion_timer = QTimer(self)
+            self.adaptacion_timer.timeout.connect(self.adaptar_bloque)
+            self.adaptacion_timer.start(INTERVALO_ADAPTACION_MS)
+        
+    def programar_ahorro(self):
+        """Arranca o detiene la revisión periódica de inactividad según la configuración"""
+        from engine import INTERVALO_REVISION_AHORRO_S
+        if self.ahorro is not None and self.ahorro.habilitada and not self.ahorro.activo:
+            self.ahorro_timer.start(INTERVALO_REVISION_AHORRO_S * 1000)
+        else:
+            self.ahorro_timer.stop()
+        
+    def revisar_ahorro(self):
+        """
+        Pasa al modo de ahorro si no hubo entrada ni voz en ahorro_minutos.
+        
+        En modo de ahorro no queda ningún temporizador periódico: se
+        detienen la revisión, la instantánea de métricas (tras escribir una
+        última) y la adaptación del bloque de audio. El reloj de fotogramas
+        ya está detenido en reposo.
+        """
+        if not self.ahorro.revisar(time.monotonic()):
+            return
+        self.ahorro_timer.stop()
+        if self.metricas_timer.isActive():
+            self.escribir_metricas()
+            self.metricas_timer.stop()
+        if self.adaptacion_timer is not None:
+            self.adaptacion_timer.stop()
+        
+    def reanudar_desde_ahorro(self):
+        """Vuelve al modo normal: audio completo y temporizadores periódicos"""
+        from engine import INTERVALO_ADAPTACION_MS
+        self.ahorro.salir(time.monotonic())
+        self.programar_metricas(self.config.metricas_intervalo)
+        if self.adaptacion_timer is not None and self.motor.adaptador_bloque is not None:
+            self.adaptacion_timer.start(INTERVALO_ADAPTACION_MS)
+        self.programar_ahorro()
+        
+    def adaptar_bloque(self):
+        """Evalúa el tamaño de bloque del motor (ver MotorDeteccion.adaptar_bloque)"""
+        self.motor.adaptar_bloque()
+        if self.motor.adaptador_bloque is None:
+            self.adaptacion_timer.stop()
+        
+    def on_frame(self):
+        """
+        Tick del reloj de fotogramas: aplica el estado pendiente y pinta como máximo una vez.
+        
+        Detalles técnicos:
+            - Lo llama RelojAnimacion a fps_ui ticks por segundo como máximo,
+              independientemente de la frecuencia de bloques de audio, y solo
+              mientras hay actividad: el motor lo reanuda con cada evento de
+              entrada o transición de habla, y actualizar_fotograma con cada
+              cambio de capa (incluidos los retornos al reposo)
+            - Limpia motor.despertar antes de drenar: un evento posterior
+              vuelve a reanudar el reloj si se detiene
+            - Lee el último registro del BufferNiveles (nivel_actual) para
+              que overlay, configuración y estadísticas compartan una sola fuente
+            - Solo muestra/oculta el overlay si el detector cambió de estado
+            - Drena el BusEntrada y aplica un único cambio por capa (aplicar_lote)
+            - En modo de ahorro, el primer evento (o voz) vuelve al modo normal
+            - Con captura aislada, el estado viene de la memoria compartida y
+              el reloj no se detiene (no hay quien lo despierte)
+            - Registra en gui.retraso_ms cuánto se retrasó este tick
+            - Antes de iniciar_subsistemas solo pinta el fotograma pendiente
             
-        elif nuevo_estado == "typing_handup":
-            self.update_keyboard_state("typing_handup")
+        Retorna:
+            bool: Si hubo trabajo en este tick (si no, el reloj se detiene)
+        """
+        if not self._subsistemas_iniciados:
+            return self.pintar_fotograma()
+        if self.reloj.retraso_ms is not None:
+            self.m_retraso.observar(max(0.0, self.reloj.retraso_ms))
+        
+        trabajo = False
+        if self.captura is not None:
+            hablando = self.leer_captura_aislada()
+        else:
+            self.motor.despertar.clear()
+            ultimo = self.niveles.ultimo()
+            if ultimo is not None:
+                self.nivel_actual = ultimo[0]
+            hablando = self.procesador.detector_habla.hablando
             
-        elif nuevo_estado == "mouse_move":
-            self.update_mouse_state("mouse_move")
+            lote = self.bus_entrada.drenar()
+            if self.ahorro.activo and (not lote.vacio or hablando):
+                self.reanudar_desde_ahorro()
+            if not lote.vacio:
+                self.bus_entrada.aplicados += self.aplicar_lote(lote)
+                trabajo = True
+            self.programar_liberacion_teclas()
+        
+        if hablando != self.is_talking:
+            self.animacion.boca.disparar("abrir" if hablando else "cerrar")
+        
+        if self.pintar_fotograma():
+            trabajo = True
+        
+        if self.servidor_estado is not None:
+            self.difundir_estado()
+            # Mientras se habla, el nivel cambia en cada bloque: seguir difundiéndolo a fps_ui
+            trabajo = trabajo or hablando
+        return trabajo
             
-        # Si hay un overlay visible (hablando), mantenerlo
-        if hasattr(self, 'is_talking') and self.is_talking:
-            self.overlay_label.show()
+    def programar_liberacion_teclas(self):
+        """
+        Mantiene un plazo mientras el bus tenga teclas presionadas.
 
-    def init_audio(self):
+        El reloj se detiene en reposo, así que si pynput pierde una
+        liberación nadie volvería a drenar el bus; teclas_timer (un único
+        temporizador reiniciable) lo reanuda cuando vence
+        BusEntrada.vencimiento_teclas para que drenar() suelte la tecla.
         """
-        Inicializa el sistema de captura y procesamiento de audio.
+        plazo = self.bus_entrada.vencimiento_teclas(time.monotonic())
+        if plazo is None:
+            self.teclas_timer.stop()
+        else:
+            self.teclas_timer.start(int(plazo * 1000) + 1)
         
-        Detalles técnicos:
-            - Utiliza sounddevice (sd) para captura de audio en tiempo real
-            - Configura un stream de entrada con callback asíncrono
-            - Implementa manejo de errores con intento alternativo de configuración
-            - Parámetros optimizados:
-                * samplerate: 44100Hz (calidad CD)
-                * blocksize: 1024 muestras (equilibrio entre latencia y rendimiento)
+    def init_servidor_estado(self, direccion):
+        """Arranca el servidor de difusión; si no puede escuchar, el gato sigue sin él"""
+        from broadcast import ServidorEstado
+        try:
+            self.servidor_estado = ServidorEstado(direccion)
+            self.servidor_estado.iniciar()
+        except (OSError, ValueError) as e:
+            logger.warning("No se pudo iniciar el servidor de estado en %s: %s", direccion, e)
+            self.servidor_estado = None
+        
+    def difundir_estado(self):
+        """
+        Publica el estado visible a los suscriptores si cambió desde el último fotograma.
+        
+        Se llama desde on_frame, así que el ritmo máximo es fps_ui mensajes
+        por segundo (el reloj sigue en marcha mientras se habla); el nivel se redondea para no difundir el ruido de fondo.
+        """
+        estado = (self.is_talking,
+                  self.animacion.teclado.estado in ("typing_handdown", "typing_handup"),
+                  self.animacion.mouse.estado == "mouse_move",
+                  round(self.nivel_actual, 3))
+        if estado == self._estado_difundido:
+            return
+        self._estado_difundido = estado
+        hablando, escribiendo, moviendo, nivel = estado
+        self.servidor_estado.publicar({"t": round(time.monotonic(), 4), "hablando": hablando,
+                                       "escribiendo": escribiendo, "moviendo": moviendo, "nivel": nivel})
             
-            El callback procesa cada bloque de audio para detectar actividad
-            vocal mediante análisis RMS (Root Mean Square) comparado con un
-            umbral configurable por el usuario.
+    def init_captura_aislada(self):
+        """
+        Inicia la captura de audio y de entrada global en un proceso hijo.
+        
+        Detalles técnicos:
+            - sd.InputStream y los listeners de pynput corren en otro proceso,
+              con su propio GIL (ver capture_process.py)
+            - El proceso hijo publica niveles, estado de habla y contadores de
+              eventos en memoria compartida; on_frame solo los lee
+            - closeEvent/close_app detienen el proceso y liberan la memoria
         """
-        # Inicializar stream de audio
+        from capture_process import CapturaAislada
+        from engine import config_audio_completa
+        self.captura = CapturaAislada(config_audio_completa(self.config))
+        self.reloj.continuo = True  # El proceso hijo no puede reanudar el reloj: sondear siempre
+        self.contadores_captura = None
         try:
-            self.stream = sd.InputStream(
-                samplerate=samplerate, 
-                blocksize=chunk_size, 
-                callback=self.audio_callback
-            )
-            self.stream.start()
-            print("Sistema de audio iniciado correctamente")
+            self.captura.iniciar()
         except Exception as e:
-            print(f"Error al iniciar el sistema de audio: {e}")
-            # Intento alternativo con parámetros diferentes
-            try:
-                print("Intentando configuración alternativa...")
-                self.stream = sd.InputStream(
-                    channels=1,
-                    samplerate=samplerate, 
-                    blocksize=chunk_size, 
-                    callback=self.audio_callback
-                )
-                self.stream.start()
-                print("Sistema de audio iniciado con configuración alternativa")
-            except Exception as e2:
-                print(f"Error en el segundo intento: {e2}")
-                print("No se pudo iniciar el sistema de audio")
-        
-    def audio_callback(self, indata, frames, time, status):
-        """
-        Callback para procesar cada bloque de audio capturado.
+            # iniciar_subsistemas crea entonces el motor y captura en este proceso
+            logger.warning("No se pudo iniciar la captura aislada (%s), usando captura en proceso", e)
+            self.captura.detener()
+            self.captura = None
+            self.reloj.continuo = False
         
-        Parámetros técnicos:
-            indata (numpy.ndarray): Buffer de audio del micrófono
-            frames (int): Número de frames en este bloque
-            time (CData): Información de tiempo de la captura
-            status (CallbackFlags): Flags de estado/error
+    def leer_captura_aislada(self):
+        """
+        Aplica los eventos publicados por el proceso de captura desde el último fotograma.
         
         Algoritmo:
-            1. Calcula el valor RMS (Root Mean Square) del bloque de audio
-               RMS = sqrt(mean(x²)) donde x son las muestras de audio
-            2. Compara con el umbral configurable (volumen_umbral)
-            3. Actualiza la UI en el hilo principal mediante QTimer.singleShot
-               para evitar problemas de threading
-        
-        El uso de numpy permite cálculos vectorizados eficientes para
-        el análisis de audio en tiempo real.
-        """
-        # Calcula la media cuadrática (RMS) del bloque de audio
-        volumen = np.sqrt(np.mean(indata**2))
-        
-        # Compara el volumen con el umbral configurable
-        if volumen > volumen_umbral:
-            print(f"Volumen detectado: {volumen:.4f}")
-            # Usar QTimer.singleShot para ejecutar show_sound en el hilo principal de Qt
-            QTimer.singleShot(0, self.show_sound)
-        else:
-            # Usar QTimer.singleShot para ejecutar show_idle en el hilo principal de Qt
-            QTimer.singleShot(0, self.show_idle)
+            1. Copia los contadores monótonos de la memoria compartida
+            2. La diferencia con la lectura anterior indica qué ocurrió
+            3. La resume en un Lote y lo aplica con aplicar_lote
             
+        Retorna:
+            bool: Estado de habla publicado por el proceso hijo
+        """
+        from capture_process import RMS, HABLANDO, TECLAS_PRESIONADAS, MOVIMIENTOS
+        estado = self.captura.estado
+        self.nivel_actual = float(estado[RMS])
+        contadores = estado[TECLAS_PRESIONADAS:MOVIMIENTOS + 1].copy()
+        if self.contadores_captura is None:
+            self.contadores_captura = contadores
+        presionadas, liberadas, clics_presionados, clics_liberados, movimientos = (
+            contadores - self.contadores_captura)
+        self.contadores_captura = contadores
+        
+        # Mismo resumen por fotograma que el BusEntrada (sin detalle de auto-repetición)
+        lote = Lote()
+        lote.pulsaciones = int(presionadas)
+        lote.liberaciones = int(liberadas)
+        lote.tecla_abajo = presionadas > liberadas
+        lote.clics = int(clics_presionados)
+        lote.liberaciones_clic = int(clics_liberados)
+        lote.boton_abajo = clics_presionados > clics_liberados
+        lote.movimiento = movimientos > 0
+        self.aplicar_lote(lote)
+        
+        return estado[HABLANDO] > 0.5
+        
     def show_idle(self):
-        # Mantener la imagen base y ocultar la superposición
-        self.overlay_label.hide()
+        # Mantener el resto de capas y quitar la boca del fotograma
         self.is_talking = False
+        self.actualizar_fotograma()
         
     def show_sound(self):
-        # Mantener la imagen base y mostrar la superposición
-        self.overlay_label.show()
+        # Mantener el resto de capas y añadir la boca al fotograma
         self.is_talking = True
-        print("Hablando detectado - overlay visible")
+        self.actualizar_fotograma()
+        logger.debug("Hablando detectado - overlay visible")
         
-    def setup_signals(self):
+    def aplicar_lote(self, lote):
+        """
+        Aplica en el hilo principal los eventos globales coalescidos de un fotograma.
+        
+        Reglas de coalescencia:
+            - Teclado: N pulsaciones se convierten en un solo "typing_handdown";
+              si al final del fotograma no queda ninguna tecla presionada, se
+              aplica un único pulso de liberación (handle_key_release). La
+              auto-repetición ya viene plegada por el BusEntrada y no repinta
+            - Clics: solo cuenta el estado final del botón
+            - Movimiento: como máximo una actualización cada mouse_sensibilidad
+              segundos (medidos con el tiempo monótono del tick), y nunca
+              durante el arrastre del personaje
+            
+        Retorna:
+            int: Número de cambios de estado aplicados
         """
-        Configura las conexiones de señales para eventos globales
+        aplicados = 0
         
-        Arquitectura de señales:
-            Implementa un patrón de comunicación entre hilos usando Qt Signals.
-            Las señales son emitidas por los listeners globales (en hilos separados)
-            y conectadas a slots en el hilo principal de la UI para:
+        if lote.pulsaciones and lote.tecla_abajo:
+            self.animacion.teclado.disparar("pulsar")
+            aplicados += 1
+        elif lote.liberaciones and not lote.tecla_abajo:
+            self.handle_key_release()
+            aplicados += 1
             
-            1. Garantizar thread-safety en la actualización de la UI
-            2. Desacoplar la captura de eventos de su procesamiento
-            3. Mantener responsabilidad única en cada componente
+        if lote.clics and lote.boton_abajo:
+            self.animacion.mouse.disparar("presionar")
+            aplicados += 1
+        elif lote.liberaciones_clic and not lote.boton_abajo:
+            self.animacion.mouse.disparar("soltar")
+            aplicados += 1
             
-            Conexiones:
-            - keyPressSignal → update_keyboard_state("typing_handdown")
-            - keyReleaseSignal → handle_key_release() con temporizador
-            - mouseClickPressSignal → update_mouse_state("mouse_move")
-            - mouseClickReleaseSignal → update_mouse_state("mouse_idle")
-            - mouseMoveSignal → handle_mouse_move() con temporizador
-        """
-        # Conectar señales a manejadores en el hilo principal
-        self.signals.keyPressSignal.connect(lambda: self.update_keyboard_state("typing_handdown"))
-        self.signals.keyReleaseSignal.connect(lambda: self.handle_key_release())
-        self.signals.mouseClickPressSignal.connect(lambda: self.update_mouse_state("mouse_move"))
-        self.signals.mouseClickReleaseSignal.connect(lambda: self.update_mouse_state("mouse_idle"))
-        self.signals.mouseMoveSignal.connect(lambda: self.handle_mouse_move())
+        if lote.movimiento and not self.dragging:
+            # Limitar la frecuencia de actualización para movimientos del mouse
+            current_time = self.reloj.ahora
+            if current_time - self.last_mouse_move_time > self.config.mouse_sensibilidad:  # Usar sensibilidad configurable
+                self.last_mouse_move_time = current_time
+                self.handle_mouse_move()
+                aplicados += 1
+                
+        return aplicados
         
     def handle_key_release(self):
-        """Manejador para la señal de liberación de tecla"""
-        self.update_keyboard_state("typing_handup")
-        # Volver al estado keyboard_idle después de un breve momento
-        QTimer.singleShot(500, lambda: self.update_keyboard_state("keyboard_idle"))
+        """Manejador para la liberación de tecla"""
+        # typing_handup y vuelta a keyboard_idle tras 500ms (reinicia el temporizador de la capa)
+        self.animacion.teclado.disparar("soltar")
         
     def handle_mouse_move(self):
-        """Manejador para la señal de movimiento del mouse"""
+        """Manejador para el movimiento del mouse"""
         # Solo actualizar si no estamos arrastrando
         if not self.dragging:
-            self.update_mouse_state("mouse_move")
-            # Volver al estado mouse_idle después de un breve momento
-            QTimer.singleShot(300, lambda: self.update_mouse_state("mouse_idle"))
+            # mouse_move y vuelta a mouse_idle tras 300ms (reinicia el temporizador de la capa)
+            self.animacion.mouse.disparar("mover")
     
     def open_settings_window(self):
         """
@@ -590,13 +877,13 @@ class CatNipy(QWidget):
         Implementación técnica:
             1. Reutiliza una instancia existente si ya se creó anteriormente
             2. Crea una nueva instancia de SettingsWindow desde el módulo settings
-            3. Programa una recarga de configuración asíncrona mediante QTimer
             
-            La recarga asíncrona permite que los cambios en la configuración
-            se apliquen correctamente después de cerrar la ventana de configuración,
-            evitando condiciones de carrera entre el guardado y la recarga.
+            La ventana publica sus cambios directamente en self.almacen_config
+            (aplicar_config los recibe al instante, sin pasar por el disco) y
+            escribe config.json una sola vez al cerrarse.
         """
-        print("Abriendo ventana de configuración...")
+        from settings import open_settings
+        logger.debug("Abriendo ventana de configuración...")
         # Guardar una referencia para evitar que se destruya
         if hasattr(self, 'settings_window') and self.settings_window:
             # Si ya existe una ventana, mostrarla de nuevo
@@ -604,31 +891,98 @@ class CatNipy(QWidget):
             self.settings_window.activateWindow()
             self.settings_window.raise_()
         else:
-            # Crear una nueva ventana
-            self.settings_window = open_settings()
+            # Crear una nueva ventana (con el piso de ruido estimado para mostrarlo)
+            if self.captura is not None:
+                piso_ruido = self.captura.piso_ruido
+            else:
+                piso_ruido = self.procesador.piso_ruido if self.motor is not None else None
+            self.settings_window = open_settings(piso_ruido=piso_ruido, almacen=self.almacen_config)
         
-        # Programar una recarga de la configuración después de cerrar la ventana
-        QTimer.singleShot(500, self.reload_config)
+    def detener_subsistemas(self):
+        """Cierra el stream, los monitores globales, la captura aislada y el servidor de estado"""
+        if self.motor is not None:
+            self.motor.detener()
+        if self.captura is not None:
+            self.captura.detener()
+        if self.servidor_estado is not None:
+            self.servidor_estado.detener()
         
     def close_app(self, event):
-        self.stream.stop()
-        self.stream.close()
+        self.detener_subsistemas()
+        self.guardar_config()
+        self.report_stats()
+        if self.metricas_timer.isActive():
+            self.escribir_metricas()
         QApplication.quit()
         
+    def guardar_config(self):
+        """Persiste los cambios hechos en vivo que aún no se escribieron en config.json"""
+        ventana = getattr(self, 'settings_window', None)
+        if ventana is not None and ventana.cambios_pendientes:
+            ventana.publicar_cambios()  # Solo lo editado: los demás valores de la ventana pueden estar viejos
+        try:
+            self.almacen_config.guardar()
+        except OSError as e:
+            logger.error("Error al guardar la configuración: %s", e)
+        
     def closeEvent(self, event):
-        # Asegurar que el stream se cierre al cerrar la ventana
-        if hasattr(self, 'stream'):
-            self.stream.stop()
-            self.stream.close()
-        
-        # Detener los monitores globales
-        if hasattr(self, 'keyboard_listener') and self.keyboard_listener.running:
-            self.keyboard_listener.stop()
-        if hasattr(self, 'mouse_listener') and self.mouse_listener.running:
-            self.mouse_listener.stop()
+        # Asegurar que el stream y los monitores globales se cierren al cerrar la ventana
+        self.detener_subsistemas()
+        self.guardar_config()
+        self.report_stats()
+        if self.metricas_timer.isActive():
+            self.escribir_metricas()
+            self.metricas_timer.stop()
+        
+        # Detener los temporizadores de animación y el vigilante de configuración
+        self.animacion.detener()
+        self.reloj.detener()
+        self.ahorro_timer.stop()
+        self.teclas_timer.stop()
+        self.almacen_config.detener()
             
         event.accept()
         
+    def report_stats(self):
+        """Registra (nivel INFO) la actividad de audio y de entrada acumulada durante la sesión"""
+        if not self._subsistemas_iniciados:
+            return
+        if self.captura is not None:
+            # Los detectores viven en el proceso hijo: solo hay los contadores que publicó
+            captura = self.captura.estadisticas()
+            logger.info("Captura aislada: %d bloques de audio, %d teclas, %d clics, %d movimientos",
+                        captura['bloques'], captura['teclas'], captura['clics'], captura['movimientos'])
+        else:
+            stats = self.procesador.detector_habla.estadisticas()
+            logger.info("Audio: %d bloques, %d transiciones, %d publicaciones a la GUI evitadas",
+                        stats['bloques'], stats['transiciones'], stats['publicaciones_ahorradas'])
+            entrada = self.bus_entrada.estadisticas()
+            logger.info("Entrada: %d eventos recibidos, %d descartados, %d recuperaciones, %d cambios aplicados",
+                        entrada['recibidos'], entrada['descartados'], entrada['recuperaciones'],
+                        entrada['aplicados'])
+            vad = self.procesador.detector_voz.estadisticas()
+            estado = "excede" if self.procesador.detector_voz.excede_presupuesto else "dentro de"
+            logger.info("Detector de voz '%s': %s us por bloque (%s su presupuesto de %s us)",
+                        vad['detector'], vad['tiempo_medio_us'], estado, vad['presupuesto_us'])
+        cambios = ", ".join(f"{capa.nombre} {capa.cambios}" for capa in self.animacion.capas)
+        logger.info("Animación: %d temporizadores, cambios de estado: %s", len(self.animacion.timers()), cambios)
+        fotogramas = self.fotogramas.estadisticas()
+        pintado = self.superficie.estadisticas()
+        logger.info("Fotogramas: %d compuestos en %s ms, %d aciertos de caché; escala %s, dpr %s: "
+                    "%d sprites escalados en %s ms, %s MB en caché, %d descartes; renderizador '%s': "
+                    "%d pintados, %s us y %d píxeles de media",
+                    fotogramas['fotogramas'], fotogramas['tiempo_composicion_ms'], fotogramas['aciertos'],
+                    fotogramas['escala'], fotogramas['dpr'], fotogramas['escalamientos'],
+                    fotogramas['tiempo_escalado_ms'], fotogramas['cache_mb'], fotogramas['descartes'],
+                    pintado['renderizador'], pintado['pintados'], pintado['tiempo_medio_us'],
+                    pintado['pixeles_por_pintado'])
+        if self.ahorro is not None:
+            modos = self.ahorro.estadisticas()
+            logger.info("Energía: %d entradas en modo de ahorro; despertares/s normal %s, ahorro %s",
+                        modos['entradas_en_ahorro'], modos['normal']['despertares_por_segundo'],
+                        modos['ahorro']['despertares_por_segundo'])
+        logger.info("Log: %d mensajes omitidos por el límite de frecuencia", mensajes_omitidos())
+        
     def activateWindow(self):
         # Sobrescribir método para asegurar que la ventana permanece encima
         super().activateWindow()
@@ -636,148 +990,122 @@ class CatNipy(QWidget):
         self.raise_()
         
     def reload_config(self):
+        """Relee config.json ahora si cambió en disco (normalmente lo hace el vigilante solo)"""
+        return self.almacen_config.recargar()
+        
+    def aplicar_config(self, cfg, cambios):
         """
-        Recarga la configuración desde el archivo
+        Adopta una nueva instantánea de configuración (conectado a AlmacenConfig.cambiada).
         
         Detalles técnicos:
-            1. Actualiza variables globales para parámetros configurables:
-               - volumen_umbral: Sensibilidad de detección de audio
-               - mouse_sensibilidad: Frecuencia de respuesta a movimientos
+            1. Reemplaza self.config: quien lea la configuración ve la
+               instantánea anterior o la nueva completas, nunca una mezcla
+               
+            2. Publica los parámetros de detección al procesador de audio
+               (se aplican al inicio del siguiente bloque, en el hilo de
+               audio) o al proceso de captura aislado
                
-            2. Reinicia el temporizador del mouse para aplicar nueva sensibilidad
+            3. Solo toca lo que cambió: sensibilidad del mouse, nivel de log,
+               frecuencia de refresco, escala y política de ahorro
+               
+            4. Antes de iniciar_subsistemas solo guarda la instantánea: los
+               subsistemas la leerán al iniciarse
             
-            Utiliza palabra clave 'global' para modificar variables de ámbito global
-            definidas fuera de esta clase. Esto permite que los callbacks de audio
-            y mouse accedan a los valores actualizados.
+            Las claves que solo se leen al iniciar (formato de audio,
+            captura_aislada, renderizador, servidor_estado,
+            arranque_diferido) requieren
+            reiniciar CatNipy.
         """
-        global volumen_umbral, mouse_sensibilidad
-        config = cargar_configuracion()
-        volumen_umbral = config.get("volumen_umbral", 0.005)
-        mouse_sensibilidad = config.get("mouse_sensibilidad", 0.1)
-        self.last_mouse_move_time = time.time() - mouse_sensibilidad  # Actualizar tiempo del mouse
-        print(f"Configuración actualizada: volumen_umbral={volumen_umbral}, mouse_sensibilidad={mouse_sensibilidad}")
+        self.config = cfg
+        if "mouse_sensibilidad" in cambios:
+            self.last_mouse_move_time = float("-inf")  # El próximo movimiento se aplica con la nueva sensibilidad
+        if "log_nivel" in cambios:
+            cambiar_nivel(cfg.log_nivel)
+        if "fps_ui" in cambios:
+            self.reloj.cambiar_fps(cfg.fps_ui)
+        if "escala" in cambios:
+            self.actualizar_variante()
+        if not self._subsistemas_iniciados:
+            return
+        from engine import CLAVES_DETECCION, config_audio
+        if cambios & set(CLAVES_DETECCION):
+            if self.captura is not None:
+                self.captura.configurar(config_audio(cfg))
+            else:
+                self.motor.configurar(cfg)
+        if "metricas_intervalo" in cambios and not (self.ahorro is not None and self.ahorro.activo):
+            self.programar_metricas(cfg.metricas_intervalo)
+        if cambios & {"ahorro_minutos", "ahorro_audio"} and self.ahorro is not None:
+            self.ahorro.configurar(cfg.ahorro_minutos, cfg.ahorro_audio)
+            self.programar_ahorro()
+        reinicio = cambios & {"captura_aislada", "renderizador", "servidor_estado", "arranque_diferido"} | {c for c in cambios if c.startswith("audio_")}
+        if reinicio:
+            logger.warning("Cambios que se aplicarán al reiniciar: %s", ", ".join(sorted(reinicio)))
         
     def showEvent(self, event):
         # Se llama cuando la ventana se muestra
         super().showEvent(event)
+        if not self._pantalla_conectada and self.windowHandle() is not None:
+            # Pantallas con distinto devicePixelRatio: recomponer a la nueva densidad al cambiar
+            self.windowHandle().screenChanged.connect(self.actualizar_variante)
+            self._pantalla_conectada = True
+            self.actualizar_variante(self.windowHandle().screen())
         self.activateWindow()  # Asegurar que está activa al mostrarse
-    
-    def init_global_monitors(self):
-        """
-        Inicializa monitores globales para eventos de teclado y mouse.
-        
-        Arquitectura técnica:
-            Utiliza la biblioteca 'pynput' para monitorear eventos de entrada
-            globales a nivel del sistema operativo. Esto permite detectar
-            actividad incluso cuando la aplicación no tiene el foco.
-            
-            Componentes:
-            1. keyboard.Listener: Captura eventos de teclado globales
-               - on_press: Llamado cuando se presiona cualquier tecla
-               - on_release: Llamado cuando se suelta cualquier tecla
-               
-            2. mouse.Listener: Captura eventos de mouse globales
-               - on_move: Llamado cuando se mueve el cursor
-               - on_click: Llamado cuando se hace clic con cualquier botón
-            
-            Los callbacks emiten señales Qt para procesamiento thread-safe
-            en el hilo principal de la UI.
-        """
-        # Inicializar monitor de teclado global
-        self.keyboard_listener = keyboard.Listener(
-            on_press=self.on_global_key_press,
-            on_release=self.on_global_key_release)
-        self.keyboard_listener.start()
-        
-        # Inicializar monitor de mouse global
-        self.mouse_listener = mouse.Listener(
-            on_move=self.on_global_mouse_move,
-            on_click=self.on_global_mouse_click)
-        self.mouse_listener.start()
-        
-        print("Monitores globales de teclado y mouse iniciados")
-    
-    def on_global_key_press(self, key):
-        """Manejador para eventos globales de tecla presionada"""
-        # Emitir señal para manejar en el hilo principal
-        self.signals.keyPressSignal.emit()
-        return True  # Permitir que el evento se propague
-    
-    def on_global_key_release(self, key):
-        """Manejador para eventos globales de tecla liberada"""
-        # Emitir señal para manejar en el hilo principal
-        self.signals.keyReleaseSignal.emit()
-        return True  # Permitir que el evento se propague
-    
-    def on_global_mouse_move(self, x, y):
-        """
-        Manejador para eventos globales de movimiento del mouse
-        
-        Parámetros técnicos:
-            x, y (int): Coordenadas absolutas del cursor en la pantalla
-            
-        Algoritmo de limitación de frecuencia:
-            Implementa un mecanismo de throttling (limitación de frecuencia)
-            para reducir la cantidad de actualizaciones de la UI:
-            
-            1. Registra timestamp del movimiento actual
-            2. Compara con el timestamp del último movimiento procesado
-            3. Solo procesa si ha pasado suficiente tiempo (configurable)
-            
-            Este enfoque reduce significativamente la carga de CPU y
-            proporciona animaciones más suaves con múltiples movimientos.
-            
-        Nota: No se procesan movimientos durante arrastre del personaje.
-        """
-        # Solo actualizar el estado si no estamos arrastrando
-        if self.dragging:
-            return True  # No hacer nada especial durante el arrastre de la ventana
-        
-        # Limitar la frecuencia de actualización para movimientos del mouse
-        current_time = time.time()
-        if current_time - self.last_mouse_move_time > mouse_sensibilidad:  # Usar sensibilidad configurable
-            self.last_mouse_move_time = current_time
-            # Emitir señal para manejar en el hilo principal
-            self.signals.mouseMoveSignal.emit()
-        
-        return True  # Permitir que el evento se propague
-    
-    def on_global_mouse_click(self, x, y, button, pressed):
-        """Manejador para eventos globales de clic del mouse"""
-        if pressed:
-            # Emitir señal para manejar en el hilo principal
-            self.signals.mouseClickPressSignal.emit()
-        else:
-            # Emitir señal para manejar en el hilo principal
-            self.signals.mouseClickReleaseSignal.emit()
-        return True  # Permitir que el evento se propague
 
-# Clase para manejar señales entre hilos
-class GlobalEventSignals(QObject):
-    """Clase para enviar señales de eventos globales al hilo principal de Qt"""
-    keyPressSignal = pyqtSignal()
-    keyReleaseSignal = pyqtSignal()
-    mouseClickPressSignal = pyqtSignal()
-    mouseClickReleaseSignal = pyqtSignal()
-    mouseMoveSignal = pyqtSignal()
+def instrumentar_traza():
+    """
+    Traza los caminos críticos si la traza está activa (tracing.py).
+    
+    Debe llamarse antes de crear AlmacenConfig y CatNipy: sus métodos
+    enlazados se entregan como callbacks a sounddevice, pynput y Qt.
+    Desactivada no importa nada: el arranque rápido no paga engine ni settings.
+    """
+    if not tracing.activo():
+        return
+    from engine import MotorDeteccion
+    from settings import SettingsWindow
+    tracing.instrumentar(MotorDeteccion, ("audio_callback", "adaptar_bloque"), "audio")
+    tracing.instrumentar(MotorDeteccion, ("on_global_key_press", "on_global_key_release",
+                                   "on_global_mouse_move", "on_global_mouse_click"), "entrada")
+    tracing.instrumentar(CatNipy, ("on_frame", "aplicar_lote", "update_keyboard_state",
+                                   "update_mouse_state", "update_mouth_state"), "estado")
+    tracing.instrumentar(SuperficieGato, ("paintEvent",), "pintado")
+    tracing.instrumentar(LienzoGato, ("paintEvent",), "pintado")
+    tracing.instrumentar(SettingsWindow, ("paintEvent",), "pintado")
+    tracing.instrumentar(CatNipy, ("reload_config", "aplicar_config"), "config")
+    tracing.instrumentar(AlmacenConfig, ("recargar", "guardar"), "config")
+    tracing.instrumentar(SettingsWindow, ("save_config", "publicar_cambios"), "config")
 
 if __name__ == '__main__':
+    import multiprocessing
+    multiprocessing.freeze_support()  # Necesario para la captura aislada en el ejecutable
+    if "--stats" in sys.argv[1:]:
+        # Muestra la última instantánea de métricas de la instancia en ejecución y termina
+        sys.exit(mostrar_estadisticas(como_json="--json" in sys.argv[1:]))
+    if "--trace" in sys.argv[1:]:
+        # Traza opcional: python brain.py --trace [archivo.json] (por defecto catnipy_traza.json)
+        indice = sys.argv.index("--trace")
+        siguiente = sys.argv[indice + 1] if indice + 1 < len(sys.argv) else ""
+        tracing.activar(siguiente if siguiente and not siguiente.startswith("-") else "catnipy_traza.json")
+    else:
+        tracing.activar_desde_entorno()
+    instrumentar_traza()
+    # HiDPI: coordenadas lógicas escaladas por pantalla y pixmaps con devicePixelRatio (frames.py)
+    QApplication.setAttribute(Qt.AA_EnableHighDpiScaling)
+    QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps)
     app = QApplication(sys.argv)
+    almacen_config = AlmacenConfig(CONFIG_FILE, DEFAULT_CONFIG)
+    configurar_logging(almacen_config.actual.log_nivel)
     
-    print("Escuchando...")
+    logger.info("Escuchando...")
     
-    cat = CatNipy()
+    cat = CatNipy(almacen_config)
     cat.show()
     cat.activateWindow()  # Asegurar que está activa y encima
     
     # Aplicar ambos estados simultáneamente para probar
-    QTimer.singleShot(1000, lambda: cat.update_keyboard_state("keyboard_idle"))
-    QTimer.singleShot(1000, lambda: cat.update_mouse_state("mouse_idle"))
-    
-    # Programar una actualización periódica de la configuración
-    config_timer = QTimer()
-    config_timer.timeout.connect(cat.reload_config)
-    config_timer.start(5000)  # Verificar cada 5 segundos por cambios en la configuración
+    QTimer.singleShot(1000, lambda: cat.animacion.teclado.disparar("reposo"))
+    QTimer.singleShot(1000, lambda: cat.animacion.mouse.disparar("reposo"))
     
     try:
         sys.exit(app.exec_())
@@ -0,0 +1,276 @@
+"""
+Servidor local que difunde el estado del gato a cualquier número de suscriptores.
+
+Varios overlays y paneles pueden seguir al mismo gato sin abrir cada uno su
+propia captura de micrófono ni sus propios hooks de entrada: se conectan a
+un socket Unix o a un puerto TCP de localhost y reciben una línea JSON
+(NDJSON) por cambio:
+
+    {"t": 12.345, "hablando": true, "escribiendo": false, "moviendo": false, "nivel": 0.031}
+
+Arquitectura:
+    - Un bucle asyncio en un hilo propio ("difusion") acepta conexiones y
+      escribe a los suscriptores
+    - publicar() se llama desde el productor (hilo principal de la GUI o el
+      bucle de engine.py): serializa el mensaje una sola vez y lo entrega al
+      bucle con call_soon_threadsafe; sin suscriptores no despierta al bucle
+    - Cada suscriptor tiene una cola acotada (deque con maxlen) y descarta el mensaje más
+      antiguo si el cliente no lee: un cliente lento solo se pierde estados
+      intermedios y nunca retiene al productor ni al hilo de audio, que no
+      tocan el servidor
+    - El buffer de envío del socket de cada suscriptor se limita a
+      BUFFER_ENVIO: sin ese límite el kernel acumularía cientos de KB de
+      estados viejos por cliente lento antes de que la cola llegara a
+      descartar nada
+    - Al conectarse, un suscriptor recibe de inmediato el último estado
+
+Direcciones: "unix:/ruta/al/socket", "tcp:puerto" o "tcp:host:puerto"
+(por defecto 127.0.0.1). Es NDJSON sobre un socket de flujo, no WebSocket.
+"""
+import asyncio
+import json
+import os
+import socket
+import stat
+import threading
+from collections import deque
+
+from log import obtener_logger
+from metrics import metricas
+
+logger = obtener_logger("difusion")
+
+CAPACIDAD_COLA = 64          # Mensajes pendientes por suscriptor antes de descartar los más antiguos
+HOST_POR_DEFECTO = "127.0.0.1"
+ESPERA_INICIO_S = 5.0
+ESPERA_SONDEO_S = 1.0        # Conexión de prueba a un socket Unix existente
+BUFFER_ENVIO = 16 * 1024     # SO_SNDBUF de cada conexión (bytes)
+PENDIENTES_CONEXION = 512    # Conexiones sin aceptar que admite el socket (backlog)
+
+
+def analizar_direccion(direccion):
+    """
+    ("unix", ruta) o ("tcp", host, puerto) a partir de "unix:/ruta", "tcp:puerto" o "tcp:host:puerto".
+
+    Lanza ValueError si la dirección no tiene uno de esos formatos.
+    """
+    if direccion.startswith("unix:") and len(direccion) > len("unix:"):
+        return ("unix", direccion[len("unix:"):])
+    if direccion.startswith("tcp:"):
+        host, _, puerto = direccion[len("tcp:"):].rpartition(":")
+        if puerto.isdigit():
+            return ("tcp", host or HOST_POR_DEFECTO, int(puerto))
+    raise ValueError(f"Dirección no válida: {direccion!r} (usar unix:/ruta o tcp:[host:]puerto)")
+
+
+def liberar_socket_huerfano(ruta):
+    """
+    Borra ruta si es un socket Unix huérfano de una ejecución anterior.
+
+    Solo se borra un socket (S_ISSOCK) que rechaza una conexión de prueba.
+    Lanza FileExistsError si ruta es otro tipo de archivo o si un servidor
+    responde en ella: nunca se borra un archivo ajeno ni se roba el socket
+    de otra instancia en marcha.
+    """
+    try:
+        info = os.lstat(ruta)
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(info.st_mode):
+        raise FileExistsError(f"{ruta} ya existe y no es un socket")
+    prueba = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    prueba.settimeout(ESPERA_SONDEO_S)
+    try:
+        prueba.connect(ruta)
+    except (ConnectionRefusedError, FileNotFoundError):
+        pass  # Nadie escucha: es huérfano
+    except OSError as e:  # Tiempo agotado (cola de conexiones llena) u otro error: hay alguien
+        raise FileExistsError(f"{ruta} está en uso ({e})") from e
+    else:
+        raise FileExistsError(f"Ya hay un servidor escuchando en {ruta}")
+    finally:
+        prueba.close()
+    os.unlink(ruta)
+
+
+class _Suscriptor:
+    __slots__ = ("cola", "evento", "escritor", "cerrado", "descartados")
+
+    def __init__(self, capacidad, escritor):
+        self.cola = deque(maxlen=capacidad)
+        self.escritor = escritor
+        self.evento = asyncio.Event()
+        self.cerrado = False
+        self.descartados = 0
+
+
+class ServidorEstado:
+    """
+    Servidor de difusión en un hilo de fondo.
+
+    Uso:
+        servidor = ServidorEstado("unix:/tmp/catnipy.sock")
+        servidor.iniciar()
+        servidor.publicar({"t": ..., "hablando": True, ...})
+        servidor.detener()
+
+    Métricas (metrics.py): difusion.mensajes (mensajes entregados a colas),
+    difusion.descartados (mensajes descartados por colas llenas) y el
+    medidor difusion.suscriptores; los contadores solo los escribe el hilo
+    del servidor.
+    """
+    def __init__(self, direccion, capacidad=CAPACIDAD_COLA):
+        self.direccion = analizar_direccion(direccion)
+        self.capacidad = capacidad
+        self._suscriptores = set()
+        self._ultimo = None
+        self._loop = None
+        self._servidor = None
+        self._hilo = None
+        self._error = None
+        self._inodo = None  # (st_dev, st_ino) del socket Unix creado por este servidor
+        self._listo = threading.Event()
+
+        registro = metricas()
+        self.m_mensajes = registro.contador("difusion.mensajes")
+        self.m_descartados = registro.contador("difusion.descartados")
+        registro.medidor("difusion.suscriptores", lambda: len(self._suscriptores))
+
+    @property
+    def suscriptores(self):
+        return len(self._suscriptores)
+
+    def iniciar(self):
+        """Arranca el hilo del servidor y espera a que escuche; relanza el error si no pudo"""
+        self._hilo = threading.Thread(target=self._ejecutar, name="difusion", daemon=True)
+        self._hilo.start()
+        self._listo.wait(ESPERA_INICIO_S)
+        if self._error is not None:
+            raise self._error
+        logger.info("Difundiendo el estado en %s", ":".join(str(p) for p in self.direccion))
+
+    def _ejecutar(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._servidor = self._loop.run_until_complete(self._escuchar())
+        except Exception as e:  # Ruta ocupada, puerto en uso, plataforma sin sockets Unix...
+            self._error = e
+            self._listo.set()
+            self._loop.close()
+            return
+        self._listo.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.close()
+
+    async def _escuchar(self):
+        if self.direccion[0] == "unix":
+            ruta = self.direccion[1]
+            liberar_socket_huerfano(ruta)
+            servidor = await asyncio.start_unix_server(self._atender, ruta, backlog=PENDIENTES_CONEXION)
+            info = os.lstat(ruta)
+            self._inodo = (info.st_dev, info.st_ino)
+            return servidor
+        _, host, puerto = self.direccion
+        return await asyncio.start_server(self._atender, host, puerto, backlog=PENDIENTES_CONEXION)
+
+    async def _atender(self, lector, escritor):
+        conexion = escritor.get_extra_info("socket")
+        if conexion is not None:
+            conexion.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, BUFFER_ENVIO)
+        escritor.transport.set_write_buffer_limits(high=BUFFER_ENVIO)
+        suscriptor = _Suscriptor(self.capacidad, escritor)
+        if self._ultimo is not None:
+            suscriptor.cola.append(self._ultimo)
+            suscriptor.evento.set()
+        self._suscriptores.add(suscriptor)
+        cierre = asyncio.ensure_future(self._esperar_cierre(lector, suscriptor))
+        try:
+            while True:
+                await suscriptor.evento.wait()
+                suscriptor.evento.clear()
+                if suscriptor.cerrado:
+                    break
+                cola = suscriptor.cola
+                while cola:
+                    escritor.write(cola.popleft())
+                await escritor.drain()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self._suscriptores.discard(suscriptor)
+            cierre.cancel()
+            escritor.close()
+            if suscriptor.descartados:
+                logger.debug("Suscriptor desconectado con %d mensajes descartados", suscriptor.descartados)
+
+    async def _esperar_cierre(self, lector, suscriptor):
+        """Lee (y descarta) lo que envíe el cliente hasta que cierre la conexión"""
+        try:
+            while await lector.read(1024):
+                pass
+        except (ConnectionError, OSError):
+            pass
+        suscriptor.cerrado = True
+        suscriptor.evento.set()
+
+    def publicar(self, estado):
+        """
+        Difunde un estado (diccionario serializable) a todos los suscriptores.
+
+        Se llama desde el hilo productor: serializa una vez y retorna sin
+        esperar a la red.
+        """
+        mensaje = (json.dumps(estado, separators=(",", ":")) + "\n").encode()
+        self._ultimo = mensaje
+        if self._suscriptores and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._difundir, mensaje)
+
+    def _difundir(self, mensaje):
+        # Hilo del servidor: encolar y despertar a cada escritor
+        for suscriptor in self._suscriptores:
+            cola = suscriptor.cola
+            if len(cola) == self.capacidad:
+                suscriptor.descartados += 1
+                self.m_descartados.incrementar()
+            cola.append(mensaje)  # deque(maxlen) descarta el más antiguo
+            suscriptor.evento.set()
+        self.m_mensajes.incrementar(len(self._suscriptores))
+
+    def escribir(self, estado, ahora):
+        """Interfaz de salida de engine.ejecutar (EstadoActividad -> mensaje)"""
+        self.publicar(estado.como_dict(ahora))
+
+    def detener(self):
+        """Cierra el servidor y las conexiones y espera al hilo (idempotente)"""
+        if self._loop is None or self._loop.is_closed():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._cerrar(), self._loop).result(ESPERA_INICIO_S)
+        except Exception as e:
+            logger.warning("Cierre incompleto del servidor de estado: %s", e)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._hilo.join(ESPERA_INICIO_S)
+        if self._inodo is not None:
+            self._borrar_socket_propio(self.direccion[1])
+
+    def _borrar_socket_propio(self, ruta):
+        """Borra el socket Unix solo si sigue siendo el que creó este servidor"""
+        try:
+            info = os.lstat(ruta)
+        except FileNotFoundError:
+            return
+        if stat.S_ISSOCK(info.st_mode) and (info.st_dev, info.st_ino) == self._inodo:
+            os.unlink(ruta)
+        self._inodo = None
+
+    async def _cerrar(self):
+        self._servidor.close()
+        for suscriptor in list(self._suscriptores):
+            suscriptor.cerrado = True
+            suscriptor.evento.set()
+            suscriptor.escritor.close()  # Interrumpe un drain() pendiente de un cliente lento
+        await asyncio.sleep(0)
+        await self._servidor.wait_closed()
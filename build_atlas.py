@@ -0,0 +1,125 @@
+"""
+Genera el atlas de sprites (assets/atlas.png + assets/atlas.json).
+
+Cada PNG de assets/motions y assets/gui se recorta a su zona opaca y se
+empaqueta por estantes (de mayor a menor altura) en una sola imagen. El
+índice guarda el rectángulo de cada sprite dentro del atlas, el ancla del
+recorte y el tamaño original, que es lo que usa atlas.AtlasSprites, y la
+fecha de modificación y el tamaño en bytes de cada PNG de origen.
+
+Uso:
+    python build_atlas.py [--ancho 1024] [--margen 1]
+
+Si el atlas no existe, CatNipy carga los PNG sueltos. Si una imagen cambió
+desde que se generó, AtlasSprites.cargar lo regenera al arrancar.
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+from PyQt5.QtCore import QPoint, QRect
+from PyQt5.QtGui import QImage, QPainter
+
+from atlas import ATLAS_IMAGEN, ATLAS_INDICE, archivos_sprites, firmas_sprites, script_dir
+
+
+def rect_opaco(imagen):
+    """Rectángulo mínimo que contiene los píxeles con alfa > 0 (vacío si no hay)"""
+    imagen = imagen.convertToFormat(QImage.Format_ARGB32)
+    ancho, alto = imagen.width(), imagen.height()
+    bits = imagen.constBits()
+    bits.setsize(imagen.bytesPerLine() * alto)
+    pixeles = np.frombuffer(bits, np.uint8).reshape(alto, imagen.bytesPerLine())[:, :ancho * 4]
+    alfa = pixeles.reshape(alto, ancho, 4)[:, :, 3]  # ARGB32 en memoria little-endian: B, G, R, A
+    filas = np.flatnonzero(alfa.any(axis=1))
+    columnas = np.flatnonzero(alfa.any(axis=0))
+    if len(filas) == 0:
+        return QRect()
+    return QRect(int(columnas[0]), int(filas[0]),
+                 int(columnas[-1] - columnas[0] + 1), int(filas[-1] - filas[0] + 1))
+
+
+def empaquetar(tamanos, ancho_max, margen):
+    """
+    Empaquetado por estantes.
+
+    Parámetros:
+        tamanos (dict): nombre -> (ancho, alto)
+
+    Retorna:
+        tuple: (posiciones {nombre: (x, y)}, ancho total, alto total)
+    """
+    orden = sorted(tamanos, key=lambda nombre: (-tamanos[nombre][1], nombre))
+    posiciones = {}
+    x = y = alto_estante = ancho_total = 0
+    for nombre in orden:
+        ancho, alto = tamanos[nombre]
+        if x > 0 and x + ancho > ancho_max:
+            y += alto_estante + margen
+            x = alto_estante = 0
+        posiciones[nombre] = (x, y)
+        x += ancho + margen
+        alto_estante = max(alto_estante, alto)
+        ancho_total = max(ancho_total, x - margen)
+    return posiciones, ancho_total, y + alto_estante
+
+
+def construir(ancho_max=1024, margen=1, imagen_destino=ATLAS_IMAGEN, indice_destino=ATLAS_INDICE,
+              base=script_dir):
+    """Construye y guarda el atlas con los PNG de `base`; retorna el índice generado"""
+    fuentes = firmas_sprites(base)  # Antes de leerlas: un cambio durante la construcción se detecta después
+    imagenes, recortes = {}, {}
+    for nombre, ruta in archivos_sprites(base).items():
+        imagen = QImage(ruta)
+        if imagen.isNull():
+            raise ValueError(f"No se pudo cargar la imagen {ruta}")
+        imagenes[nombre] = imagen
+        recortes[nombre] = rect_opaco(imagen)
+
+    posiciones, ancho, alto = empaquetar(
+        {nombre: (rect.width(), rect.height()) for nombre, rect in recortes.items()}, ancho_max, margen)
+
+    atlas = QImage(max(ancho, 1), max(alto, 1), QImage.Format_ARGB32)  # Sin premultiplicar: copia exacta al PNG
+    atlas.fill(0)
+    painter = QPainter(atlas)
+    painter.setCompositionMode(QPainter.CompositionMode_Source)
+    sprites = {}
+    for nombre, recorte in sorted(recortes.items()):
+        x, y = posiciones[nombre]
+        if not recorte.isEmpty():
+            painter.drawImage(QPoint(x, y), imagenes[nombre], recorte)
+        sprites[nombre] = {
+            "rect": [x, y, recorte.width(), recorte.height()],
+            "ancla": [recorte.x(), recorte.y()],
+            "tamano": [imagenes[nombre].width(), imagenes[nombre].height()],
+        }
+    painter.end()
+
+    if not atlas.save(imagen_destino, "PNG"):
+        raise OSError(f"No se pudo guardar {imagen_destino}")
+    indice = {"imagen": os.path.basename(imagen_destino), "tamano": [atlas.width(), atlas.height()],
+              "sprites": sprites, "fuentes": fuentes}
+    with open(indice_destino, "w") as f:
+        json.dump(indice, f, indent=4)
+    return indice
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera el atlas de sprites de CatNipy")
+    parser.add_argument("--ancho", type=int, default=1024, help="Ancho máximo del atlas en píxeles")
+    parser.add_argument("--margen", type=int, default=1, help="Píxeles transparentes entre sprites")
+    args = parser.parse_args(argv)
+
+    indice = construir(args.ancho, args.margen)
+    originales = sum(w * h for w, h in (s["tamano"] for s in indice["sprites"].values()))
+    ancho, alto = indice["tamano"]
+    print(f"Atlas {ancho}x{alto} con {len(indice['sprites'])} sprites "
+          f"({100.0 * ancho * alto / originales:.0f}% de los píxeles originales)")
+    print(f"    {ATLAS_IMAGEN}\n    {ATLAS_INDICE}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,289 @@
+"""
+Subsistema de captura aislado en un proceso hijo.
+
+El stream de sounddevice y los listeners de pynput se ejecutan en un proceso
+separado, con su propio GIL, para que un repintado lento o una recarga de
+configuración en la GUI no retrase los callbacks de entrada del sistema.
+
+Comunicación entre procesos:
+    - multiprocessing.shared_memory: array de float64 con el nivel de audio,
+      el estado de habla, el piso de ruido y contadores monótonos de eventos
+      de teclado y mouse. Cada campo tiene un único hilo escritor en el hijo
+    - Pipe: el proceso principal envía los parámetros de detección cuando
+      cambia la configuración
+    - Event: señal de parada para un cierre limpio
+
+Este módulo no importa PyQt5: el proceso hijo se crea con "spawn" y solo
+carga numpy, sounddevice y pynput.
+"""
+import math
+import multiprocessing
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from log import configurar_logging, obtener_logger
+
+logger = obtener_logger("captura")
+
+# Índices de los campos del estado compartido
+RMS = 0
+PICO = 1
+TIEMPO = 2
+HABLANDO = 3
+PISO = 4
+UMBRAL = 5
+BLOQUES = 6
+TECLAS_PRESIONADAS = 7
+TECLAS_LIBERADAS = 8
+CLICS_PRESIONADOS = 9
+CLICS_LIBERADOS = 10
+MOVIMIENTOS = 11
+LATIDO = 12
+NUM_CAMPOS = 13
+
+
+class PisoRuidoRemoto:
+    """Vista de solo lectura del piso de ruido del proceso hijo (misma interfaz que EstimadorPisoRuido)"""
+    def __init__(self, estado):
+        self._estado = estado
+
+    @property
+    def piso(self):
+        piso = float(self._estado[PISO])
+        return None if self._estado[BLOQUES] == 0 or math.isnan(piso) else piso
+
+    @property
+    def umbral(self):
+        return float(self._estado[UMBRAL])
+
+
+class CapturaAislada:
+    """
+    Lado del proceso principal del subsistema de captura aislado.
+
+    Uso:
+        captura = CapturaAislada(config_audio)
+        captura.iniciar()
+        estado = captura.estado      # array compartido, leído desde on_frame
+        captura.configurar(config)   # nuevos parámetros de detección
+        captura.estadisticas()       # contadores del hijo (métricas e informe al cerrar)
+        captura.detener()            # desde closeEvent / close_app
+    """
+    def __init__(self, config, sintetico=False):
+        self.config = dict(config)
+        self.sintetico = sintetico
+        self._shm = None
+        self._proceso = None
+        self._parada = None
+        self._conexion = None
+        self.estado = None
+        self.piso_ruido = None
+
+    def iniciar(self):
+        """Crea la memoria compartida y arranca el proceso hijo"""
+        ctx = multiprocessing.get_context("spawn")
+        self._shm = shared_memory.SharedMemory(create=True, size=NUM_CAMPOS * 8)
+        self.estado = np.ndarray((NUM_CAMPOS,), dtype=np.float64, buffer=self._shm.buf)
+        self.estado[:] = 0.0
+        self.piso_ruido = PisoRuidoRemoto(self.estado)
+        self._parada = ctx.Event()
+        self._conexion, conexion_hijo = ctx.Pipe()
+        self._proceso = ctx.Process(
+            target=_proceso_captura,
+            args=(self._shm.name, self.config, self._parada, conexion_hijo, self.sintetico),
+            name="catnipy-captura",
+            daemon=True,
+        )
+        self._proceso.start()
+        logger.info("Captura aislada iniciada (pid %d)", self._proceso.pid)
+
+    @property
+    def activa(self):
+        return self._proceso is not None and self._proceso.is_alive()
+
+    def configurar(self, config):
+        """Envía nuevos parámetros de detección al proceso hijo"""
+        self.config.update(config)
+        if self.activa:
+            try:
+                self._conexion.send(config)
+            except (BrokenPipeError, OSError) as e:
+                logger.warning("No se pudo enviar la configuración a la captura aislada: %s", e)
+
+    def estadisticas(self):
+        """Contadores publicados por el proceso hijo (también tras detener(): se conservan los últimos)"""
+        if self.estado is None:
+            return {"bloques": 0, "teclas": 0, "clics": 0, "movimientos": 0}
+        return {
+            "bloques": int(self.estado[BLOQUES]),
+            "teclas": int(self.estado[TECLAS_PRESIONADAS]),
+            "clics": int(self.estado[CLICS_PRESIONADOS]),
+            "movimientos": int(self.estado[MOVIMIENTOS]),
+        }
+
+    def detener(self, timeout=2.0):
+        """Detiene el proceso hijo y libera la memoria compartida (idempotente)"""
+        if self._proceso is not None:
+            self._parada.set()
+            self._proceso.join(timeout)
+            if self._proceso.is_alive():
+                logger.warning("La captura aislada no terminó a tiempo, forzando cierre")
+                self._proceso.terminate()
+                self._proceso.join(timeout)
+            self._proceso = None
+        if self._conexion is not None:
+            self._conexion.close()
+            self._conexion = None
+        if self._shm is not None:
+            # Soltar la vista de NumPy antes de cerrar el bloque compartido (conservando los últimos valores)
+            self.estado = self.estado.copy()
+            self.piso_ruido = PisoRuidoRemoto(self.estado)
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+
+def _proceso_captura(nombre_shm, config, parada, conexion, sintetico):
+    """
+    Punto de entrada del proceso hijo.
+
+    Detalles técnicos:
+        1. Se adjunta a la memoria compartida creada por el proceso principal
+        2. Construye el mismo ProcesadorAudio que usa la GUI en modo normal
+        3. Arranca el stream de audio y los listeners (o fuentes sintéticas)
+        4. Atiende cambios de configuración por el Pipe hasta recibir la parada
+    """
+    from audio import BufferNiveles, DetectorHabla, EstimadorPisoRuido, FormatoCaptura, ProcesadorAudio
+    from vad import crear_detector
+
+    configurar_logging(config.get("log_nivel", "WARNING"))  # El proceso hijo tiene su propio hilo de escritura
+
+    shm = shared_memory.SharedMemory(name=nombre_shm)
+    estado = np.ndarray((NUM_CAMPOS,), dtype=np.float64, buffer=shm.buf)
+
+    formato = FormatoCaptura.desde_config(config)
+    procesador = ProcesadorAudio(
+        formato,
+        crear_detector(config["detector_voz"], formato.samplerate_efectivo),
+        DetectorHabla(config["volumen_umbral"], config["habla_liberacion"], config["habla_retencion"]),
+        BufferNiveles(),
+        EstimadorPisoRuido(margen=config["umbral_auto_margen"]),
+        config["umbral_auto"],
+    )
+
+    def procesar_bloque(indata, frames):
+        procesador.procesar(indata, frames, time.monotonic())
+        rms, pico, tiempo = procesador.niveles.ultimo()
+        estado[RMS] = rms
+        estado[PICO] = pico
+        estado[TIEMPO] = tiempo
+        estado[HABLANDO] = 1.0 if procesador.detector_habla.hablando else 0.0
+        piso = procesador.piso_ruido.piso
+        estado[PISO] = math.nan if piso is None else piso  # Sin estimación aún (p. ej. solo silencio digital)
+        estado[UMBRAL] = procesador.piso_ruido.umbral
+        estado[BLOQUES] += 1
+
+    def contar(campo):
+        estado[campo] += 1
+
+    detener_fuentes = (_iniciar_fuentes_sinteticas if sintetico else _iniciar_fuentes)(
+        procesador, procesar_bloque, contar)
+
+    try:
+        while not parada.is_set():
+            estado[LATIDO] = time.monotonic()
+            if conexion.poll(0.25):
+                try:
+                    procesador.configurar(**conexion.recv())
+                except EOFError:
+                    break
+    finally:
+        detener_fuentes()
+        del estado
+        shm.close()
+
+
+def _iniciar_fuentes(procesador, procesar_bloque, contar):
+    """Arranca sounddevice y pynput en el proceso hijo; retorna la función de parada"""
+    import sounddevice as sd
+    from pynput import keyboard, mouse
+
+    recursos = []
+    try:
+        formato = procesador.formato.validar(sd)
+        if formato is not procesador.formato:
+            procesador.cambiar_formato(formato)
+        stream = sd.InputStream(
+            samplerate=formato.samplerate,
+            blocksize=formato.blocksize,
+            channels=formato.canales,
+            dtype=formato.dtype,
+            callback=lambda indata, frames, time_info, status: procesar_bloque(indata, frames)
+        )
+        stream.start()
+        recursos.append(stream)
+    except Exception as e:
+        logger.error("Captura aislada: no se pudo iniciar el audio: %s", e)
+
+    keyboard_listener = keyboard.Listener(
+        on_press=lambda key: contar(TECLAS_PRESIONADAS),
+        on_release=lambda key: contar(TECLAS_LIBERADAS))
+    mouse_listener = mouse.Listener(
+        on_move=lambda x, y: contar(MOVIMIENTOS),
+        on_click=lambda x, y, button, pressed: contar(CLICS_PRESIONADOS if pressed else CLICS_LIBERADOS))
+    keyboard_listener.start()
+    mouse_listener.start()
+
+    def detener():
+        keyboard_listener.stop()
+        mouse_listener.stop()
+        for stream in recursos:
+            stream.stop()
+            stream.close()
+    return detener
+
+
+def _iniciar_fuentes_sinteticas(procesador, procesar_bloque, contar, eventos_por_segundo=1000):
+    """
+    Fuentes sin dispositivos para pruebas y benchmarks: ruido con ráfagas de
+    "voz" a tiempo real y eventos de entrada a la frecuencia indicada.
+    """
+    formato = procesador.formato
+    parada = threading.Event()
+
+    def audio():
+        rng = np.random.default_rng(0)
+        periodo = formato.blocksize / formato.samplerate
+        t = np.arange(formato.blocksize) / formato.samplerate
+        voz = (0.05 * np.sin(2 * np.pi * 220 * t)).astype(np.float32).reshape(-1, 1)
+        bloque = 0
+        while not parada.wait(periodo):
+            if (bloque // 30) % 2:
+                procesar_bloque(voz, formato.blocksize)
+            else:
+                ruido = (rng.standard_normal((formato.blocksize, 1)) * 0.001).astype(np.float32)
+                procesar_bloque(ruido, formato.blocksize)
+            bloque += 1
+
+    def entrada():
+        periodo = 1.0 / eventos_por_segundo
+        n = 0
+        while not parada.wait(periodo):
+            contar(MOVIMIENTOS)
+            if n % 50 == 0:
+                contar(TECLAS_PRESIONADAS)
+                contar(TECLAS_LIBERADAS)
+            n += 1
+
+    hilos = [threading.Thread(target=f, daemon=True) for f in (audio, entrada)]
+    for hilo in hilos:
+        hilo.start()
+
+    def detener():
+        parada.set()
+        for hilo in hilos:
+            hilo.join(1.0)
+    return detener
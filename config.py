@@ -0,0 +1,291 @@
+"""
+Configuración de CatNipy sin dependencias de Qt.
+
+Contiene los valores por defecto de config.json, la ruta del archivo y la
+instantánea inmutable Configuracion. Lo importan tanto la aplicación gráfica
+(settings.py, config_store.py) como los procesos sin interfaz (engine.py,
+replay.py), que así no cargan PyQt5 solo para leer la configuración.
+"""
+import json
+import os
+from types import MappingProxyType
+
+from log import obtener_logger
+
+logger = obtener_logger("config")
+
+# Obtener la ruta del directorio donde se encuentra el script
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Configuración por defecto
+DEFAULT_CONFIG = {
+    "volumen_umbral": 0.005,  # Sensibilidad del micrófono
+    "mouse_sensibilidad": 0.1,  # Sensibilidad del movimiento del mouse
+    "habla_liberacion": 0.6,  # Umbral de liberación relativo a volumen_umbral
+    "habla_retencion": 0.25,  # Segundos de silencio antes de cerrar la boca
+    "fps_ui": 30,  # Ticks por segundo máximos del reloj de fotogramas (se detiene en reposo)
+    "detector_voz": "energia",  # Algoritmo de detección de voz (ver vad.py)
+    "audio_samplerate": 16000,  # Frecuencia de muestreo del micrófono (Hz)
+    "audio_canales": 1,  # Canales capturados
+    "audio_dtype": "float32",  # Formato de muestra: "int16" o "float32"
+    "audio_blocksize": 512,  # Muestras por bloque de audio
+    "audio_diezmado": 1,  # Analizar la media de cada N muestras (paso bajo)
+    "audio_baja_latencia": False,  # Bloques pequeños con latency='low', adaptados al coste medido
+    "audio_bloque_min": 128,  # Tamaño de bloque mínimo (y inicial) en modo de baja latencia
+    "audio_bloque_max": 1024,  # Tamaño de bloque máximo en modo de baja latencia
+    "umbral_auto": False,  # Calcular el umbral a partir del piso de ruido
+    "umbral_auto_margen": 3.0,  # Umbral automático = piso de ruido * margen
+    "captura_aislada": False,  # Ejecutar audio y monitores de entrada en un proceso hijo
+    "renderizador": "fotogramas",  # Superficie de pintado: "fotogramas" o "regiones"
+    "escala": 1.0,  # Tamaño del gato respecto a las imágenes originales (0.25 a 4)
+    "log_nivel": "WARNING",  # Nivel mínimo de los mensajes: "DEBUG", "INFO", "WARNING" o "ERROR"
+    "metricas_intervalo": 0,  # Segundos entre instantáneas de métricas (0 = desactivadas)
+    "servidor_estado": "",  # Difundir el estado en "unix:/ruta" o "tcp:[host:]puerto" ("" = desactivado)
+    "ahorro_minutos": 10,  # Minutos sin entrada ni voz antes del modo de ahorro (0 = nunca)
+    "ahorro_audio": "lento",  # Audio en modo de ahorro: "lento" (bloques grandes) o "pausado"
+    "arranque_diferido": True  # Pintar el gato antes de abrir el audio y los listeners
+}
+
+# Límites de las claves numéricas: los valores fuera de rango se recortan y
+# los que no son números toman el valor por defecto (Configuracion.desde_dict)
+RANGOS = {
+    "volumen_umbral": (0.0001, 1.0),
+    "mouse_sensibilidad": (0.0, 5.0),
+    "habla_liberacion": (0.0, 1.0),
+    "habla_retencion": (0.0, 5.0),
+    "fps_ui": (1, 240),
+    "audio_samplerate": (8000, 192000),
+    "audio_canales": (1, 32),
+    "audio_blocksize": (16, 16384),
+    "audio_diezmado": (1, 16),
+    "audio_bloque_min": (16, 16384),
+    "audio_bloque_max": (16, 16384),
+    "umbral_auto_margen": (1.0, 100.0),
+    "escala": (0.25, 4.0),
+    "metricas_intervalo": (0, 3600),
+    "ahorro_minutos": (0, 1440),
+}
+
+"""
+Parámetros de configuración por defecto:
+    - volumen_umbral: Umbral RMS para detección de audio (0.005)
+      * Valores más bajos aumentan sensibilidad (detecta sonidos más suaves)
+      * Rango efectivo: 0.001 - 0.02
+      
+    - mouse_sensibilidad: Intervalo mínimo entre actualizaciones de mouse (0.1s)
+      * Valores más bajos = animación más fluida pero más uso de CPU
+      * Valores más altos = animación menos reactiva pero menor uso de CPU
+      * Rango efectivo: 0.05 - 0.5 segundos
+
+    - habla_liberacion: Fracción de volumen_umbral bajo la cual se deja de hablar (0.6)
+      * Crea una histéresis que evita el parpadeo cuando el RMS ronda el umbral
+      * Rango efectivo: 0.3 - 1.0 (1.0 = sin histéresis)
+
+    - habla_retencion: Tiempo que el nivel debe permanecer bajo para cerrar la boca (0.25s)
+      * Valores más altos evitan que la boca se cierre entre palabras
+      * Rango efectivo: 0.0 - 0.5 segundos
+
+    - fps_ui: Ticks por segundo máximos del reloj de fotogramas (30)
+      * Cada tick aplica el estado pendiente (audio, teclado, mouse) y pinta
+        como máximo un fotograma
+      * Independiente de la frecuencia de bloques de audio (~43 por segundo)
+      * Sin actividad el reloj se detiene: en reposo no hay ticks
+
+    - detector_voz: Algoritmo que decide si un bloque de audio es voz ("energia")
+      * "energia": Solo RMS (comportamiento clásico, el más barato)
+      * "energia_zcr": RMS + tasa de cruces por cero (descarta zumbidos y siseos)
+      * "espectral": Proporción de energía en la banda de voz mediante rfft
+
+    - audio_samplerate / audio_canales / audio_dtype / audio_blocksize / audio_diezmado:
+      Formato de captura (16 kHz, mono, float32, 512 muestras, sin diezmado)
+      * Se valida contra el dispositivo al iniciar; si no lo soporta se ajusta
+      * 16 kHz mono int16 usa ~11 veces menos bytes por segundo que 44.1 kHz estéreo float32
+
+    - audio_baja_latencia: Modo de baja latencia (False)
+      * Empieza con audio_bloque_min muestras por bloque (128 = 8 ms a 16 kHz)
+        y pide al dispositivo latency='low'; audio_blocksize se ignora
+      * Cada 2 s se revisa la duración de los callbacks y los desbordes: el
+        bloque se duplica si la máquina no llega y se reduce a la mitad tras
+        un periodo estable, siempre entre audio_bloque_min y audio_bloque_max
+      * Solo con la captura en proceso (captura_aislada = False); se aplica al reiniciar
+
+    - umbral_auto: Si es True, volumen_umbral se ignora y el umbral sigue al
+      piso de ruido estimado en tiempo real (False)
+    - umbral_auto_margen: Multiplicador sobre el piso de ruido (3.0)
+      * Valores más bajos = más sensible; rango efectivo: 2.0 - 6.0
+
+    - captura_aislada: Ejecuta sounddevice y pynput en un proceso hijo con su
+      propio GIL, comunicado por memoria compartida (False)
+      * Evita que un repintado lento retrase los callbacks de entrada del sistema
+      * La GUI no crea el motor de detección; las métricas muestran los
+        contadores del proceso hijo (medidor "captura")
+      * Se aplica al reiniciar la aplicación
+
+    - renderizador: Cómo se pinta el personaje ("fotogramas")
+      * "fotogramas": QLabel con el fotograma compuesto; cada cambio repinta todo
+      * "regiones": Lienzo propio que solo repinta el rectángulo de la capa que
+        cambió (boca al hablar, patas al teclear o mover el mouse)
+      * Se aplica al reiniciar la aplicación
+
+    - escala: Tamaño del gato respecto a las imágenes originales (1.0)
+      * Se limita a 0.25 - 4 y se aplica al instante (también desde la
+        ventana de configuración, con + / - o la rueda del mouse)
+      * Se combina con el devicePixelRatio de la pantalla: en HiDPI cada
+        imagen se suaviza a la densidad real y se ve nítida
+      * Cada imagen se escala una sola vez por escala y pantalla (frames.py)
+
+    - log_nivel: Nivel mínimo de los mensajes en la consola ("WARNING")
+      * "WARNING": solo avisos y errores (ejecución normal silenciosa)
+      * "INFO": arranque, recarga de configuración y estadísticas al cerrar
+      * "DEBUG": además cada cambio de estado de las capas
+      * Cada mensaje está limitado a 5 repeticiones por segundo (log.py)
+
+    - metricas_intervalo: Cada cuántos segundos se escribe la instantánea de
+      métricas que lee `python brain.py --stats` (0)
+      * 0 desactiva la escritura (el registro en memoria sigue activo);
+        5 es un valor razonable para seguir la aplicación en marcha
+      * Se escribe en un directorio privado del usuario ($XDG_RUNTIME_DIR
+        o catnipy-<uid> en el directorio temporal)
+      * Ver metrics.py para la lista de métricas
+
+    - servidor_estado: Dirección en la que se difunde el estado del gato a
+      overlays y paneles ("" = desactivado)
+      * "unix:/tmp/catnipy.sock", "tcp:8765" o "tcp:127.0.0.1:8765"
+      * Una línea JSON por cambio (hablando, escribiendo, moviendo, nivel);
+        ver broadcast.py
+      * Se aplica al reiniciar la aplicación
+
+    - ahorro_minutos: Minutos sin teclado, mouse ni voz tras los que CatNipy
+      pasa al modo de ahorro (10; 0 = desactivado)
+      * Se suspenden los temporizadores periódicos (métricas, adaptación del
+        bloque de audio) y se reduce el audio según ahorro_audio
+      * La primera tecla o movimiento del mouse lo devuelve al modo normal
+      * Solo con la captura en proceso (captura_aislada = False)
+    - ahorro_audio: Qué hace el audio en modo de ahorro ("lento")
+      * "lento": bloques de 4096 muestras (~4 callbacks por segundo en lugar
+        de ~31); la voz se sigue detectando, con más latencia, y también
+        despierta
+      * "pausado": el stream se cierra; solo el teclado y el mouse despiertan
+
+    - arranque_diferido: Mostrar el gato en reposo antes de iniciar el resto (True)
+      * El stream de audio, los listeners globales, el servidor de estado y
+        sus importaciones (numpy, sounddevice, pynput, asyncio) llegan justo
+        después del primer fotograma
+      * False los inicia antes de mostrar la ventana, como antes
+      * Se aplica al reiniciar la aplicación
+"""
+
+# Archivo de configuración
+CONFIG_FILE = os.path.join(script_dir, "config.json")
+
+
+def _validar_numero(clave, valor, por_defecto, minimo, maximo):
+    """Valor numérico recortado a [minimo, maximo] (el de por defecto si no es un número)"""
+    if isinstance(valor, bool) or not isinstance(valor, (int, float)) or valor != valor:
+        logger.warning("Configuración: %s=%r no es un número; se usa %r", clave, valor, por_defecto)
+        return por_defecto
+    recortado = min(maximo, max(minimo, valor))
+    if isinstance(por_defecto, int):
+        recortado = int(recortado)
+    if recortado != valor:
+        logger.warning("Configuración: %s=%r fuera de rango [%s, %s]; se usa %r",
+                       clave, valor, minimo, maximo, recortado)
+    return recortado
+
+
+class Configuracion:
+    """
+    Instantánea inmutable de la configuración.
+
+    Uso:
+        cfg = Configuracion.cargar(CONFIG_FILE, DEFAULT_CONFIG)
+        cfg.volumen_umbral          # acceso por atributo
+        cfg["detector_voz"]         # o por clave
+        nueva = cfg.con_cambios(volumen_umbral=0.01)
+
+    Las claves que falten en el archivo toman el valor por defecto; las
+    claves desconocidas se conservan tal cual. Las claves numéricas de
+    RANGOS se validan al leer el archivo: un valor fuera de rango se
+    recorta (fps_ui 0 pasa a 1) y uno que no es un número toma el valor
+    por defecto, con un aviso en ambos casos.
+    """
+    __slots__ = ("_valores",)
+
+    def __init__(self, valores):
+        object.__setattr__(self, "_valores", MappingProxyType(dict(valores)))
+
+    @classmethod
+    def desde_dict(cls, valores, por_defecto):
+        completos = dict(por_defecto)
+        completos.update(valores)
+        for clave, (minimo, maximo) in RANGOS.items():
+            if clave in valores and clave in por_defecto:
+                completos[clave] = _validar_numero(clave, valores[clave], por_defecto[clave], minimo, maximo)
+        return cls(completos)
+
+    @staticmethod
+    def leer_archivo(ruta):
+        """
+        Valores escritos en el archivo JSON.
+
+        Retorna {} si el archivo no existe y None si no se puede leer o no
+        contiene un objeto JSON (p. ej. `[]` o `"x"`).
+        """
+        try:
+            if not os.path.exists(ruta):
+                return {}
+            with open(ruta, "r") as f:
+                valores = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Error al cargar la configuración: %s", e)
+            return None
+        if not isinstance(valores, dict):
+            logger.warning("Error al cargar la configuración: %s no contiene un objeto JSON", ruta)
+            return None
+        return valores
+
+    @classmethod
+    def cargar(cls, ruta, por_defecto):
+        """Lee el archivo JSON; si no existe o no es válido, usa los valores por defecto"""
+        return cls.desde_dict(cls.leer_archivo(ruta) or {}, por_defecto)
+
+    def __getattr__(self, nombre):
+        try:
+            return self._valores[nombre]
+        except KeyError:
+            raise AttributeError(nombre) from None
+
+    def __setattr__(self, nombre, valor):
+        raise AttributeError("Configuracion es inmutable; usa con_cambios()")
+
+    def __getitem__(self, clave):
+        return self._valores[clave]
+
+    def __contains__(self, clave):
+        return clave in self._valores
+
+    def __eq__(self, otra):
+        return isinstance(otra, Configuracion) and self._valores == otra._valores
+
+    __hash__ = None
+
+    def get(self, clave, por_defecto=None):
+        return self._valores.get(clave, por_defecto)
+
+    def como_dict(self):
+        """Copia mutable de los valores (para guardarlos o enviarlos a otro proceso)"""
+        return dict(self._valores)
+
+    def con_cambios(self, **cambios):
+        """Nueva instantánea con algunos valores reemplazados"""
+        valores = dict(self._valores)
+        valores.update(cambios)
+        return Configuracion(valores)
+
+    def diferencias(self, otra):
+        """Claves cuyo valor difiere entre dos instantáneas"""
+        claves = set(self._valores) | set(otra._valores)
+        return frozenset(clave for clave in claves if self._valores.get(clave) != otra._valores.get(clave))
+
+    def __repr__(self):
+        return f"Configuracion({dict(self._valores)!r})"
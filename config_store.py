@@ -0,0 +1,165 @@
+"""
+Configuración en memoria como instantáneas inmutables, recargada por eventos del sistema de archivos.
+
+En lugar de variables globales de módulo que la recarga muta una a una (y
+que los hilos de audio y de entrada podían leer a medio actualizar), la
+configuración vigente es un único objeto Configuracion inmutable. Publicar
+una configuración nueva es reemplazar una referencia: quien la lee obtiene
+la instantánea anterior completa o la nueva completa, nunca una mezcla.
+
+AlmacenConfig vigila config.json con QFileSystemWatcher en lugar de releerlo
+periódicamente: sin cambios en disco no hay ningún temporizador activo.
+También es el canal en proceso entre la ventana de configuración y el gato:
+la ventana publica instantáneas nuevas mientras se ajusta (sin tocar el
+disco) y guardar() las persiste de una vez al cerrarla.
+"""
+import json
+import os
+
+from PyQt5.QtCore import QFileSystemWatcher, QObject, QTimer, pyqtSignal
+
+from config import Configuracion
+from log import obtener_logger
+import tracing
+
+logger = obtener_logger("config")
+
+RETARDO_RECARGA_MS = 200  # Agrupa las ráfagas de eventos de una misma escritura
+
+
+class AlmacenConfig(QObject):
+    """
+    Dueño de la configuración vigente y de su recarga desde disco.
+
+    Detalles técnicos:
+        - actual: instantánea vigente; leerla es leer una sola referencia
+        - cambiada(Configuracion, frozenset): se emite en el hilo principal
+          con la nueva instantánea y las claves que cambiaron
+        - QFileSystemWatcher vigila el archivo y su carpeta: muchos editores
+          guardan escribiendo un archivo nuevo y renombrándolo, lo que hace
+          que el archivo original deje de estar vigilado
+        - Los eventos se agrupan con un QTimer de un solo disparo
+          (RETARDO_RECARGA_MS) que solo existe mientras hay eventos
+        - Antes de leer se compara (mtime, tamaño) con la última lectura:
+          un evento sobre otro archivo de la carpeta no provoca lectura
+        - Un archivo que no se puede interpretar (JSON inválido o que no es
+          un objeto) no se publica: el gato sigue con la configuración
+          vigente hasta la próxima escritura válida
+        - publicar() no escribe en disco: pendiente indica si la instantánea
+          vigente difiere de la guardada, y guardar() la escribe (archivo
+          temporal + os.replace) registrando la firma resultante, de modo
+          que el vigilante no relee la propia escritura
+        - guardar() solo escribe las claves que ya estaban en el archivo y
+          las que cambiaron con publicar(): las demás siguen tomando el
+          valor por defecto, así que un cambio futuro de DEFAULT_CONFIG
+          llega también a quien ya tiene un config.json
+    """
+    cambiada = pyqtSignal(object, frozenset)
+
+    def __init__(self, ruta, por_defecto, parent=None):
+        super().__init__(parent)
+        self.ruta = os.path.abspath(ruta)
+        self.por_defecto = dict(por_defecto)
+        self._firma = self._firma_archivo()
+        valores = Configuracion.leer_archivo(self.ruta) or {}
+        self._actual = Configuracion.desde_dict(valores, self.por_defecto)
+        self._claves_archivo = set(valores)
+        self._guardada = self._actual
+        self.lecturas = 1
+        self.recargas = 0
+        self.escrituras = 0
+
+        self._vigilante = None
+        self._retardo = QTimer(self)
+        self._retardo.setSingleShot(True)
+        self._retardo.setInterval(RETARDO_RECARGA_MS)
+        self._retardo.timeout.connect(self.recargar)
+
+    @property
+    def actual(self):
+        return self._actual
+
+    def vigilar(self):
+        """Empieza a vigilar el archivo de configuración y su carpeta"""
+        if self._vigilante is not None:
+            return
+        self._vigilante = QFileSystemWatcher(self)
+        self._vigilante.addPath(os.path.dirname(self.ruta))
+        self._vigilar_archivo()
+        self._vigilante.fileChanged.connect(self._evento)
+        self._vigilante.directoryChanged.connect(self._evento)
+
+    def _vigilar_archivo(self):
+        if os.path.exists(self.ruta) and self.ruta not in self._vigilante.files():
+            self._vigilante.addPath(self.ruta)
+
+    def _evento(self, ruta):
+        # Reinicia el retardo: una escritura genera varios eventos seguidos
+        self._retardo.start()
+
+    def _firma_archivo(self):
+        try:
+            estado = os.stat(self.ruta)
+            return (estado.st_mtime_ns, estado.st_size)
+        except OSError:
+            return None
+
+    def recargar(self):
+        """Relee el archivo si su firma (mtime, tamaño) cambió y publica la nueva configuración"""
+        if self._vigilante is not None:
+            self._vigilar_archivo()
+        firma = self._firma_archivo()
+        if firma == self._firma:
+            return False
+        self._firma = firma
+        self.lecturas += 1
+        valores = Configuracion.leer_archivo(self.ruta)
+        if valores is None:
+            # A medio editar o no es un objeto JSON: se mantiene la configuración vigente
+            return False
+        nueva = Configuracion.desde_dict(valores, self.por_defecto)
+        self._guardada = nueva
+        publicada = self.publicar(nueva)
+        self._claves_archivo = set(valores)  # Después de publicar: lo recargado ya está en disco
+        return publicada
+
+    def publicar(self, nueva):
+        """Reemplaza la instantánea vigente y emite cambiada si algo cambió"""
+        cambios = nueva.diferencias(self._actual)
+        if not cambios:
+            return False
+        self._actual = nueva
+        self._claves_archivo |= cambios
+        self.recargas += 1
+        logger.info("Configuración actualizada: %s", ", ".join(
+            f"{clave}={nueva.get(clave)}" for clave in sorted(cambios)))
+        tracing.instante("configuración publicada", "config", claves=sorted(cambios))
+        self.cambiada.emit(nueva, cambios)
+        return True
+
+    @property
+    def pendiente(self):
+        """True si hay cambios publicados en proceso que aún no están en disco"""
+        return bool(self._actual.diferencias(self._guardada))
+
+    def guardar(self):
+        """Escribe la instantánea vigente si difiere de la guardada; retorna True si escribió"""
+        if not self.pendiente:
+            return False
+        temporal = self.ruta + ".tmp"
+        valores = {clave: valor for clave, valor in self._actual.como_dict().items()
+                   if clave in self._claves_archivo}
+        with open(temporal, "w") as f:
+            json.dump(valores, f, indent=4)
+        os.replace(temporal, self.ruta)
+        self._firma = self._firma_archivo()
+        self._guardada = self._actual
+        self.escrituras += 1
+        logger.info("Configuración guardada en %s", self.ruta)
+        return True
+
+    def detener(self):
+        self._retardo.stop()
+        if self._vigilante is not None:
+            self._vigilante.deleteLater()
+            self._vigilante = None
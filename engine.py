@@ -0,0 +1,796 @@
+"""
+Motor de detección sin interfaz: micrófono, teclado y mouse -> "hablando / escribiendo / moviendo".
+
+MotorDeteccion reúne lo que antes vivía dentro de CatNipy: el stream de
+sounddevice con su ProcesadorAudio, los listeners globales de pynput con su
+BusEntrada y el adaptador de tamaño de bloque. No importa PyQt5: el gato
+(brain.py) lo usa para alimentar sus capas, y `python engine.py` lo ejecuta
+solo, para configuraciones que únicamente necesitan la señal de actividad
+(p. ej. para mover otros overlays) sin ventanas transparentes.
+
+Modo sin interfaz:
+    - EstadoActividad deriva tres banderas de los lotes del bus y del
+      detector de habla, con los mismos tiempos de vuelta a reposo que las
+      capas de animation.py
+    - El bucle principal duerme en un threading.Event que despiertan el
+      callback de audio (solo en transiciones de habla) y los listeners; sin
+      actividad no hay despertares salvo los vencimientos pendientes
+    - Cada cambio de estado se escribe en la salida: una línea JSON
+      (NDJSON) o un registro binario de 9 bytes
+
+Formato NDJSON (una línea por cambio):
+    {"t": 12.345, "hablando": true, "escribiendo": false, "moviendo": false, "nivel": 0.031}
+
+Formato binario (struct "<dB", 9 bytes por cambio):
+    t (float64, segundos monótonos) + máscara (bit 0 hablando, bit 1
+    escribiendo, bit 2 moviendo)
+
+Con --servir, en lugar de escribir en una salida, el motor escucha en un
+socket y difunde el estado a todos los clientes conectados (broadcast.py).
+
+Uso:
+    python engine.py [--salida -|unix:/ruta|tcp:host:puerto] [--formato ndjson|binario]
+    python engine.py --servir unix:/ruta|tcp:[host:]puerto
+"""
+import argparse
+import json
+import socket
+import struct
+import sys
+import threading
+import time
+
+from audio import (DetectorHabla, BufferNiveles, EstimadorPisoRuido, FormatoCaptura, ProcesadorAudio,
+                   AdaptadorBloque)
+from config import Configuracion, CONFIG_FILE, DEFAULT_CONFIG
+from input_bus import (BusEntrada, TECLA_PRESIONADA, TECLA_LIBERADA, CLIC_PRESIONADO, CLIC_LIBERADO,
+                       MOVIMIENTO, REPOSO_TECLADO_MS, REPOSO_MOUSE_MS)
+from log import configurar_logging, obtener_logger
+from metrics import metricas, memoria_residente_mb, cambios_de_contexto, METRICAS_ARCHIVO
+from vad import crear_detector
+import tracing
+
+logger = obtener_logger("motor")
+logger_audio = obtener_logger("audio")
+
+"""
+Configuración técnica del sistema de audio (claves audio_* de config.json):
+    audio_samplerate (int): Frecuencia de muestreo en Hz (16 kHz basta para voz)
+    audio_canales (int): Canales capturados (1 = mono; solo se analiza el primero)
+    audio_dtype (str): "int16" o "float32" (int16 = mitad de bytes por segundo)
+    audio_blocksize (int): Tamaño del buffer de audio por bloque
+                      Valor óptimo para equilibrar latencia y rendimiento
+                      - Valores bajos: menor latencia pero más carga de CPU
+                      - Valores altos: mayor latencia pero menos procesamiento
+    audio_diezmado (int): Analizar la media de cada N muestras (1 = desactivado)
+
+El formato se valida contra el dispositivo al iniciar (FormatoCaptura.validar).
+El sistema utiliza sounddevice para procesar audio en tiempo real
+y detectar cuando el usuario está hablando mediante análisis RMS.
+"""
+
+# Cada cuánto se evalúa el tamaño de bloque en el modo de baja latencia
+INTERVALO_ADAPTACION_MS = 2000
+
+# Modo de ahorro: cada cuánto se revisa la inactividad y bloque del stream "lento"
+INTERVALO_REVISION_AHORRO_S = 30
+BLOQUE_AHORRO = 4096  # 256 ms a 16 kHz: ~4 callbacks por segundo
+
+# Claves de config.json que se envían al detector de habla
+CLAVES_DETECCION = ("volumen_umbral", "habla_liberacion", "habla_retencion",
+                    "detector_voz", "umbral_auto", "umbral_auto_margen")
+
+
+def config_audio(cfg):
+    """
+    Parámetros de detección de una instantánea, con los nombres de ProcesadorAudio.configurar.
+
+    Se usan tanto para el procesador local como para el proceso de captura
+    aislado, que recibe un diccionario simple.
+    """
+    return {clave: cfg[clave] for clave in CLAVES_DETECCION}
+
+
+def config_audio_completa(cfg):
+    """config_audio() más el formato de captura y el nivel de log, para iniciar la captura aislada"""
+    completa = config_audio(cfg)
+    completa.update({clave: cfg[clave] for clave in DEFAULT_CONFIG if clave.startswith("audio_")})
+    completa["log_nivel"] = cfg.log_nivel
+    return completa
+
+
+class MotorDeteccion:
+    """
+    Captura de audio y de entrada global, sin Qt.
+
+    Atributos compartidos con quien lo consume (GUI o bucle sin interfaz):
+        procesador (ProcesadorAudio): Estado del detector de habla y piso de ruido
+        niveles (BufferNiveles): Últimos niveles por bloque
+        bus_entrada (BusEntrada): Eventos de teclado y mouse pendientes
+        despertar (threading.Event): Se activa con cada evento de entrada y
+            con cada transición de habla, para consumidores que esperan en
+            lugar de sondear; el consumidor lo limpia antes de drenar
+        al_despertar (callable | None): Se llama (desde el hilo del evento)
+            cuando despertar pasa de limpio a activo, una vez por ciclo del
+            consumidor; la GUI lo usa para reanudar su reloj de fotogramas
+        adaptador_bloque (AdaptadorBloque | None): Solo en modo de baja latencia
+    """
+    def __init__(self, cfg):
+        self.config = cfg
+        formato = FormatoCaptura.desde_config(cfg)
+        self.niveles = BufferNiveles()  # Niveles por bloque compartidos entre hilo de audio y consumidor
+        self.procesador = ProcesadorAudio(
+            formato,
+            crear_detector(cfg.detector_voz, formato.samplerate_efectivo),  # VAD de config.json
+            DetectorHabla(cfg.volumen_umbral, cfg.habla_liberacion, cfg.habla_retencion),
+            self.niveles,
+            EstimadorPisoRuido(margen=cfg.umbral_auto_margen),
+            cfg.umbral_auto
+        )
+        # Bus de eventos globales: los listeners encolan, el consumidor drena una vez por ciclo
+        self.bus_entrada = BusEntrada()
+        self.despertar = threading.Event()
+        self.al_despertar = None
+        self.adaptador_bloque = None
+        self.stream = None
+        self._reabrir_stream = False   # Stream perdido en un reinicio de bloque: adaptar_bloque lo reintenta
+        self.en_ahorro = False
+        self._bloque_activo = None     # Tamaño de bloque a restaurar al salir del modo de ahorro
+        self._audio_en_ahorro = False  # Si había stream al entrar en ahorro (hay que reabrirlo al salir)
+        self.keyboard_listener = None
+        self.mouse_listener = None
+
+        registro = metricas()
+        self.m_callbacks = registro.contador("audio.callbacks")
+        self.m_callback_us = registro.histograma("audio.callback_us")
+        self.m_desbordes = registro.contador("audio.input_overflow")
+        self.m_subdesbordes = registro.contador("audio.input_underflow")
+        self.m_reinicios = registro.contador("audio.reinicios_bloque")
+        registro.medidor("audio.blocksize", lambda: self.procesador.formato.blocksize)
+
+    @property
+    def hablando(self):
+        return self.procesador.detector_habla.hablando
+
+    def _despertar(self):
+        if not self.despertar.is_set():
+            self.despertar.set()
+            if self.al_despertar is not None:
+                self.al_despertar()
+
+    def configurar(self, cfg):
+        """Adopta una nueva instantánea de configuración (parámetros de detección)"""
+        self.config = cfg
+        self.procesador.configurar(**config_audio(cfg))
+
+    def iniciar(self):
+        self.iniciar_monitores()
+        self.iniciar_audio()
+
+    def iniciar_audio(self):
+        """
+        Inicializa el sistema de captura y procesamiento de audio.
+
+        Detalles técnicos:
+            - Utiliza sounddevice (sd) para captura de audio en tiempo real
+            - Valida el formato configurado (audio_*) contra el dispositivo y
+              adopta el formato ajustado si el dispositivo no lo soporta
+            - Configura un stream de entrada con callback asíncrono
+            - Implementa manejo de errores con intento alternativo de configuración
+            - Parámetros por defecto:
+                * samplerate: 16000Hz mono (suficiente para voz)
+                * blocksize: 512 muestras (~32ms, equilibrio entre latencia y rendimiento)
+
+            El callback procesa cada bloque de audio para detectar actividad
+            vocal mediante análisis RMS (Root Mean Square) comparado con un
+            umbral configurable por el usuario.
+
+        Retorna:
+            bool: Si el stream quedó abierto
+        """
+        cfg = self.config
+        if cfg.audio_baja_latencia:
+            # Modo de baja latencia: bloques pequeños que AdaptadorBloque agranda si la máquina no llega
+            self.adaptador_bloque = AdaptadorBloque(cfg.audio_bloque_min, cfg.audio_bloque_max)
+            self.procesador.cambiar_bloque(self.adaptador_bloque.minimo)
+
+        import sounddevice as sd  # Importación diferida: el motor se importa sin micrófono (benchmarks)
+
+        # Validar el formato contra el dispositivo antes de abrir el stream
+        try:
+            formato = self.procesador.formato.validar(sd)
+            if formato is not self.procesador.formato:
+                self.procesador.cambiar_formato(formato)
+        except Exception as e:
+            logger_audio.warning("No se pudo validar el formato de captura: %s", e)
+        formato = self.procesador.formato
+
+        # Inicializar stream de audio
+        try:
+            self.stream = self.abrir_stream(formato)
+            logger_audio.info("Sistema de audio iniciado correctamente: %s (%d bytes/s)",
+                              formato, formato.bytes_por_segundo)
+        except Exception as e:
+            logger_audio.warning("Error al iniciar el sistema de audio: %s", e)
+            # Intento alternativo con parámetros diferentes
+            try:
+                logger_audio.info("Intentando configuración alternativa...")
+                formato = FormatoCaptura(formato.samplerate, 1, "float32", formato.blocksize, formato.diezmado)
+                self.procesador.cambiar_formato(formato)
+                self.stream = self.abrir_stream(formato)
+                logger_audio.info("Sistema de audio iniciado con configuración alternativa")
+            except Exception as e2:
+                logger_audio.error("No se pudo iniciar el sistema de audio (segundo intento: %s)", e2)
+                self.adaptador_bloque = None
+                return False
+        return True
+
+    def abrir_stream(self, formato):
+        """Abre e inicia un InputStream con el formato dado (latency='low' en modo de baja latencia)"""
+        import sounddevice as sd
+        stream = sd.InputStream(
+            samplerate=formato.samplerate,
+            blocksize=formato.blocksize,
+            channels=formato.canales,
+            dtype=formato.dtype,
+            latency="low" if self.adaptador_bloque is not None else None,
+            callback=self.audio_callback
+        )
+        stream.start()
+        return stream
+
+    def adaptar_bloque(self):
+        """
+        Evalúa el tamaño de bloque y, si hace falta, reinicia el stream.
+
+        Detalles técnicos:
+            - Se llama cada INTERVALO_ADAPTACION_MS desde el hilo consumidor
+              (adaptacion_timer en la GUI, el bucle de ejecutar() sin ella)
+            - AdaptadorBloque decide con los callbacks registrados desde la
+              evaluación anterior (duración relativa al periodo y desbordes)
+            - El stream se detiene (sounddevice espera al callback en curso),
+              el procesador adopta el nuevo tamaño sin perder el estado de los
+              detectores y se abre un stream nuevo
+            - Si el stream nuevo no abre, se vuelve al tamaño anterior y se
+              deja de adaptar (adaptador_bloque pasa a None)
+            - Si tampoco abre con el tamaño anterior, el motor queda sin
+              stream y cada llamada siguiente reintenta abrirlo; al
+              conseguirlo se deja de adaptar
+        """
+        if self._reabrir_stream:
+            self.reintentar_stream()
+            return
+        if self.adaptador_bloque is None or self.stream is None:
+            return
+        anterior = self.procesador.formato.blocksize
+        nuevo = self.adaptador_bloque.evaluar(anterior)
+        if nuevo is None or nuevo == anterior:
+            return
+        self.stream.stop()
+        self.stream.close()
+        try:
+            self.procesador.cambiar_bloque(nuevo)
+            self.stream = self.abrir_stream(self.procesador.formato)
+        except Exception as e:
+            logger_audio.error("No se pudo reiniciar el audio con bloque %d (%s); se mantiene %d",
+                               nuevo, e, anterior)
+            self.procesador.cambiar_bloque(anterior)
+            self.stream = None
+            self._reabrir_stream = True
+            self.reintentar_stream()
+            return
+        self.adaptador_bloque.descartar()
+        self.m_reinicios.incrementar()
+        tracing.instante("reinicio del stream", "audio", blocksize=self.procesador.formato.blocksize)
+
+    def reintentar_stream(self):
+        """Intenta reabrir el stream perdido en un reinicio; si abre, deja de adaptar el bloque"""
+        try:
+            self.stream = self.abrir_stream(self.procesador.formato)
+        except Exception as e:
+            self.stream = None
+            logger_audio.error("No se pudo reabrir el audio con bloque %d (%s); se reintentará",
+                               self.procesador.formato.blocksize, e)
+            return
+        self._reabrir_stream = False
+        self.adaptador_bloque = None
+        logger_audio.info("Audio reabierto con bloque %d", self.procesador.formato.blocksize)
+
+    def audio_callback(self, indata, frames, time_info, status):
+        """
+        Callback para procesar cada bloque de audio capturado.
+
+        Parámetros técnicos:
+            indata (numpy.ndarray): Buffer de audio del micrófono
+            frames (int): Número de frames en este bloque
+            time_info (CData): Información de tiempo de la captura
+            status (CallbackFlags): Flags de estado/error
+
+        Algoritmo (ProcesadorAudio.procesar):
+            1. Toma el primer canal con el diezmado configurado y, si la
+               captura es int16, lo escala a float32 en un buffer preasignado
+            2. Calcula el valor RMS (Root Mean Square) y el pico
+               RMS = sqrt(x·x / n) donde x son las muestras de audio
+               (producto escalar: no crea arrays temporales)
+            3. Escribe (rms, pico, tiempo) en el BufferNiveles compartido
+            4. El detector de voz (vad.py) convierte el bloque en un nivel de
+               voz: el propio RMS, o 0.0 si el bloque no parece voz
+            5. Lo entrega al DetectorHabla, que aplica histéresis entre el
+               umbral de ataque (volumen_umbral) y el de liberación, más un
+               tiempo de retención
+
+        Este callback se ejecuta en el hilo de audio y nunca toca Qt ni hace
+        E/S: el consumidor consulta el estado del detector y el buffer de
+        niveles desde su propio ciclo; solo las transiciones lo despiertan.
+        """
+        inicio = time.perf_counter_ns()
+        if status:
+            if status.input_overflow:
+                self.m_desbordes.incrementar()
+            if status.input_underflow:
+                self.m_subdesbordes.incrementar()
+            # Solo encola el registro (log.py): el hilo de audio no hace E/S
+            logger_audio.warning("Estado del stream de audio: %s", status)
+        if self.procesador.procesar(indata, frames, time.monotonic()) is not None:
+            self._despertar()
+        duracion_ns = time.perf_counter_ns() - inicio
+        self.m_callbacks.incrementar()
+        self.m_callback_us.observar(duracion_ns / 1000.0)
+        adaptador = self.adaptador_bloque
+        if adaptador is not None:
+            adaptador.registrar(duracion_ns / 1e9, frames / self.procesador.formato.samplerate,
+                                bool(status and status.input_overflow))
+
+    def iniciar_monitores(self):
+        """
+        Inicializa monitores globales para eventos de teclado y mouse.
+
+        Arquitectura técnica:
+            Utiliza la biblioteca 'pynput' para monitorear eventos de entrada
+            globales a nivel del sistema operativo. Esto permite detectar
+            actividad incluso cuando la aplicación no tiene el foco.
+
+            Componentes:
+            1. keyboard.Listener: Captura eventos de teclado globales
+               - on_press: Llamado cuando se presiona cualquier tecla
+               - on_release: Llamado cuando se suelta cualquier tecla
+
+            2. mouse.Listener: Captura eventos de mouse globales
+               - on_move: Llamado cuando se mueve el cursor
+               - on_click: Llamado cuando se hace clic con cualquier botón
+
+            Los callbacks solo encolan un registro en el BusEntrada y retornan
+            en microsegundos; el consumidor lo drena una vez por ciclo.
+        """
+        from pynput import keyboard, mouse  # Importación diferida, como sounddevice en iniciar_audio
+
+        # Inicializar monitor de teclado global
+        self.keyboard_listener = keyboard.Listener(
+            on_press=self.on_global_key_press,
+            on_release=self.on_global_key_release)
+        self.keyboard_listener.start()
+
+        # Inicializar monitor de mouse global
+        self.mouse_listener = mouse.Listener(
+            on_move=self.on_global_mouse_move,
+            on_click=self.on_global_mouse_click)
+        self.mouse_listener.start()
+
+        logger.info("Monitores globales de teclado y mouse iniciados")
+
+    def on_global_key_press(self, key):
+        """Manejador para eventos globales de tecla presionada"""
+        # Encolar el evento para el próximo ciclo del consumidor
+        self.bus_entrada.publicar(TECLA_PRESIONADA, key)
+        self._despertar()
+        return True  # Permitir que el evento se propague
+
+    def on_global_key_release(self, key):
+        """Manejador para eventos globales de tecla liberada"""
+        self.bus_entrada.publicar(TECLA_LIBERADA, key)
+        self._despertar()
+        return True  # Permitir que el evento se propague
+
+    def on_global_mouse_move(self, x, y):
+        """
+        Manejador para eventos globales de movimiento del mouse
+
+        Parámetros técnicos:
+            x, y (int): Coordenadas absolutas del cursor en la pantalla
+
+        Los movimientos no se encolan uno a uno: el BusEntrada solo marca
+        que hubo movimiento. La GUI limita la frecuencia de actualización
+        según mouse_sensibilidad e ignora el movimiento mientras se arrastra
+        el personaje.
+        """
+        self.bus_entrada.publicar(MOVIMIENTO)
+        self._despertar()
+        return True  # Permitir que el evento se propague
+
+    def on_global_mouse_click(self, x, y, button, pressed):
+        """Manejador para eventos globales de clic del mouse"""
+        self.bus_entrada.publicar(CLIC_PRESIONADO if pressed else CLIC_LIBERADO, button)
+        self._despertar()
+        return True  # Permitir que el evento se propague
+
+    def entrar_ahorro(self, modo_audio):
+        """
+        Reduce el coste del audio mientras no hay actividad (hilo consumidor).
+
+        Modos:
+            "lento": reabre el stream con BLOQUE_AHORRO muestras por bloque;
+                la voz se sigue detectando (con más latencia) y despierta
+            "pausado": cierra el stream; solo el teclado o el mouse despiertan
+        """
+        if self.en_ahorro:
+            return
+        self.en_ahorro = True
+        self._bloque_activo = self.procesador.formato.blocksize
+        self._audio_en_ahorro = self.stream is not None
+        if self.stream is None:
+            return
+        self.stream.stop()
+        self.stream.close()
+        self.stream = None
+        if modo_audio == "lento":
+            try:
+                self.procesador.cambiar_bloque(max(BLOQUE_AHORRO, self._bloque_activo))
+                self.stream = self.abrir_stream(self.procesador.formato)
+            except Exception as e:
+                logger_audio.warning("No se pudo abrir el stream de ahorro (%s); audio en pausa", e)
+                self.procesador.cambiar_bloque(self._bloque_activo)
+                self.stream = None
+
+    def salir_ahorro(self):
+        """Restaura el stream con su tamaño de bloque anterior (hilo consumidor)"""
+        if not self.en_ahorro:
+            return
+        self.en_ahorro = False
+        if self.stream is not None:
+            self.stream.stop()
+            self.stream.close()
+            self.stream = None
+        if not self._audio_en_ahorro:
+            return
+        self.procesador.cambiar_bloque(self._bloque_activo)
+        try:
+            self.stream = self.abrir_stream(self.procesador.formato)
+        except Exception as e:
+            logger_audio.error("No se pudo reabrir el stream de audio al salir del modo de ahorro: %s", e)
+            return
+        if self.adaptador_bloque is not None:
+            self.adaptador_bloque.descartar()  # Lo medido con bloques de ahorro no cuenta
+
+    def detener(self):
+        """Cierra el stream y detiene los listeners (idempotente)"""
+        self._reabrir_stream = False
+        if self.stream is not None:
+            self.stream.stop()
+            self.stream.close()
+            self.stream = None
+        for listener in (self.keyboard_listener, self.mouse_listener):
+            if listener is not None and listener.running:
+                listener.stop()
+
+
+class PoliticaAhorro:
+    """
+    Modo de ahorro tras un periodo sin entrada ni voz, con los despertares de cada modo.
+
+    Detalles técnicos:
+        - revisar() se llama cada INTERVALO_REVISION_AHORRO_S en modo normal
+          (un despertar cada 30 s); compara los contadores que ya llevan el
+          bus de entrada y el detector de habla con los de la revisión
+          anterior, sin coste por evento
+        - Tras ahorro_minutos sin cambios entra en ahorro: el motor reduce o
+          pausa el audio (MotorDeteccion.entrar_ahorro) y el consumidor
+          suspende sus temporizadores periódicos
+        - El consumidor llama a salir() con el primer evento de entrada (o
+          transición de habla, en modo "lento")
+        - Por modo acumula segundos, despertares (cambios de contexto del
+          proceso) y callbacks de audio; estadisticas() da sus ritmos
+    """
+    MODOS = ("normal", "ahorro")
+
+    def __init__(self, motor, minutos, modo_audio):
+        self.motor = motor
+        self.configurar(minutos, modo_audio)
+        self.activo = False  # En modo de ahorro
+        self.entradas = 0
+        ahora = time.monotonic()
+        self.ultima_actividad = ahora
+        self._firma = self._firma_actividad()
+        self._acumulado = {modo: [0.0, 0, 0] for modo in self.MODOS}  # segundos, despertares, callbacks
+        self._inicio_tramo = self._muestra(ahora)
+
+    def configurar(self, minutos, modo_audio):
+        self.espera_s = minutos * 60.0
+        self.modo_audio = modo_audio
+
+    @property
+    def habilitada(self):
+        return self.espera_s > 0
+
+    def _firma_actividad(self):
+        detector = self.motor.procesador.detector_habla
+        return (self.motor.bus_entrada.total_recibidos, detector.transiciones)
+
+    def _muestra(self, ahora):
+        return (ahora, cambios_de_contexto() or 0, self.motor.m_callbacks.valor)
+
+    def _cerrar_tramo(self, ahora):
+        inicio = self._inicio_tramo
+        fin = self._muestra(ahora)
+        acumulado = self._acumulado["ahorro" if self.activo else "normal"]
+        for i in range(3):
+            acumulado[i] += fin[i] - inicio[i]
+        self._inicio_tramo = fin
+
+    def revisar(self, ahora):
+        """Registra la actividad desde la revisión anterior; retorna True si entró en ahorro"""
+        firma = self._firma_actividad()
+        if firma != self._firma or self.motor.hablando:
+            self._firma = firma
+            self.ultima_actividad = ahora
+            return False
+        if self.activo or not self.habilitada or ahora - self.ultima_actividad < self.espera_s:
+            return False
+        self._cerrar_tramo(ahora)
+        self.motor.entrar_ahorro(self.modo_audio)
+        self.activo = True
+        self.entradas += 1
+        logger.info("Modo de ahorro tras %.0f min sin actividad (audio %s)",
+                    (ahora - self.ultima_actividad) / 60.0, self.modo_audio)
+        tracing.instante("modo de ahorro", "energia", audio=self.modo_audio)
+        return True
+
+    def salir(self, ahora):
+        """Vuelve al modo normal (llamar con el primer evento tras entrar en ahorro)"""
+        if not self.activo:
+            return
+        self._cerrar_tramo(ahora)
+        self.motor.salir_ahorro()
+        self.activo = False
+        self.ultima_actividad = ahora
+        self._firma = self._firma_actividad()
+        logger.info("Fin del modo de ahorro")
+        tracing.instante("fin del modo de ahorro", "energia")
+
+    def estadisticas(self):
+        """Por modo: segundos, despertares y callbacks de audio por segundo (incluye el tramo en curso)"""
+        ahora = self._muestra(time.monotonic())
+        resultado = {}
+        for modo in self.MODOS:
+            segundos, despertares, callbacks = self._acumulado[modo]
+            if self.activo == (modo == "ahorro"):
+                segundos += ahora[0] - self._inicio_tramo[0]
+                despertares += ahora[1] - self._inicio_tramo[1]
+                callbacks += ahora[2] - self._inicio_tramo[2]
+            resultado[modo] = {
+                "segundos": round(segundos, 1),
+                "despertares_por_segundo": round(despertares / segundos, 2) if segundos else None,
+                "callbacks_por_segundo": round(callbacks / segundos, 2) if segundos else None,
+            }
+        resultado["entradas_en_ahorro"] = self.entradas
+        return resultado
+
+
+class EstadoActividad:
+    """
+    Banderas hablando / escribiendo / moviendo derivadas de los lotes del bus.
+
+    Reglas (las mismas que las capas de animation.py):
+        - escribiendo: hay una tecla presionada, o se soltó la última hace
+          menos de REPOSO_TECLADO_MS
+        - moviendo: hay un botón presionado, o el cursor se movió hace menos
+          de REPOSO_MOUSE_MS
+        - hablando: estado del DetectorHabla (ya tiene su propia retención)
+
+    nivel es el último RMS del micrófono: acompaña a cada cambio pero por sí
+    solo no cuenta como cambio.
+    """
+    def __init__(self):
+        self.nivel = 0.0
+        self.hablando = False
+        self.escribiendo = False
+        self.moviendo = False
+        self._fin_teclado = 0.0  # Instante en que escribiendo vence si no hay más actividad
+        self._fin_mouse = 0.0
+        self._tecla_abajo = False
+        self._boton_abajo = False
+
+    def actualizar(self, lote, hablando, ahora):
+        """Aplica un lote; retorna True si alguna bandera cambió"""
+        if not lote.vacio:
+            self._tecla_abajo = lote.tecla_abajo
+            self._boton_abajo = lote.boton_abajo
+            if lote.liberaciones:
+                self._fin_teclado = ahora + REPOSO_TECLADO_MS / 1000.0
+            if lote.movimiento:
+                self._fin_mouse = ahora + REPOSO_MOUSE_MS / 1000.0
+        anterior = self.como_tupla()
+        self.hablando = hablando
+        self.escribiendo = self._tecla_abajo or ahora < self._fin_teclado
+        self.moviendo = self._boton_abajo or ahora < self._fin_mouse
+        return self.como_tupla() != anterior
+
+    def proximo_vencimiento(self, ahora):
+        """Segundos hasta que alguna bandera pueda volver a reposo por tiempo (None si ninguna)"""
+        pendientes = [fin - ahora for fin, activo in ((self._fin_teclado, self.escribiendo),
+                                                      (self._fin_mouse, self.moviendo))
+                      if activo and fin > ahora]
+        return min(pendientes) if pendientes else None
+
+    def como_tupla(self):
+        return (self.hablando, self.escribiendo, self.moviendo)
+
+    def mascara(self):
+        return self.hablando | (self.escribiendo << 1) | (self.moviendo << 2)
+
+    def como_dict(self, ahora):
+        return {"t": round(ahora, 4), "hablando": self.hablando,
+                "escribiendo": self.escribiendo, "moviendo": self.moviendo, "nivel": round(self.nivel, 4)}
+
+
+class SalidaNDJSON:
+    """Una línea JSON compacta por cambio de estado"""
+    def __init__(self, archivo):
+        self.archivo = archivo
+
+    def escribir(self, estado, ahora):
+        linea = json.dumps(estado.como_dict(ahora), separators=(",", ":")) + "\n"
+        self.archivo.write(linea.encode())
+        self.archivo.flush()
+
+
+class SalidaBinaria:
+    """Registros de 9 bytes: t (float64) + máscara de banderas (uint8)"""
+    FORMATO = struct.Struct("<dB")
+
+    def __init__(self, archivo):
+        self.archivo = archivo
+
+    def escribir(self, estado, ahora):
+        self.archivo.write(self.FORMATO.pack(ahora, estado.mascara()))
+        self.archivo.flush()
+
+
+SALIDAS = {"ndjson": SalidaNDJSON, "binario": SalidaBinaria}
+
+
+def abrir_destino(destino):
+    """
+    Archivo binario de escritura para "-" (stdout), "unix:/ruta" o "tcp:host:puerto".
+
+    Con un socket, el motor se conecta como cliente al oyente que ya escucha
+    en esa dirección.
+    """
+    if destino in ("-", "", None):
+        return sys.stdout.buffer
+    if destino.startswith("unix:"):
+        conexion = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        conexion.connect(destino[len("unix:"):])
+        return conexion.makefile("wb")
+    if destino.startswith("tcp:"):
+        host, _, puerto = destino[len("tcp:"):].rpartition(":")
+        conexion = socket.create_connection((host or "127.0.0.1", int(puerto)))
+        return conexion.makefile("wb")
+    return open(destino, "ab")
+
+
+def ejecutar(motor, salida, fps=30, parar=None, intervalo_metricas=0, ahorro=None):
+    """
+    Bucle sin interfaz: espera actividad, deriva el estado y escribe cada cambio.
+
+    Detalles técnicos:
+        - Espera en motor.despertar con el plazo del próximo vencimiento
+          (vuelta a reposo o liberación de teclas sin evento de liberación,
+          ver BusEntrada.vencimiento_teclas), de la próxima evaluación del
+          tamaño de bloque o de la próxima instantánea de métricas; sin
+          actividad ni plazos pendientes, duerme indefinidamente
+        - Tras cada ciclo duerme 1/fps: bajo carga (1000 movimientos por
+          segundo) el bucle corre como máximo fps veces por segundo y cada
+          ciclo drena un lote coalescido
+        - parar (threading.Event, opcional) termina el bucle
+        - ahorro (PoliticaAhorro, opcional): revisa la inactividad cada
+          INTERVALO_REVISION_AHORRO_S; en modo de ahorro no hay más plazos
+          que los vencimientos, y el primer evento devuelve al modo normal
+
+    Retorna:
+        int: Cambios de estado escritos
+    """
+    parar = parar or threading.Event()
+    estado = EstadoActividad()
+    intervalo = 1.0 / fps
+    cambios = 0
+    siguiente_adaptacion = time.monotonic() + INTERVALO_ADAPTACION_MS / 1000.0
+    siguiente_metricas = time.monotonic() + intervalo_metricas if intervalo_metricas > 0 else None
+    siguiente_revision = time.monotonic() + INTERVALO_REVISION_AHORRO_S
+    while not parar.is_set():
+        ahora = time.monotonic()
+        plazos = [estado.proximo_vencimiento(ahora), motor.bus_entrada.vencimiento_teclas(ahora)]
+        en_ahorro = ahorro is not None and ahorro.activo
+        if not en_ahorro:
+            if motor.adaptador_bloque is not None:
+                plazos.append(siguiente_adaptacion - ahora)
+            if siguiente_metricas is not None:
+                plazos.append(siguiente_metricas - ahora)
+            if ahorro is not None and ahorro.habilitada:
+                plazos.append(siguiente_revision - ahora)
+        plazos = [p for p in plazos if p is not None]
+        motor.despertar.wait(max(0.0, min(plazos)) if plazos else None)
+        motor.despertar.clear()
+        if parar.is_set():
+            break
+
+        ahora = time.monotonic()
+        lote = motor.bus_entrada.drenar()
+        ultimo = motor.niveles.ultimo()
+        if ultimo is not None:
+            estado.nivel = float(ultimo[0])
+        if en_ahorro and (not lote.vacio or motor.hablando):
+            ahorro.salir(ahora)
+            en_ahorro = False
+            siguiente_revision = siguiente_adaptacion = ahora
+            if siguiente_metricas is not None:
+                siguiente_metricas = ahora
+        if estado.actualizar(lote, motor.hablando, ahora):
+            salida.escribir(estado, ahora)
+            motor.bus_entrada.aplicados += 1
+            cambios += 1
+        if en_ahorro:
+            time.sleep(intervalo)
+            continue
+        if ahorro is not None and ahorro.habilitada and ahora >= siguiente_revision:
+            ahorro.revisar(ahora)
+            siguiente_revision = ahora + INTERVALO_REVISION_AHORRO_S
+        if motor.adaptador_bloque is not None and ahora >= siguiente_adaptacion:
+            motor.adaptar_bloque()
+            siguiente_adaptacion = ahora + INTERVALO_ADAPTACION_MS / 1000.0
+        if siguiente_metricas is not None and ahora >= siguiente_metricas:
+            try:
+                metricas().guardar(METRICAS_ARCHIVO)
+            except OSError as e:
+                logger.warning("No se pudieron guardar las métricas: %s", e)
+            siguiente_metricas = ahora + intervalo_metricas
+        time.sleep(intervalo)
+    return cambios
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Motor de detección de CatNipy sin interfaz gráfica")
+    parser.add_argument("--salida", default="-",
+                        help='Destino: "-" (stdout), "unix:/ruta", "tcp:host:puerto" o un archivo')
+    parser.add_argument("--formato", choices=sorted(SALIDAS), default="ndjson", help="Formato de cada cambio")
+    parser.add_argument("--servir", metavar="DIRECCION",
+                        help='Difundir el estado a varios clientes en "unix:/ruta" o "tcp:[host:]puerto"')
+    parser.add_argument("--fps", type=float, help="Ciclos máximos por segundo (por defecto fps_ui)")
+    args = parser.parse_args(argv)
+
+    cfg = Configuracion.cargar(CONFIG_FILE, DEFAULT_CONFIG)
+    configurar_logging(cfg.log_nivel)  # Los mensajes van a stderr; stdout queda para el estado
+    metricas().medidor("proceso.rss_mb", memoria_residente_mb)
+    motor = MotorDeteccion(cfg)
+    ahorro = PoliticaAhorro(motor, cfg.ahorro_minutos, cfg.ahorro_audio)
+    metricas().medidor("entrada", motor.bus_entrada.estadisticas)
+    metricas().medidor("energia.modos", ahorro.estadisticas)
+    if args.servir:
+        from broadcast import ServidorEstado
+        salida = ServidorEstado(args.servir)
+        salida.iniciar()
+    else:
+        salida = SALIDAS[args.formato](abrir_destino(args.salida))
+    motor.iniciar()
+    try:
+        ejecutar(motor, salida, args.fps or cfg.fps_ui, intervalo_metricas=cfg.metricas_intervalo, ahorro=ahorro)
+    except (KeyboardInterrupt, BrokenPipeError):
+        pass
+    finally:
+        motor.detener()
+        if args.servir:
+            salida.detener()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
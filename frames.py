@@ -0,0 +1,428 @@
+"""
+Caché de fotogramas pre-compuestos del personaje y superficies que los muestran.
+
+En lugar de apilar cuatro QLabel translúcidos (base, teclado, mouse, boca) y
+dejar que Qt mezcle las cuatro capas a tamaño completo en cada cambio de
+estado, cada combinación (estado de teclado × estado de mouse × hablando) se
+compone una sola vez en un QPixmap y se muestra en una única superficie.
+Solo hay unas 24 combinaciones por escala y devicePixelRatio.
+
+Escala y HiDPI: cada sprite se suaviza una vez por (sprite, escala, dpr)
+(atlas.Sprite.escalado) y los fotogramas se componen a partir de esas
+variantes, en un QPixmap con el devicePixelRatio de la pantalla. Ambas
+cachés están acotadas en bytes (CacheAcotada, LRU): nunca se escala al
+pintar, y cambiar de escala solo descarta las entradas de la escala anterior.
+
+Superficies (config "renderizador"):
+    - "fotogramas": SuperficieGato, un QLabel que cambia de pixmap; cada
+      cambio invalida el widget completo
+    - "regiones": LienzoGato, un QWidget con paintEvent propio que conoce el
+      rectángulo ocupado por cada capa y solo invalida (update(QRect)) la
+      zona que cambió: la boca al hablar, las patas al teclear o mover el mouse
+"""
+import math
+import time
+from collections import OrderedDict
+
+from PyQt5.QtCore import QRect, QRectF, QSize, Qt
+from PyQt5.QtGui import QPainter, QPixmap
+from PyQt5.QtWidgets import QLabel, QWidget
+
+from log import obtener_logger
+from metrics import metricas
+
+logger = obtener_logger("render")
+
+# Estados posibles de cada capa ("idle" = capa oculta)
+ESTADOS_TECLADO = ("idle", "keyboard_idle", "typing_handdown", "typing_handup")
+ESTADOS_MOUSE = ("idle", "mouse_idle", "mouse_move")
+
+# Límites de memoria de las cachés (a escala 1 sin HiDPI ocupan unos 3 y 9 MB)
+LIMITE_ESCALADOS_BYTES = 48 * 1024 * 1024
+LIMITE_FOTOGRAMAS_BYTES = 64 * 1024 * 1024
+
+ESCALA_MIN = 0.25
+ESCALA_MAX = 4.0
+
+
+def normalizar_escala(escala):
+    """Escala limitada a [ESCALA_MIN, ESCALA_MAX] y redondeada (clave estable de caché)"""
+    try:
+        escala = float(escala)
+    except (TypeError, ValueError):
+        return 1.0
+    return round(min(ESCALA_MAX, max(ESCALA_MIN, escala)), 2)
+
+
+def bytes_pixmap(pixmap):
+    return pixmap.width() * pixmap.height() * 4
+
+
+class CacheAcotada:
+    """
+    Diccionario LRU acotado en bytes.
+
+    Al superar limite_bytes descarta las entradas usadas hace más tiempo
+    (siempre conserva la última añadida). invalidar(predicado) descarta solo
+    las claves que cumplen el predicado.
+    """
+    def __init__(self, limite_bytes):
+        self.limite_bytes = limite_bytes
+        self._entradas = OrderedDict()  # clave -> (valor, bytes)
+        self.bytes = 0
+        self.descartes = 0
+
+    def get(self, clave):
+        entrada = self._entradas.get(clave)
+        if entrada is None:
+            return None
+        self._entradas.move_to_end(clave)
+        return entrada[0]
+
+    def poner(self, clave, valor, tamano_bytes):
+        anterior = self._entradas.pop(clave, None)
+        if anterior is not None:
+            self.bytes -= anterior[1]
+        self._entradas[clave] = (valor, tamano_bytes)
+        self.bytes += tamano_bytes
+        while self.bytes > self.limite_bytes and len(self._entradas) > 1:
+            _, (_, liberados) = self._entradas.popitem(last=False)
+            self.bytes -= liberados
+            self.descartes += 1
+
+    def invalidar(self, predicado=None):
+        """Descarta las entradas cuya clave cumple predicado (todas sin predicado); retorna cuántas"""
+        claves = [clave for clave in self._entradas if predicado is None or predicado(clave)]
+        for clave in claves:
+            self.bytes -= self._entradas.pop(clave)[1]
+        return len(claves)
+
+    def __len__(self):
+        return len(self._entradas)
+
+
+class CacheFotogramas:
+    """
+    Compone y guarda los fotogramas completos del personaje.
+
+    Uso:
+        cache = CacheFotogramas(base, {"keyboard_idle": sprite, ...},
+                                {"mouse_idle": sprite, ...}, boca, escala=1.5, dpr=2.0)
+        pixmap = cache.fotograma("typing_handdown", "mouse_idle", True)
+
+    Las capas son atlas.Sprite: a escala 1 sin HiDPI se dibujan directamente
+    desde el atlas (rectángulo origen + ancla), sin copias intermedias.
+
+    Detalles técnicos:
+        - La composición es perezosa: cada combinación se pinta con QPainter
+          (modo SourceOver, en el mismo orden que las antiguas capas) la
+          primera vez que se pide y después solo se consulta la caché
+        - Con escala o dpr distintos de 1, cada capa se suaviza una sola vez
+          por (sprite, escala, dpr) en escalados; componer un fotograma
+          nuevo solo copia esas variantes
+        - Los fotogramas se guardan por (estados, escala, dpr): al mover la
+          ventana a otra pantalla y volver no se recompone nada
+        - cambiar_variante() con otra escala descarta solo los sprites y
+          fotogramas de la escala anterior; un cambio de dpr no descarta nada
+        - Ambas cachés están acotadas (LIMITE_ESCALADOS_BYTES,
+          LIMITE_FOTOGRAMAS_BYTES) y descartan lo usado hace más tiempo
+        - precomponer() construye todas las combinaciones de una vez, para
+          quien prefiera pagar el coste al arrancar
+        - Los estados sin imagen ("idle") simplemente no dibujan su capa
+    """
+    def __init__(self, base, teclado, mouse, boca, escala=1.0, dpr=1.0,
+                 limite_escalados=LIMITE_ESCALADOS_BYTES, limite_fotogramas=LIMITE_FOTOGRAMAS_BYTES):
+        self.base = base
+        self.teclado = teclado
+        self.mouse = mouse
+        self.boca = boca
+        self.escala = normalizar_escala(escala)
+        self.dpr = float(dpr)
+        self.escalados = CacheAcotada(limite_escalados)
+        self._fotogramas = CacheAcotada(limite_fotogramas)
+        self.composiciones = 0
+        self.aciertos = 0
+        self.tiempo_composicion_ms = 0.0
+        self.escalamientos = 0
+        self.tiempo_escalado_ms = 0.0
+
+    def fotograma(self, estado_teclado, estado_mouse, hablando):
+        """QPixmap compuesto para una combinación de estados (a la escala y dpr vigentes)"""
+        clave = (estado_teclado, estado_mouse, bool(hablando), self.escala, self.dpr)
+        pixmap = self._fotogramas.get(clave)
+        if pixmap is None:
+            pixmap = self._componer(*clave[:3])
+            self._fotogramas.poner(clave, pixmap, bytes_pixmap(pixmap))
+        else:
+            self.aciertos += 1
+        return pixmap
+
+    def cambiar_variante(self, escala, dpr):
+        """
+        Adopta otra escala y/o devicePixelRatio; retorna True si alguno cambió.
+
+        Un cambio de escala descarta los sprites y fotogramas de la escala
+        anterior (en todos los dpr), no los de otras escalas; un cambio de dpr
+        conserva los del dpr anterior, por si la ventana vuelve a esa pantalla.
+        """
+        escala, dpr = normalizar_escala(escala), float(dpr)
+        if (escala, dpr) == (self.escala, self.dpr):
+            return False
+        if escala != self.escala:
+            anterior = self.escala
+            descartados = (self.escalados.invalidar(lambda clave: clave[1] == anterior)
+                           + self._fotogramas.invalidar(lambda clave: clave[3] == anterior))
+            logger.debug("Escala %s -> %s: %d entradas de caché descartadas", anterior, escala, descartados)
+        self.escala, self.dpr = escala, dpr
+        return True
+
+    def sprite(self, sprite):
+        """Variante del sprite a la escala y dpr vigentes (el original a escala 1 sin HiDPI)"""
+        if self.escala == 1.0 and self.dpr == 1.0:
+            return sprite
+        clave = (sprite.nombre, self.escala, self.dpr)
+        variante = self.escalados.get(clave)
+        if variante is None:
+            inicio = time.perf_counter()
+            variante = sprite.escalado(self.escala, self.dpr)
+            self.tiempo_escalado_ms += (time.perf_counter() - inicio) * 1000.0
+            self.escalamientos += 1
+            self.escalados.poner(clave, variante, bytes_pixmap(variante.fuente))
+        return variante
+
+    def tamano(self):
+        """Tamaño lógico de los fotogramas a la escala vigente"""
+        return QSize(round(self.base.width() * self.escala), round(self.base.height() * self.escala))
+
+    def rect_capa(self, sprite):
+        """
+        Rectángulo opaco de una capa a la escala vigente (coordenadas lógicas).
+
+        Se calcula sobre el sprite original y se agranda un píxel por lado:
+        el suavizado puede extender los bordes semitransparentes.
+        """
+        rect = sprite.rect_opaco()
+        if rect.isEmpty() or self.escala == 1.0:
+            return rect
+        x = math.floor(rect.x() * self.escala) - 1
+        y = math.floor(rect.y() * self.escala) - 1
+        return QRect(x, y, math.ceil((rect.x() + rect.width()) * self.escala) + 1 - x,
+                     math.ceil((rect.y() + rect.height()) * self.escala) + 1 - y)
+
+    def precomponer(self):
+        """Compone todas las combinaciones posibles"""
+        for estado_teclado in ESTADOS_TECLADO:
+            for estado_mouse in ESTADOS_MOUSE:
+                for hablando in (False, True):
+                    self.fotograma(estado_teclado, estado_mouse, hablando)
+
+    def invalidar(self):
+        """Descarta los fotogramas compuestos y las variantes escaladas (p. ej. al cambiar las imágenes)"""
+        self._fotogramas.invalidar()
+        self.escalados.invalidar()
+
+    def _componer(self, estado_teclado, estado_mouse, hablando):
+        inicio = time.perf_counter()
+        tamano = self.tamano()
+        pixmap = QPixmap(round(tamano.width() * self.dpr), round(tamano.height() * self.dpr))
+        pixmap.setDevicePixelRatio(self.dpr)
+        pixmap.fill(Qt.transparent)
+        painter = QPainter(pixmap)
+        self.sprite(self.base).dibujar(painter)
+        for capa in (self.teclado.get(estado_teclado), self.mouse.get(estado_mouse),
+                     self.boca if hablando else None):
+            if capa is not None and not capa.isNull():
+                self.sprite(capa).dibujar(painter)
+        painter.end()
+        self.composiciones += 1
+        self.tiempo_composicion_ms += (time.perf_counter() - inicio) * 1000.0
+        return pixmap
+
+    def __len__(self):
+        return len(self._fotogramas)
+
+    def estadisticas(self):
+        return {
+            "fotogramas": len(self._fotogramas),
+            "composiciones": self.composiciones,
+            "aciertos": self.aciertos,
+            "tiempo_composicion_ms": round(self.tiempo_composicion_ms, 3),
+            "escala": self.escala,
+            "dpr": self.dpr,
+            "escalados": len(self.escalados),
+            "escalamientos": self.escalamientos,
+            "tiempo_escalado_ms": round(self.tiempo_escalado_ms, 3),
+            "descartes": self.escalados.descartes + self._fotogramas.descartes,
+            "cache_mb": round((self.escalados.bytes + self._fotogramas.bytes) / (1024 * 1024), 1),
+        }
+
+
+class _ContadorPintado:
+    """Contadores de pintado comunes a las superficies"""
+    def _iniciar_contadores(self):
+        self.pintados = 0
+        self.tiempo_pintado_ns = 0
+        self.pixeles_pintados = 0
+        self._histograma_pintado = metricas().histograma("render.pintado_us")
+
+    def _contar(self, inicio, rect):
+        duracion = time.perf_counter_ns() - inicio
+        self.tiempo_pintado_ns += duracion
+        self._histograma_pintado.observar(duracion / 1000.0)
+        self.pintados += 1
+        self.pixeles_pintados += rect.width() * rect.height()
+
+    @staticmethod
+    def _dibujar_region(painter, rect, pixmap):
+        """Copia la región rect (lógica) del fotograma; el origen va en píxeles del pixmap"""
+        dpr = pixmap.devicePixelRatioF()
+        if dpr == 1.0:
+            painter.drawPixmap(rect, pixmap, rect)
+        else:
+            painter.drawPixmap(QRectF(rect), pixmap, QRectF(rect.x() * dpr, rect.y() * dpr,
+                                                            rect.width() * dpr, rect.height() * dpr))
+
+    @property
+    def tiempo_medio_us(self):
+        return self.tiempo_pintado_ns / self.pintados / 1000.0 if self.pintados else 0.0
+
+    def estadisticas(self):
+        return {
+            "renderizador": self.NOMBRE,
+            "pintados": self.pintados,
+            "tiempo_medio_us": round(self.tiempo_medio_us, 1),
+            "pixeles_por_pintado": self.pixeles_pintados // self.pintados if self.pintados else 0,
+        }
+
+
+class SuperficieGato(_ContadorPintado, QLabel):
+    """
+    Superficie única donde se muestra el fotograma compuesto.
+
+    Mide el tiempo de cada paintEvent para poder comparar el coste de pintado
+    con el del antiguo apilado de capas. El pixmap se pinta en modo Source:
+    el fotograma reemplaza al anterior en lugar de mezclarse con él, aunque
+    el backing store no limpie el fondo translúcido. El fotograma ya viene a
+    la escala y el devicePixelRatio de la pantalla: se copia sin escalar.
+    """
+    NOMBRE = "fotogramas"
+
+    def __init__(self, cache, parent=None):
+        super().__init__(parent)
+        self.setAttribute(Qt.WA_TranslucentBackground)
+        self.cache = cache
+        self._clave = None
+        self._iniciar_contadores()
+
+    def mostrar(self, estado_teclado, estado_mouse, hablando):
+        """Muestra una combinación de estados (no hace nada si no cambió)"""
+        clave = (estado_teclado, estado_mouse, bool(hablando))
+        if clave != self._clave:
+            self._clave = clave
+            self.setPixmap(self.cache.fotograma(*clave))
+
+    def invalidar(self):
+        """Olvida la combinación mostrada (tras cambiar la escala o el dpr de la caché)"""
+        self._clave = None
+
+    def paintEvent(self, event):
+        inicio = time.perf_counter_ns()
+        rect = event.rect()
+        pixmap = self.pixmap()
+        if pixmap is not None and not pixmap.isNull():
+            painter = QPainter(self)
+            painter.setCompositionMode(QPainter.CompositionMode_Source)
+            self._dibujar_region(painter, rect, pixmap)
+            painter.end()
+        self._contar(inicio, rect)
+
+
+class LienzoGato(_ContadorPintado, QWidget):
+    """
+    Superficie con paintEvent propio y repintado por regiones sucias.
+
+    Detalles técnicos:
+        - Al crearse (y al cambiar de escala) obtiene el rectángulo opaco de
+          cada imagen de capa (teclado, mouse, boca) a la escala vigente: el
+          recorte del atlas, o su canal alfa si la imagen viene de un PNG suelto
+        - mostrar() compara la combinación nueva con la anterior y llama a
+          update(QRect) con la unión de los rectángulos de las capas que
+          cambiaron (imagen saliente y entrante); solo el primer fotograma
+          invalida el widget completo
+        - paintEvent() copia del fotograma cacheado solo el rectángulo
+          pedido por Qt (drawPixmap con rectángulo origen, en píxeles del
+          fotograma) en modo Source, así el área sucia se reemplaza sin
+          mezclar con lo anterior
+    """
+    NOMBRE = "regiones"
+
+    def __init__(self, cache, parent=None):
+        super().__init__(parent)
+        self.setAttribute(Qt.WA_TranslucentBackground)
+        self.cache = cache
+        self._clave = None
+        self._fotograma = QPixmap()
+        self._calcular_rects()
+        self._iniciar_contadores()
+
+    def _calcular_rects(self):
+        cache = self.cache
+        self._rects_teclado = {estado: cache.rect_capa(sprite) for estado, sprite in cache.teclado.items()}
+        self._rects_mouse = {estado: cache.rect_capa(sprite) for estado, sprite in cache.mouse.items()}
+        self._rect_boca = cache.rect_capa(cache.boca)
+
+    def invalidar(self):
+        """Olvida la combinación mostrada y recalcula las regiones (tras cambiar la escala)"""
+        self._clave = None
+        self._calcular_rects()
+
+    def mostrar(self, estado_teclado, estado_mouse, hablando):
+        """Muestra una combinación de estados invalidando solo lo que cambió"""
+        clave = (estado_teclado, estado_mouse, bool(hablando))
+        if clave == self._clave:
+            return
+        anterior, self._clave = self._clave, clave
+        self._fotograma = self.cache.fotograma(*clave)
+        if anterior is None:
+            self.update()
+            return
+
+        sucio = QRect()
+        if anterior[0] != clave[0]:
+            sucio = sucio.united(self._rects_teclado.get(anterior[0], QRect()))
+            sucio = sucio.united(self._rects_teclado.get(clave[0], QRect()))
+        if anterior[1] != clave[1]:
+            sucio = sucio.united(self._rects_mouse.get(anterior[1], QRect()))
+            sucio = sucio.united(self._rects_mouse.get(clave[1], QRect()))
+        if anterior[2] != clave[2]:
+            sucio = sucio.united(self._rect_boca)
+        if not sucio.isEmpty():
+            self.update(sucio)
+
+    def sizeHint(self):
+        return self.cache.tamano()
+
+    def paintEvent(self, event):
+        inicio = time.perf_counter_ns()
+        rect = event.rect()
+        if not self._fotograma.isNull():
+            painter = QPainter(self)
+            painter.setCompositionMode(QPainter.CompositionMode_Source)
+            self._dibujar_region(painter, rect, self._fotograma)
+            painter.end()
+        self._contar(inicio, rect)
+
+
+RENDERIZADORES = {
+    SuperficieGato.NOMBRE: SuperficieGato,
+    LienzoGato.NOMBRE: LienzoGato,
+}
+
+
+def crear_superficie(nombre, cache, parent=None):
+    """Crea la superficie del renderizador indicado ("fotogramas" si no existe)"""
+    clase = RENDERIZADORES.get(nombre)
+    if clase is None:
+        logger.warning("Renderizador desconocido '%s', usando 'fotogramas'", nombre)
+        clase = SuperficieGato
+    return clase(cache, parent)
@@ -0,0 +1,202 @@
+"""
+Bus de eventos de entrada por lotes entre los listeners de pynput y la GUI.
+
+Los callbacks de pynput (hilos del sistema) solo añaden un registro pequeño a
+una cola acotada y retornan en microsegundos; la GUI vacía la cola una vez
+por fotograma y aplica un único cambio de estado por capa, en lugar de una
+señal Qt entre hilos por cada pulsación, clic o movimiento.
+"""
+import time
+from collections import deque
+
+# Tipos de evento
+TECLA_PRESIONADA = 0
+TECLA_LIBERADA = 1
+CLIC_PRESIONADO = 2
+CLIC_LIBERADO = 3
+MOVIMIENTO = 4
+NUM_TIPOS = 5
+
+# Tiempo hasta el reposo tras la última actividad (animation.py y engine.py)
+REPOSO_TECLADO_MS = 500  # Desde que se suelta la última tecla
+REPOSO_MOUSE_MS = 300    # Desde el último movimiento del cursor
+
+# Sin eventos de teclado durante más que el retardo de auto-repetición
+# (250-660 ms habituales), una tecla que sigue "presionada" perdió su liberación
+INACTIVIDAD_TECLAS_MS = 1000
+
+
+class Lote:
+    """
+    Resumen coalescido de los eventos de un fotograma.
+
+    Atributos:
+        pulsaciones (int): Teclas presionadas nuevas (sin auto-repetición)
+        repeticiones (int): Pulsaciones de auto-repetición plegadas
+        liberaciones (int): Teclas liberadas
+        tecla_abajo (bool): Si queda alguna tecla presionada al final del lote
+        clics (int): Botones presionados
+        liberaciones_clic (int): Botones liberados
+        boton_abajo (bool): Si queda algún botón presionado al final del lote
+        movimiento (bool): Si el cursor se movió durante el fotograma
+        eventos (int): Total de eventos que resume este lote (incluye las
+            liberaciones sintéticas de la recuperación del BusEntrada)
+    """
+    __slots__ = ("pulsaciones", "repeticiones", "liberaciones", "tecla_abajo",
+                 "clics", "liberaciones_clic", "boton_abajo", "movimiento", "eventos")
+
+    def __init__(self):
+        self.pulsaciones = 0
+        self.repeticiones = 0
+        self.liberaciones = 0
+        self.tecla_abajo = False
+        self.clics = 0
+        self.liberaciones_clic = 0
+        self.boton_abajo = False
+        self.movimiento = False
+        self.eventos = 0
+
+    @property
+    def vacio(self):
+        return self.eventos == 0
+
+
+class BusEntrada:
+    """
+    Cola acotada de eventos de entrada con coalescencia por fotograma.
+
+    Arquitectura técnica:
+        - Productores: callbacks de pynput, uno por hilo de listener.
+          publicar() hace un append a un deque con maxlen (operación
+          atómica bajo el GIL); si la GUI se atrasa, se descartan los
+          eventos más antiguos en lugar de crecer sin límite
+        - Los movimientos del cursor no se encolan: solo marcan una bandera,
+          porque la GUI únicamente necesita saber si hubo movimiento
+        - Consumidor: drenar(), llamado desde el hilo principal una vez por
+          fotograma. Detecta la auto-repetición (una tecla presionada de
+          nuevo sin haberse liberado) y la pliega en el lote
+        - Recuperación: pynput puede perder liberaciones y el desbordamiento
+          de la cola las descarta. Si la cola se desbordó, o si hay teclas
+          presionadas y pasan más de INACTIVIDAD_TECLAS_MS sin eventos de
+          teclado, el conjunto de teclas presionadas se vacía y el lote lleva
+          una liberación sintética, así el personaje no queda con la mano abajo.
+          vencimiento_teclas() da el plazo hasta esa recuperación para que el
+          consumidor (reloj de la GUI, bucle de engine.py) vuelva a drenar
+          aunque no llegue ningún evento más
+        - Contadores: eventos recibidos y descartados por tipo (cada tipo
+          tiene un único hilo escritor), recuperaciones y cambios de estado
+          aplicados por la GUI
+    """
+    def __init__(self, capacidad=256):
+        self._cola = deque(maxlen=capacidad)
+        self._movimiento = False
+        self._teclas_abajo = set()
+        self._botones_abajo = set()
+        self._ultima_tecla = float("-inf")  # Instante del último evento de teclado drenado
+        self._descartados_vistos = 0
+        self.recibidos = [0] * NUM_TIPOS
+        self.descartados = [0] * NUM_TIPOS  # Por tipo del evento que desbordó la cola
+        self.recuperaciones = 0  # Teclas o botones liberados sin su evento de liberación
+        self.aplicados = 0  # Cambios de estado aplicados por la GUI
+
+    def publicar(self, tipo, clave=None):
+        """Registra un evento (llamado desde los hilos de los listeners)"""
+        self.recibidos[tipo] += 1
+        if tipo == MOVIMIENTO:
+            self._movimiento = True
+        else:
+            if len(self._cola) == self._cola.maxlen:
+                self.descartados[tipo] += 1  # El append descarta el evento más antiguo
+            self._cola.append((tipo, clave, time.monotonic()))
+
+    def drenar(self):
+        """
+        Vacía la cola y la resume en un Lote (llamado desde el hilo principal).
+
+        Retorna:
+            Lote: Resumen de los eventos pendientes (puede estar vacío)
+        """
+        lote = Lote()
+        if self._movimiento:
+            self._movimiento = False
+            lote.movimiento = True
+            lote.eventos += 1
+
+        descartados = sum(self.descartados)
+        if descartados != self._descartados_vistos:
+            # Las liberaciones perdidas con los eventos descartados no llegarán nunca
+            self._descartados_vistos = descartados
+            self._liberar_todo(lote)
+
+        cola = self._cola
+        while cola:
+            try:
+                tipo, clave, instante = cola.popleft()
+            except IndexError:
+                break
+            lote.eventos += 1
+            if tipo == TECLA_PRESIONADA or tipo == TECLA_LIBERADA:
+                self._revisar_teclas(lote, instante)
+                self._ultima_tecla = instante
+            if tipo == TECLA_PRESIONADA:
+                if clave in self._teclas_abajo:
+                    lote.repeticiones += 1
+                else:
+                    self._teclas_abajo.add(clave)
+                    lote.pulsaciones += 1
+            elif tipo == TECLA_LIBERADA:
+                self._teclas_abajo.discard(clave)
+                lote.liberaciones += 1
+            elif tipo == CLIC_PRESIONADO:
+                self._botones_abajo.add(clave)
+                lote.clics += 1
+            elif tipo == CLIC_LIBERADO:
+                self._botones_abajo.discard(clave)
+                lote.liberaciones_clic += 1
+
+        self._revisar_teclas(lote, time.monotonic())
+        lote.tecla_abajo = bool(self._teclas_abajo)
+        lote.boton_abajo = bool(self._botones_abajo)
+        return lote
+
+    def vencimiento_teclas(self, ahora):
+        """Segundos hasta que drenar() libere las teclas presionadas por inactividad (None si no hay)"""
+        if not self._teclas_abajo:
+            return None
+        return max(0.0, self._ultima_tecla + INACTIVIDAD_TECLAS_MS / 1000.0 - ahora)
+
+    def _revisar_teclas(self, lote, instante):
+        """Libera las teclas presionadas si no hubo eventos de teclado en INACTIVIDAD_TECLAS_MS"""
+        if self._teclas_abajo and (instante - self._ultima_tecla) * 1000.0 > INACTIVIDAD_TECLAS_MS:
+            self._teclas_abajo.clear()
+            self.recuperaciones += 1
+            lote.liberaciones += 1
+            lote.eventos += 1
+
+    def _liberar_todo(self, lote):
+        """Tras un desbordamiento: vacía teclas y botones presionados con liberaciones sintéticas"""
+        if self._teclas_abajo:
+            self._teclas_abajo.clear()
+            self.recuperaciones += 1
+            lote.liberaciones += 1
+            lote.eventos += 1
+        if self._botones_abajo:
+            self._botones_abajo.clear()
+            self.recuperaciones += 1
+            lote.liberaciones_clic += 1
+            lote.eventos += 1
+
+    @property
+    def total_recibidos(self):
+        return sum(self.recibidos)
+
+    def estadisticas(self):
+        return {
+            "recibidos": self.total_recibidos,
+            "teclas": self.recibidos[TECLA_PRESIONADA] + self.recibidos[TECLA_LIBERADA],
+            "clics": self.recibidos[CLIC_PRESIONADO] + self.recibidos[CLIC_LIBERADO],
+            "movimientos": self.recibidos[MOVIMIENTO],
+            "descartados": sum(self.descartados),
+            "recuperaciones": self.recuperaciones,
+            "aplicados": self.aplicados,
+        }
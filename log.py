@@ -0,0 +1,139 @@
+"""
+Registro de mensajes por niveles, con límite de frecuencia y fuera de los hilos críticos.
+
+Los hilos de audio y de los listeners no deben escribir en la consola: un
+print es una escritura síncrona que puede bloquear si stdout es una tubería o
+una consola lenta. Aquí todos los loggers "catnipy.*" pasan por un
+QueueHandler que solo encola el registro; un QueueListener con su propio hilo
+hace la escritura real.
+
+Además:
+    - Nivel configurable (config "log_nivel"); por defecto WARNING, así que
+      una ejecución normal es silenciosa
+    - Límite de frecuencia por mensaje: cada plantilla de mensaje (logger +
+      texto sin formatear) puede emitirse como máximo N veces por intervalo;
+      el resto se cuenta y se informa en el siguiente mensaje que pase
+    - El formateo es perezoso (estilo %): un logger.debug(...) deshabilitado
+      no formatea ni encola nada
+
+Uso:
+    from log import obtener_logger
+    logger = obtener_logger("audio")
+    logger.debug("Nivel %.4f", rms)
+"""
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+
+RAIZ = "catnipy"
+NIVEL_POR_DEFECTO = "WARNING"
+FORMATO = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+
+
+class FiltroFrecuencia(logging.Filter):
+    """
+    Deja pasar como máximo `rafaga` registros por plantilla cada `intervalo` segundos.
+
+    Detalles técnicos:
+        - La clave es (logger, plantilla sin formatear), así que
+          "Cambiando estado de teclado a: %s" cuenta como un único mensaje
+          aunque cambie el argumento
+        - Se ejecuta en el hilo que registra, antes de encolar: solo hace una
+          consulta a un diccionario, sin E/S
+        - Los registros descartados se suman y se anotan en el siguiente
+          registro de la misma plantilla que pase el filtro
+        - Los errores (ERROR o superior) nunca se descartan
+    """
+    def __init__(self, rafaga=5, intervalo=1.0):
+        super().__init__()
+        self.rafaga = rafaga
+        self.intervalo = intervalo
+        self._ventanas = {}  # clave -> [inicio de la ventana, emitidos, omitidos]
+        self.omitidos = 0
+
+    def filter(self, record):
+        if record.levelno >= logging.ERROR:
+            return True
+        clave = (record.name, record.msg)
+        ahora = time.monotonic()
+        ventana = self._ventanas.get(clave)
+        if ventana is None or ahora - ventana[0] >= self.intervalo:
+            omitidos = ventana[2] if ventana is not None else 0
+            self._ventanas[clave] = [ahora, 1, 0]
+            if omitidos:
+                record.msg = f"{record.msg} ({omitidos} mensajes similares omitidos)"
+            return True
+        if ventana[1] < self.rafaga:
+            ventana[1] += 1
+            return True
+        ventana[2] += 1
+        self.omitidos += 1
+        return False
+
+
+_listener = None
+_filtro = None
+
+
+def configurar_logging(nivel=NIVEL_POR_DEFECTO, rafaga=5, intervalo=1.0, stream=None):
+    """
+    Configura el logger raíz "catnipy" (idempotente: una segunda llamada solo cambia el nivel).
+
+    Parámetros:
+        nivel (str | int): Nivel mínimo ("DEBUG", "INFO", "WARNING", "ERROR")
+        rafaga, intervalo: Límite de frecuencia por mensaje
+        stream: Destino de la escritura (sys.stderr por defecto)
+    """
+    global _listener, _filtro
+    raiz = logging.getLogger(RAIZ)
+    cambiar_nivel(nivel)
+    if _listener is not None:
+        return raiz
+
+    cola = queue.SimpleQueue()
+    manejador_cola = logging.handlers.QueueHandler(cola)
+    _filtro = FiltroFrecuencia(rafaga, intervalo)
+    manejador_cola.addFilter(_filtro)
+
+    salida = logging.StreamHandler(stream if stream is not None else sys.stderr)
+    salida.setFormatter(logging.Formatter(FORMATO, "%H:%M:%S"))
+
+    raiz.addHandler(manejador_cola)
+    raiz.propagate = False
+    _listener = logging.handlers.QueueListener(cola, salida, respect_handler_level=True)
+    _listener.start()
+    atexit.register(detener_logging)
+    return raiz
+
+
+def cambiar_nivel(nivel):
+    """Cambia el nivel del logger raíz; un nivel desconocido deja el nivel por defecto"""
+    if isinstance(nivel, str):
+        valor = logging.getLevelName(nivel.upper())
+        if not isinstance(valor, int):
+            logging.getLogger(RAIZ).warning("Nivel de log desconocido '%s', usando %s", nivel, NIVEL_POR_DEFECTO)
+            valor = logging.getLevelName(NIVEL_POR_DEFECTO)
+        nivel = valor
+    logging.getLogger(RAIZ).setLevel(nivel)
+
+
+def detener_logging():
+    """Vacía la cola y detiene el hilo de escritura (idempotente)"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+        logging.getLogger(RAIZ).handlers.clear()
+
+
+def mensajes_omitidos():
+    """Registros descartados por el límite de frecuencia desde el arranque"""
+    return _filtro.omitidos if _filtro is not None else 0
+
+
+def obtener_logger(nombre):
+    """Logger hijo de "catnipy" (p. ej. "catnipy.audio")"""
+    return logging.getLogger(f"{RAIZ}.{nombre}")
@@ -0,0 +1,293 @@
+"""
+Registro de métricas de ejecución: contadores, histogramas y medidores.
+
+Sirve para seguir el coste de CatNipy mientras corre (CPU, latencia,
+memoria) y comparar versiones. Si se activa (config "metricas_intervalo"
+> 0), el proceso escribe periódicamente una instantánea JSON en
+METRICAS_ARCHIVO, dentro de un directorio privado del usuario, y
+`python brain.py --stats` la lee y la muestra.
+
+Tipos de métrica:
+    - Contador: valor que solo crece (callbacks de audio, eventos...); la
+      instantánea incluye su ritmo por segundo desde la anterior
+    - Histograma: distribución por cubetas fijas (duración del callback,
+      tiempo de pintado, retraso del bucle de eventos); registrar un valor
+      es una búsqueda binaria y un incremento, sin reservar memoria
+    - Medidor: función que se evalúa al tomar la instantánea (RSS,
+      temporizadores activos, contadores que ya lleva otro objeto)
+
+Cada contador e histograma debe tener un único hilo escritor (p. ej. el
+hilo de audio para audio.*); la instantánea se toma en el hilo principal y
+puede leer un valor con un bloque de retraso, nunca uno corrupto.
+
+Uso:
+    from metrics import metricas
+    callbacks = metricas().contador("audio.callbacks")
+    callbacks.incrementar()
+"""
+import bisect
+import getpass
+import json
+import os
+import stat
+import sys
+import tempfile
+import time
+
+
+def directorio_usuario():
+    """
+    Directorio de ejecución privado del usuario actual.
+
+    $XDG_RUNTIME_DIR si existe (ya es privado: 0700 y del usuario); si no,
+    catnipy-<uid> dentro del directorio temporal, que guardar() crea con
+    permisos 0700. Nunca un nombre fijo compartido por todos los usuarios.
+    """
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime and os.path.isdir(runtime):
+        return runtime
+    usuario = os.getuid() if hasattr(os, "getuid") else getpass.getuser()
+    return os.path.join(tempfile.gettempdir(), f"catnipy-{usuario}")
+
+
+METRICAS_ARCHIVO = os.path.join(directorio_usuario(), "catnipy_metricas.json")
+
+# Límites superiores de las cubetas por defecto (microsegundos)
+CUBETAS_US = (50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000, 50000, 100000)
+# Límites para retrasos del bucle de eventos (milisegundos)
+CUBETAS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class Contador:
+    __slots__ = ("valor",)
+
+    def __init__(self):
+        self.valor = 0
+
+    def incrementar(self, cantidad=1):
+        self.valor += cantidad
+
+
+class Histograma:
+    """
+    Histograma de cubetas fijas.
+
+    La última cubeta cuenta los valores por encima del mayor límite. Los
+    percentiles de la instantánea son el límite superior de la cubeta que
+    los contiene (una cota, no un valor exacto).
+    """
+    __slots__ = ("limites", "cuentas", "n", "suma", "maximo")
+
+    def __init__(self, limites=CUBETAS_US):
+        self.limites = tuple(limites)
+        self.cuentas = [0] * (len(self.limites) + 1)
+        self.n = 0
+        self.suma = 0.0
+        self.maximo = 0.0
+
+    def observar(self, valor):
+        self.cuentas[bisect.bisect_left(self.limites, valor)] += 1
+        self.n += 1
+        self.suma += valor
+        if valor > self.maximo:
+            self.maximo = valor
+
+    def percentil(self, p):
+        if self.n == 0:
+            return 0.0
+        objetivo = self.n * p / 100.0
+        acumulado = 0
+        for i, cuenta in enumerate(self.cuentas):
+            acumulado += cuenta
+            if acumulado >= objetivo:
+                return float(self.limites[i]) if i < len(self.limites) else self.maximo
+        return self.maximo
+
+    def instantanea(self):
+        return {
+            "n": self.n,
+            "media": round(self.suma / self.n, 2) if self.n else 0.0,
+            "p50": self.percentil(50),
+            "p99": self.percentil(99),
+            "max": round(self.maximo, 2),
+            "cubetas": dict(zip([str(l) for l in self.limites] + ["+inf"], self.cuentas)),
+        }
+
+
+class RegistroMetricas:
+    """
+    Métricas de un proceso, por nombre ("audio.callbacks", "render.pintado_us"...).
+
+    contador()/histograma() devuelven la métrica existente si ya se creó con
+    ese nombre, así que distintos módulos pueden pedirla sin coordinarse.
+    """
+    def __init__(self):
+        self.contadores = {}
+        self.histogramas = {}
+        self.medidores = {}
+        self.inicio = time.monotonic()
+        self._anterior = None  # (instante, {nombre: valor}) de la última instantánea
+
+    def contador(self, nombre):
+        metrica = self.contadores.get(nombre)
+        if metrica is None:
+            metrica = self.contadores[nombre] = Contador()
+        return metrica
+
+    def histograma(self, nombre, limites=CUBETAS_US):
+        metrica = self.histogramas.get(nombre)
+        if metrica is None:
+            metrica = self.histogramas[nombre] = Histograma(limites)
+        return metrica
+
+    def medidor(self, nombre, funcion):
+        """Registra (o reemplaza) una función sin argumentos que da el valor actual"""
+        self.medidores[nombre] = funcion
+
+    def instantanea(self):
+        """Diccionario serializable con todas las métricas y el ritmo de los contadores"""
+        ahora = time.monotonic()
+        valores = {nombre: c.valor for nombre, c in self.contadores.items()}
+        ritmos = {}
+        if self._anterior is not None:
+            t_anterior, anteriores = self._anterior
+            transcurrido = ahora - t_anterior
+            if transcurrido > 0:
+                ritmos = {nombre: round((valor - anteriores.get(nombre, 0)) / transcurrido, 2)
+                          for nombre, valor in valores.items()}
+        self._anterior = (ahora, valores)
+
+        medidores = {}
+        for nombre, funcion in self.medidores.items():
+            try:
+                medidores[nombre] = funcion()
+            except Exception as e:  # Un medidor roto no debe impedir la instantánea
+                medidores[nombre] = f"error: {e}"
+
+        return {
+            "pid": os.getpid(),
+            "marca_tiempo": time.time(),
+            "tiempo_activo_s": round(ahora - self.inicio, 1),
+            "contadores": valores,
+            "por_segundo": ritmos,
+            "histogramas": {nombre: h.instantanea() for nombre, h in self.histogramas.items()},
+            "medidores": medidores,
+        }
+
+    def guardar(self, ruta=METRICAS_ARCHIVO):
+        """
+        Escribe la instantánea en ruta sin que el lector vea nunca un archivo a medias.
+
+        El temporal se crea con tempfile.mkstemp en el mismo directorio
+        (nombre aleatorio, O_EXCL y permisos 0600: no sigue enlaces
+        simbólicos plantados) y os.replace lo renombra sobre ruta, lo que
+        sustituye un enlace existente en lugar de escribir a través de él.
+        Lanza PermissionError si el directorio no pertenece al usuario.
+        """
+        directorio = os.path.dirname(os.path.abspath(ruta))
+        os.makedirs(directorio, mode=0o700, exist_ok=True)
+        verificar_directorio(directorio)
+        descriptor, temporal = tempfile.mkstemp(prefix=".catnipy_metricas.", suffix=".tmp", dir=directorio)
+        try:
+            with os.fdopen(descriptor, "w") as f:
+                json.dump(self.instantanea(), f, indent=2)
+            os.replace(temporal, ruta)
+        except BaseException:
+            try:
+                os.unlink(temporal)
+            except OSError:
+                pass
+            raise
+
+
+def verificar_directorio(directorio):
+    """Lanza PermissionError si directorio es un enlace simbólico o es de otro usuario (POSIX)"""
+    if not hasattr(os, "getuid"):
+        return
+    info = os.lstat(directorio)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid():
+        raise PermissionError(f"{directorio} no es un directorio propio del usuario")
+
+
+def memoria_residente_mb():
+    """RSS actual del proceso en MB (None si la plataforma no lo permite sin dependencias)"""
+    try:
+        with open("/proc/self/statm") as f:
+            paginas = int(f.read().split()[1])
+        return round(paginas * os.sysconf("SC_PAGE_SIZE") / 2**20, 1)
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss es el pico, no el actual: KB en Linux, bytes en macOS
+        return round(maximo / (2**20 if sys.platform == "darwin" else 2**10), 1)
+    except ImportError:
+        return None
+
+
+def cambios_de_contexto():
+    """
+    Cambios de contexto acumulados del proceso (voluntarios + involuntarios).
+
+    Aproximan los despertares: cada vez que un hilo del proceso se duerme y
+    vuelve a ejecutarse. None si la plataforma no lo ofrece (Windows).
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    uso = resource.getrusage(resource.RUSAGE_SELF)
+    return uso.ru_nvcsw + uso.ru_nivcsw
+
+
+_registro = RegistroMetricas()
+
+
+def metricas():
+    """Registro compartido por todo el proceso"""
+    return _registro
+
+
+def leer_instantanea(ruta=METRICAS_ARCHIVO):
+    with open(ruta, "r") as f:
+        return json.load(f)
+
+
+def formatear(instantanea):
+    """Texto legible de una instantánea para la consola"""
+    edad = time.time() - instantanea["marca_tiempo"]
+    lineas = [f"CatNipy pid {instantanea['pid']}, activo {instantanea['tiempo_activo_s']} s "
+              f"(instantánea de hace {edad:.0f} s)"]
+    ritmos = instantanea.get("por_segundo", {})
+    if instantanea["contadores"]:
+        lineas.append("Contadores:")
+        for nombre, valor in sorted(instantanea["contadores"].items()):
+            ritmo = f"  ({ritmos[nombre]}/s)" if nombre in ritmos else ""
+            lineas.append(f"    {nombre:<32} {valor}{ritmo}")
+    if instantanea["histogramas"]:
+        lineas.append("Histogramas:")
+        for nombre, h in sorted(instantanea["histogramas"].items()):
+            lineas.append(f"    {nombre:<32} n={h['n']} media={h['media']} p50<={h['p50']} "
+                          f"p99<={h['p99']} max={h['max']}")
+    if instantanea["medidores"]:
+        lineas.append("Medidores:")
+        for nombre, valor in sorted(instantanea["medidores"].items()):
+            lineas.append(f"    {nombre:<32} {valor}")
+    return "\n".join(lineas)
+
+
+def mostrar_estadisticas(ruta=METRICAS_ARCHIVO, como_json=False):
+    """Imprime la última instantánea; retorna el código de salida del comando --stats"""
+    try:
+        instantanea = leer_instantanea(ruta)
+    except (OSError, ValueError) as e:
+        print(f"No hay métricas en {ruta} ({e}). ¿Está CatNipy en ejecución con "
+              f"metricas_intervalo > 0?", file=sys.stderr)
+        return 1
+    print(json.dumps(instantanea, indent=2) if como_json else formatear(instantanea))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(mostrar_estadisticas(*sys.argv[1:2]))
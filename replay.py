@@ -0,0 +1,232 @@
+"""
+Reproducción offline de archivos WAV por la ruta de detección de habla.
+
+Envía cada WAV bloque a bloque por el mismo ProcesadorAudio que usa el
+callback de sounddevice, sin dispositivo de sonido, a tiempo real o a máxima
+velocidad. Sirve para ajustar umbrales y comparar detectores sobre corpus
+grabados, también en CI.
+
+Etiquetas (opcional): un archivo de texto con el mismo nombre que el WAV y
+extensión .txt, en formato de etiquetas de Audacity ("inicio<TAB>fin[<TAB>texto]"
+en segundos), marca los tramos de voz reales. Con etiquetas se informa:
+    - latencia de detección: desde el inicio de cada tramo hasta que se abre la boca
+    - falsos encendidos: la boca se abre fuera de cualquier tramo
+    - falsos apagados: la boca se cierra dentro de un tramo
+
+Uso:
+    python replay.py grabacion.wav [otra.wav ...] [--detector energia,espectral]
+                     [--umbral 0.005] [--tiempo-real] [--json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import wave
+
+import numpy as np
+
+from audio import BufferNiveles, DetectorHabla, EstimadorPisoRuido, FormatoCaptura, ProcesadorAudio
+from config import DEFAULT_CONFIG, CONFIG_FILE
+from vad import DETECTORES, crear_detector
+
+TOLERANCIA = 0.3  # Segundos de margen alrededor de los tramos etiquetados
+
+
+def leer_wav(ruta):
+    """
+    Lee un WAV PCM como array (frames, canales).
+
+    Retorna:
+        tuple: (muestras, samplerate, dtype) con dtype "int16" o "float32"
+               según el formato con el que se alimentará el procesador
+    """
+    with wave.open(ruta, "rb") as wav:
+        canales = wav.getnchannels()
+        ancho = wav.getsampwidth()
+        samplerate = wav.getframerate()
+        datos = wav.readframes(wav.getnframes())
+
+    if ancho == 2:
+        return np.frombuffer(datos, dtype="<i2").reshape(-1, canales), samplerate, "int16"
+    if ancho == 1:
+        muestras = (np.frombuffer(datos, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif ancho == 4:
+        muestras = np.frombuffer(datos, dtype="<i4").astype(np.float32) / 2147483648.0
+    else:
+        raise ValueError(f"{ruta}: ancho de muestra de {ancho * 8} bits no soportado")
+    return muestras.reshape(-1, canales), samplerate, "float32"
+
+
+def leer_etiquetas(ruta_wav):
+    """Tramos de voz (inicio, fin) del archivo de etiquetas asociado, o None si no existe"""
+    ruta = os.path.splitext(ruta_wav)[0] + ".txt"
+    if not os.path.exists(ruta):
+        return None
+    tramos = []
+    with open(ruta, "r") as f:
+        for linea in f:
+            partes = linea.split()
+            if len(partes) >= 2:
+                tramos.append((float(partes[0]), float(partes[1])))
+    return sorted(tramos)
+
+
+def reproducir(muestras, samplerate, dtype, config, tiempo_real=False):
+    """
+    Procesa un WAV completo y registra las transiciones del detector de habla.
+
+    Retorna:
+        dict: transiciones [(segundo, hablando)], tiempos por bloque (us),
+              duración del audio y tiempo total de proceso
+    """
+    base = FormatoCaptura.desde_config(config)
+    # El bloque conserva la duración configurada a la frecuencia del archivo
+    blocksize = max(1, int(round(base.blocksize * samplerate / base.samplerate)))
+    formato = FormatoCaptura(samplerate, muestras.shape[1], dtype, blocksize, base.diezmado)
+    procesador = ProcesadorAudio(
+        formato,
+        crear_detector(config["detector_voz"], formato.samplerate_efectivo),
+        DetectorHabla(config["volumen_umbral"], config["habla_liberacion"], config["habla_retencion"]),
+        BufferNiveles(),
+        EstimadorPisoRuido(margen=config["umbral_auto_margen"]),
+        config["umbral_auto"],
+    )
+
+    transiciones = []
+    tiempos = np.empty(len(muestras) // blocksize + 1)
+    periodo = blocksize / samplerate
+    inicio_total = time.perf_counter()
+    bloque = 0
+    for posicion in range(0, len(muestras) - blocksize + 1, blocksize):
+        indata = muestras[posicion:posicion + blocksize]
+        fin_bloque = (posicion + blocksize) / samplerate
+        inicio = time.perf_counter()
+        cambio = procesador.procesar(indata, blocksize, fin_bloque)
+        tiempos[bloque] = (time.perf_counter() - inicio) * 1e6
+        bloque += 1
+        if cambio is not None:
+            transiciones.append((fin_bloque, cambio))
+        if tiempo_real:
+            espera = inicio_total + bloque * periodo - time.perf_counter()
+            if espera > 0:
+                time.sleep(espera)
+
+    return {
+        "transiciones": transiciones,
+        "tiempos_us": tiempos[:bloque],
+        "duracion": len(muestras) / samplerate,
+        "tiempo_proceso": time.perf_counter() - inicio_total,
+    }
+
+
+def evaluar(transiciones, tramos):
+    """
+    Compara las transiciones con los tramos etiquetados.
+
+    Retorna:
+        dict: latencias de detección (s), falsos encendidos y falsos apagados
+    """
+    def hablando_en(t):
+        estado = False
+        for instante, hablando in transiciones:
+            if instante > t:
+                break
+            estado = hablando
+        return estado
+
+    latencias = []
+    for inicio, fin in tramos:
+        if hablando_en(inicio):
+            latencias.append(0.0)  # La boca ya estaba abierta al empezar el tramo
+            continue
+        encendidos = [t for t, hablando in transiciones if hablando and inicio - TOLERANCIA <= t <= fin]
+        if encendidos:
+            latencias.append(max(0.0, encendidos[0] - inicio))
+
+    def dentro(t, margen_inicio, margen_fin):
+        return any(inicio - margen_inicio <= t <= fin + margen_fin for inicio, fin in tramos)
+
+    falsos_encendidos = sum(1 for t, hablando in transiciones
+                            if hablando and not dentro(t, TOLERANCIA, 0.0))
+    falsos_apagados = sum(1 for t, hablando in transiciones
+                          if not hablando and dentro(t, 0.0, -TOLERANCIA))
+    return {
+        "tramos": len(tramos),
+        "tramos_detectados": len(latencias),
+        "latencia_media_ms": round(1000.0 * float(np.mean(latencias)), 1) if latencias else None,
+        "latencia_max_ms": round(1000.0 * max(latencias), 1) if latencias else None,
+        "falsos_encendidos": falsos_encendidos,
+        "falsos_apagados": falsos_apagados,
+    }
+
+
+def informe(ruta, config, tiempo_real=False):
+    """Reproduce un archivo y construye su informe"""
+    muestras, samplerate, dtype = leer_wav(ruta)
+    resultado = reproducir(muestras, samplerate, dtype, config, tiempo_real)
+    tiempos = resultado["tiempos_us"]
+    datos = {
+        "archivo": os.path.basename(ruta),
+        "detector": config["detector_voz"],
+        "duracion_s": round(resultado["duracion"], 3),
+        "bloques": int(len(tiempos)),
+        "transiciones": len(resultado["transiciones"]),
+        "bloque_medio_us": round(float(tiempos.mean()), 2) if len(tiempos) else 0.0,
+        "bloque_p99_us": round(float(np.percentile(tiempos, 99)), 2) if len(tiempos) else 0.0,
+        "velocidad_x_tiempo_real": round(resultado["duracion"] / resultado["tiempo_proceso"], 1),
+    }
+    tramos = leer_etiquetas(ruta)
+    if tramos is not None:
+        datos.update(evaluar(resultado["transiciones"], tramos))
+    return datos
+
+
+def cargar_config_base():
+    """config.json completado con los valores por defecto"""
+    config = DEFAULT_CONFIG.copy()
+    try:
+        if os.path.exists(CONFIG_FILE):
+            with open(CONFIG_FILE, "r") as f:
+                config.update(json.load(f))
+    except Exception as e:
+        print(f"Error al cargar la configuración: {e}", file=sys.stderr)
+    return config
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reproduce WAVs por el detector de habla de CatNipy")
+    parser.add_argument("archivos", nargs="+", help="Archivos WAV PCM")
+    parser.add_argument("--detector", help="Detector(es) separados por comas: " + ", ".join(DETECTORES))
+    parser.add_argument("--umbral", type=float, help="volumen_umbral a usar en lugar del de config.json")
+    parser.add_argument("--auto", action="store_true", help="Activar umbral_auto")
+    parser.add_argument("--tiempo-real", action="store_true", help="Respetar la duración real de cada bloque")
+    parser.add_argument("--json", action="store_true", help="Salida JSON (una lista de informes)")
+    args = parser.parse_args(argv)
+
+    config = cargar_config_base()
+    if args.umbral is not None:
+        config["volumen_umbral"] = args.umbral
+    if args.auto:
+        config["umbral_auto"] = True
+    detectores = args.detector.split(",") if args.detector else [config["detector_voz"]]
+
+    informes = []
+    for nombre in detectores:
+        config["detector_voz"] = nombre
+        for ruta in args.archivos:
+            informes.append(informe(ruta, config, args.tiempo_real))
+
+    if args.json:
+        print(json.dumps(informes, indent=4))
+    else:
+        for datos in informes:
+            print(f"{datos['archivo']} [{datos['detector']}]")
+            for clave, valor in datos.items():
+                if clave not in ("archivo", "detector"):
+                    print(f"    {clave}: {valor}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
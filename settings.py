@@ -2,16 +2,23 @@ import sys
 import os
 import json
 from PyQt5.QtWidgets import QApplication, QWidget, QPushButton, QLabel
-from PyQt5.QtGui import QPixmap, QPainter, QCursor, QIcon
-from PyQt5.QtCore import Qt, QPoint, QRect
+from PyQt5.QtGui import QPainter, QCursor, QIcon
+from PyQt5.QtCore import Qt, QPoint, QRect, QSize, QTimer
+
+from atlas import cargar_sprites
+from config import DEFAULT_CONFIG, CONFIG_FILE  # Valores por defecto sin Qt (config.py); re-exportados
+from frames import normalizar_escala
+from log import obtener_logger
+
+logger = obtener_logger("config")
 
 # Obtener la ruta del directorio donde se encuentra el script
 script_dir = os.path.dirname(os.path.abspath(__file__))
 
-# Rutas de imágenes (ahora con rutas absolutas)
-SETTINGS_BG = os.path.join(script_dir, "assets/gui/catnipy_gui__settings.png")
-SETTINGS_EXIT = os.path.join(script_dir, "assets/gui/catnipy_gui__settings_exit.png")
-SETTINGS_SELECTOR = os.path.join(script_dir, "assets/gui/catnipy_gui__settings_selector.png")
+# Nombres de los sprites (atlas.py; el nombre es el del PNG sin extensión)
+SETTINGS_BG = "catnipy_gui__settings"
+SETTINGS_EXIT = "catnipy_gui__settings_exit"
+SETTINGS_SELECTOR = "catnipy_gui__settings_selector"
 
 """
 Constantes técnicas para la interfaz de configuración:
@@ -23,26 +30,11 @@ La interfaz utiliza imágenes personalizadas en lugar de widgets estándar
 para mantener una estética coherente con el personaje principal.
 """
 
-# Configuración por defecto
-DEFAULT_CONFIG = {
-    "volumen_umbral": 0.005,  # Sensibilidad del micrófono
-    "mouse_sensibilidad": 0.1  # Sensibilidad del movimiento del mouse
-}
-
-"""
-Parámetros de configuración por defecto:
-    - volumen_umbral: Umbral RMS para detección de audio (0.005)
-      * Valores más bajos aumentan sensibilidad (detecta sonidos más suaves)
-      * Rango efectivo: 0.001 - 0.02
-      
-    - mouse_sensibilidad: Intervalo mínimo entre actualizaciones de mouse (0.1s)
-      * Valores más bajos = animación más fluida pero más uso de CPU
-      * Valores más altos = animación menos reactiva pero menor uso de CPU
-      * Rango efectivo: 0.05 - 0.5 segundos
-"""
+# Incremento de la escala del gato con + / - o la rueda del mouse
+PASO_ESCALA = 0.25
 
-# Archivo de configuración
-CONFIG_FILE = os.path.join(script_dir, "config.json")
+# Agrupa los movimientos de un arrastre: como máximo una publicación cada N ms
+RETARDO_PUBLICACION_MS = 50
 
 class SettingsWindow(QWidget):
     """
@@ -53,21 +45,38 @@ class SettingsWindow(QWidget):
         - Implementa interfaz gráfica con imágenes personalizadas
         - Utiliza QPainter para renderizado personalizado
         - Controles deslizantes interactivos para ajustar parámetros
+        - Publicación en proceso al gato en ejecución (config_store.AlmacenConfig)
         - Persistencia de configuración mediante archivos JSON
     
     Componentes principales:
         - Controles deslizantes para volumen y sensibilidad del mouse
         - Sistema de arrastre personalizado para controles y ventana
-        - Guardado automático de configuración al cerrar
+        - Cambios aplicados en vivo al gato mientras se arrastra, sin E/S de disco
+        - Guardado automático de configuración al cerrar (una sola escritura)
         - Visualización numérica de los valores actuales
+        - Tamaño del gato (escala) con + / - o la rueda del mouse, aplicado al instante
+        - Piso de ruido estimado por el gato en ejecución (si se proporciona)
     """
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, piso_ruido=None, almacen=None):
         super().__init__(parent)
         
         # Variables para el arrastre de la ventana
         self.dragging = None
         self.window_drag_position = None
         
+        # Estimador de piso de ruido del proceso principal (solo lectura)
+        self.piso_ruido = piso_ruido
+        self.piso_timer = QTimer(self)
+        self.piso_timer.timeout.connect(self.update_piso_ruido)
+        
+        # Configuración del gato en ejecución (si la hay): se publica sin pasar por el disco
+        self.almacen = almacen
+        self.publicar_timer = QTimer(self)
+        self.publicar_timer.setSingleShot(True)
+        self.publicar_timer.setInterval(RETARDO_PUBLICACION_MS)
+        self.publicar_timer.timeout.connect(self.publicar_cambios)
+        self._editadas = set()  # Claves editadas en la ventana y aún no publicadas
+        
         # Cargar o crear configuración
         self.config = self.load_config()
         
@@ -86,7 +95,8 @@ class SettingsWindow(QWidget):
                
             2. Carga de recursos gráficos:
                - Imágenes para fondo, botón de salida y selectores
-               - Verificación de carga correcta y mensajes de diagnóstico
+               - Se toman del atlas compartido con el gato (cargar_sprites),
+                 ya leído al arrancar; sin atlas se cargan los PNG sueltos
                
             3. Configuración de controles:
                - Botón de salida con estilo CSS personalizado
@@ -102,37 +112,22 @@ class SettingsWindow(QWidget):
         self.setAttribute(Qt.WA_TranslucentBackground)
         
         # Cargar imágenes
-        self.bg_pixmap = QPixmap(SETTINGS_BG)
-        self.exit_pixmap = QPixmap(SETTINGS_EXIT)
-        self.selector_pixmap = QPixmap(SETTINGS_SELECTOR)
-        
-        # Verificar que las imágenes se cargaron correctamente
-        if self.bg_pixmap.isNull():
-            print(f"Error: No se pudo cargar la imagen {SETTINGS_BG}")
-        else:
-            print(f"Imagen cargada con éxito: {SETTINGS_BG}")
-            
-        if self.exit_pixmap.isNull():
-            print(f"Error: No se pudo cargar la imagen {SETTINGS_EXIT}")
-        else:
-            print(f"Imagen cargada con éxito: {SETTINGS_EXIT}")
-            
-        if self.selector_pixmap.isNull():
-            print(f"Error: No se pudo cargar la imagen {SETTINGS_SELECTOR}")
-        else:
-            print(f"Imagen cargada con éxito: {SETTINGS_SELECTOR}")
+        sprites = cargar_sprites()
+        self.bg_sprite = sprites[SETTINGS_BG]
+        self.exit_sprite = sprites[SETTINGS_EXIT]
+        self.selector_sprite = sprites[SETTINGS_SELECTOR]
         
         # Configurar tamaño de la ventana basado en la imagen de fondo
-        self.resize(self.bg_pixmap.size())
+        self.resize(self.bg_sprite.size())
         
         # Crear botón de salida
         self.exit_button = QPushButton(self)
-        self.exit_button.setIcon(QIcon(self.exit_pixmap))
+        self.exit_button.setIcon(QIcon(self.exit_sprite.pixmap()))
         
         # Hacer el botón más grande para que las líneas no queden tan delgadas (ajustar al 60% del original)
-        exit_width = int(self.exit_pixmap.width() *.90)
-        exit_height = int(self.exit_pixmap.height() *.90)
-        self.exit_button.setIconSize(QPixmap(self.exit_pixmap).scaled(exit_width, exit_height).size())
+        exit_width = int(self.exit_sprite.width() *.90)
+        exit_height = int(self.exit_sprite.height() *.90)
+        self.exit_button.setIconSize(QSize(exit_width, exit_height))
         
         # Posicionar el botón en la parte inferior central, pero un poco más arriba
         self.exit_button.setGeometry(
@@ -199,7 +194,11 @@ class SettingsWindow(QWidget):
             
         Retorna:
             dict: Diccionario con la configuración completa y válida
+        
+        Con un AlmacenConfig se copia su instantánea vigente, sin leer el archivo.
         """
+        if self.almacen is not None:
+            return self.almacen.actual.como_dict()
         try:
             if os.path.exists(CONFIG_FILE):
                 with open(CONFIG_FILE, 'r') as f:
@@ -210,25 +209,39 @@ class SettingsWindow(QWidget):
                             config[key] = DEFAULT_CONFIG[key]
                     return config
         except Exception as e:
-            print(f"Error al cargar la configuración: {e}")
+            logger.warning("Error al cargar la configuración: %s", e)
         
         return DEFAULT_CONFIG.copy()
     
     def save_config(self):
-        """Guarda la configuración actual en un archivo"""
+        """
+        Guarda la configuración actual en un archivo.
+        
+        Escribe un archivo temporal y lo renombra sobre config.json: el
+        vigilante de CatNipy (config_store.AlmacenConfig) nunca lee un
+        archivo a medio escribir. Con un AlmacenConfig publica lo pendiente
+        y delega en AlmacenConfig.guardar(), que no escribe si nada cambió.
+        """
         try:
-            with open(CONFIG_FILE, 'w') as f:
+            if self.almacen is not None:
+                self.publicar_cambios()
+                if self.almacen.guardar():
+                    logger.info("Configuración guardada con éxito")
+                return True
+            temporal = CONFIG_FILE + ".tmp"
+            with open(temporal, 'w') as f:
                 json.dump(self.config, f, indent=4)
-            print("Configuración guardada con éxito")
+            os.replace(temporal, CONFIG_FILE)
+            logger.info("Configuración guardada con éxito")
             return True
         except Exception as e:
-            print(f"Error al guardar la configuración: {e}")
+            logger.error("Error al guardar la configuración: %s", e)
             return False
     
     def save_and_close(self):
         """Guarda la configuración y cierra la ventana"""
         if self.save_config():
-            print("Configuración guardada al cerrar")
+            logger.debug("Configuración guardada al cerrar")
             self.close()
     
     def value_to_position(self, value, min_value, max_value):
@@ -302,20 +315,20 @@ class SettingsWindow(QWidget):
         painter = QPainter(self)
         
         # Dibujar fondo
-        painter.drawPixmap(0, 0, self.bg_pixmap)
+        self.bg_sprite.dibujar(painter, 0, 0)
     
         
         # Dibujar selectores
-        painter.drawPixmap(
-            self.mic_selector_pos - self.selector_pixmap.width() // 2,
-            self.mic_bar_y - self.selector_pixmap.height() // 2,
-            self.selector_pixmap
+        self.selector_sprite.dibujar(
+            painter,
+            self.mic_selector_pos - self.selector_sprite.width() // 2,
+            self.mic_bar_y - self.selector_sprite.height() // 2
         )
         
-        painter.drawPixmap(
-            self.mouse_selector_pos - self.selector_pixmap.width() // 2,
-            self.mouse_bar_y - self.selector_pixmap.height() // 2,
-            self.selector_pixmap
+        self.selector_sprite.dibujar(
+            painter,
+            self.mouse_selector_pos - self.selector_sprite.width() // 2,
+            self.mouse_bar_y - self.selector_sprite.height() // 2
         )
         
         # Dibujar valores actuales
@@ -336,6 +349,34 @@ class SettingsWindow(QWidget):
             f"{mouse_value:.1f}"
         )
         
+        # Dibujar piso de ruido estimado y el umbral que se usa (o sugiere)
+        if self.piso_ruido is not None and self.piso_ruido.piso is not None:
+            modo = " (auto)" if self.config.get("umbral_auto") else ""
+            painter.save()
+            painter.setPen(Qt.black)
+            font = painter.font()
+            font.setPointSize(8)
+            painter.setFont(font)
+            painter.drawText(
+                self.piso_rect(),
+                Qt.AlignLeft | Qt.AlignVCenter,
+                f"Ruido: {self.piso_ruido.piso:.4f}  Umbral: {self.piso_ruido.umbral:.4f}{modo}"
+            )
+            painter.restore()
+        
+        # Dibujar la escala del gato
+        painter.save()
+        painter.setPen(Qt.black)
+        font = painter.font()
+        font.setPointSize(8)
+        painter.setFont(font)
+        painter.drawText(
+            self.escala_rect(),
+            Qt.AlignLeft | Qt.AlignVCenter,
+            f"Tamaño: {self.config.get('escala', 1.0):.2f}x  (+ / -)"
+        )
+        painter.restore()
+        
         # Dibujar etiquetas
         painter.drawText(
             self.bar_x - 120,
@@ -349,6 +390,49 @@ class SettingsWindow(QWidget):
             "Mouse:"
         )
     
+    def escala_rect(self):
+        """Área bajo el piso de ruido donde se muestra la escala del gato"""
+        return QRect(self.bar_x, 72, self.bar_width, 18)
+    
+    def cambiar_escala(self, pasos):
+        """Cambia la escala del gato en pasos de PASO_ESCALA y la publica sin esperar"""
+        escala = normalizar_escala(self.config.get("escala", 1.0) + pasos * PASO_ESCALA)
+        if escala == self.config.get("escala"):
+            return
+        self.config["escala"] = escala
+        self._editadas.add("escala")
+        self.update(self.escala_rect())
+        self.publicar_cambios()
+    
+    def wheelEvent(self, event):
+        pasos = event.angleDelta().y() // 120
+        if pasos:
+            self.cambiar_escala(pasos)
+        event.accept()
+    
+    def piso_rect(self):
+        """Área entre el título y la barra de audio donde se muestra el piso de ruido"""
+        return QRect(self.bar_x, 50, self.bar_width, 20)
+    
+    def update_piso_ruido(self):
+        """Repinta solo el texto del piso de ruido (llamado por piso_timer)"""
+        self.update(self.piso_rect())
+    
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.almacen is not None:
+            # Al reabrir la ventana, partir de la configuración vigente (pudo editarse a mano)
+            self.config = self.load_config()
+            self._editadas.clear()
+            self.mic_selector_pos = self.value_to_position(self.config["volumen_umbral"], 0.001, 0.02)
+            self.mouse_selector_pos = self.value_to_position(self.config["mouse_sensibilidad"], 0.05, 0.5)
+        if self.piso_ruido is not None:
+            self.piso_timer.start(500)
+    
+    def hideEvent(self, event):
+        self.piso_timer.stop()
+        super().hideEvent(event)
+    
     def mousePressEvent(self, event):
         """
         Maneja el evento de presionar el mouse
@@ -377,18 +461,18 @@ class SettingsWindow(QWidget):
         if event.button() == Qt.LeftButton:
             # Verificar si el clic está en el área del selector de micrófono
             mic_rect = QRect(
-                self.mic_selector_pos - self.selector_pixmap.width() // 2,
-                self.mic_bar_y - self.selector_pixmap.height() // 2,
-                self.selector_pixmap.width(),
-                self.selector_pixmap.height()
+                self.mic_selector_pos - self.selector_sprite.width() // 2,
+                self.mic_bar_y - self.selector_sprite.height() // 2,
+                self.selector_sprite.width(),
+                self.selector_sprite.height()
             )
             
             # Verificar si el clic está en el área del selector de mouse
             mouse_rect = QRect(
-                self.mouse_selector_pos - self.selector_pixmap.width() // 2,
-                self.mouse_bar_y - self.selector_pixmap.height() // 2,
-                self.selector_pixmap.width(),
-                self.selector_pixmap.height()
+                self.mouse_selector_pos - self.selector_sprite.width() // 2,
+                self.mouse_bar_y - self.selector_sprite.height() // 2,
+                self.selector_sprite.width(),
+                self.selector_sprite.height()
             )
             
             if mic_rect.contains(event.pos()):
@@ -457,6 +541,8 @@ class SettingsWindow(QWidget):
     def mouseReleaseEvent(self, event):
         """Maneja el evento de soltar el mouse"""
         if event.button() == Qt.LeftButton and self.dragging:
+            if self.dragging in ('mic', 'mouse'):
+                self.publicar_cambios()  # El valor final se aplica al soltar, sin esperar
             self.dragging = None
     
     def update_mic_value(self):
@@ -464,17 +550,52 @@ class SettingsWindow(QWidget):
         self.config["volumen_umbral"] = self.position_to_value(
             self.mic_selector_pos, 0.001, 0.02
         )
+        self._editadas.add("volumen_umbral")
+        self.programar_publicacion()
     
     def update_mouse_value(self):
         """Actualiza el valor de sensibilidad del mouse basado en la posición del selector"""
         self.config["mouse_sensibilidad"] = self.position_to_value(
             self.mouse_selector_pos, 0.05, 0.5
         )
+        self._editadas.add("mouse_sensibilidad")
+        self.programar_publicacion()
+    
+    def programar_publicacion(self):
+        """
+        Programa la publicación de los valores editados al gato en ejecución.
+        
+        El temporizador no se reinicia si ya está en marcha: durante un
+        arrastre se publica como máximo una vez cada RETARDO_PUBLICACION_MS,
+        con el último valor, en lugar de una vez por evento de mouse.
+        """
+        if self.almacen is not None and not self.publicar_timer.isActive():
+            self.publicar_timer.start()
+    
+    @property
+    def cambios_pendientes(self):
+        """True si hay valores editados en la ventana que aún no se publicaron"""
+        return bool(self._editadas)
+    
+    def publicar_cambios(self):
+        """
+        Publica los valores editados como nueva instantánea (sin escribir en disco).
+        
+        Solo publica las claves que el usuario tocó en la ventana desde la
+        última publicación: el resto de sus valores pueden estar viejos (por
+        ejemplo, si config.json se editó a mano con la ventana cerrada) y
+        publicarlos desharía esa recarga.
+        """
+        self.publicar_timer.stop()
+        if self.almacen is not None and self._editadas:
+            self.almacen.publicar(self.almacen.actual.con_cambios(
+                **{clave: self.config[clave] for clave in self._editadas}))
+        self._editadas.clear()
     
     def closeEvent(self, event):
         """Se llama cuando se cierra la ventana con el botón X o Alt+F4"""
         self.save_config()
-        print("Configuración guardada al cerrar ventana")
+        logger.debug("Configuración guardada al cerrar ventana")
         event.accept()
         
     def keyPressEvent(self, event):
@@ -482,6 +603,12 @@ class SettingsWindow(QWidget):
         if event.key() == Qt.Key_Escape:
             self.save_and_close()
             event.accept()
+        elif event.key() in (Qt.Key_Plus, Qt.Key_Equal):
+            self.cambiar_escala(1)
+            event.accept()
+        elif event.key() == Qt.Key_Minus:
+            self.cambiar_escala(-1)
+            event.accept()
         else:
             super().keyPressEvent(event)
     
@@ -491,10 +618,16 @@ class SettingsWindow(QWidget):
         self.setWindowState(self.windowState() & ~Qt.WindowMinimized | Qt.WindowActive)
         self.raise_()
 
-def open_settings():
+def open_settings(piso_ruido=None, almacen=None):
     """
     Abre la ventana de configuración
     
+    Parámetros:
+        piso_ruido (EstimadorPisoRuido, opcional): Estimador del gato en
+            ejecución cuyo valor actual se muestra en la ventana
+        almacen (AlmacenConfig, opcional): Configuración del gato en
+            ejecución; los cambios se le publican en vivo y se guardan al cerrar
+    
     Implementación técnica:
         1. Obtiene o crea una instancia de QApplication:
            - Reutiliza la instancia existente si está disponible
@@ -519,7 +652,7 @@ def open_settings():
     if not app:  # Si no hay una instancia de QApplication, crear una
         app = QApplication(sys.argv)
     
-    settings_window = SettingsWindow()
+    settings_window = SettingsWindow(piso_ruido=piso_ruido, almacen=almacen)
     settings_window.show()
     settings_window.activateWindow()  # Asegurar que la ventana está activa
     settings_window.raise_()  # Traer la ventana al frente
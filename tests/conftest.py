@@ -0,0 +1,18 @@
+"""
+Configuración común de las pruebas: los módulos de CatNipy están en la raíz
+del repositorio (sin paquete), y la interfaz se prueba sin pantalla.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def app():
+    """QApplication única para todas las pruebas que usan Qt"""
+    from PyQt5.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
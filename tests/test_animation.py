@@ -0,0 +1,61 @@
+"""Pruebas de la máquina de estados de animación (animation.py)."""
+import time
+
+from PyQt5.QtCore import QObject, QTimer
+
+from animation import MaquinaAnimacion
+from input_bus import REPOSO_MOUSE_MS, REPOSO_TECLADO_MS
+
+
+def procesar_eventos(app, ms):
+    """Procesa la cola de eventos de Qt durante `ms` milisegundos"""
+    limite = time.monotonic() + ms / 1000.0
+    while time.monotonic() < limite:
+        app.processEvents()
+        time.sleep(0.005)
+
+
+def maquina():
+    dueno = QObject()
+    aplicados = {"teclado": [], "mouse": [], "boca": []}
+    animacion = MaquinaAnimacion(dueno, aplicados["teclado"].append,
+                                 aplicados["mouse"].append, aplicados["boca"].append)
+    return dueno, animacion, aplicados
+
+
+def test_numero_de_timers_constante_bajo_rafagas(app):
+    dueno, animacion, _ = maquina()
+    for i in range(500):
+        animacion.teclado.disparar("pulsar" if i % 2 else "soltar")
+        animacion.mouse.disparar("mover")
+        app.processEvents()
+    assert len(animacion.timers()) == 3
+    assert len(dueno.findChildren(QTimer)) == 3
+    assert animacion.timers_activos() <= 3
+    animacion.detener()
+
+
+def test_retorno_antiguo_no_devuelve_al_reposo(app):
+    _, animacion, aplicados = maquina()
+    animacion.teclado.disparar("soltar")      # Programa el retorno a keyboard_idle
+    animacion.teclado.disparar("pulsar")      # Evento más nuevo sin retorno: lo cancela
+    animacion.mouse.disparar("mover")         # Programa el retorno a mouse_idle
+    animacion.mouse.disparar("presionar")
+    procesar_eventos(app, max(REPOSO_TECLADO_MS, REPOSO_MOUSE_MS) + 200)
+    assert animacion.teclado.estado == "typing_handdown"
+    assert animacion.mouse.estado == "mouse_move"
+    assert "keyboard_idle" not in aplicados["teclado"]
+    assert "mouse_idle" not in aplicados["mouse"]
+
+
+def test_el_ultimo_retorno_gana(app):
+    _, animacion, aplicados = maquina()
+    animacion.teclado.disparar("soltar")
+    procesar_eventos(app, REPOSO_TECLADO_MS // 2)
+    animacion.teclado.disparar("pulsar")
+    animacion.teclado.disparar("soltar")      # Reinicia el único temporizador de la capa
+    procesar_eventos(app, REPOSO_TECLADO_MS // 2 + 100)
+    assert animacion.teclado.estado == "typing_handup"
+    procesar_eventos(app, REPOSO_TECLADO_MS)
+    assert animacion.teclado.estado == "keyboard_idle"
+    assert aplicados["teclado"].count("keyboard_idle") == 1
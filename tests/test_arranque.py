@@ -0,0 +1,112 @@
+"""
+Pruebas del arranque diferido (brain.py) en un proceso nuevo, sin pantalla.
+
+Cada prueba lanza CatNipy con QT_QPA_PLATFORM=offscreen y una configuración
+temporal, porque lo que se comprueba son las importaciones del proceso.
+
+El presupuesto del primer fotograma se mide desde la creación del widget
+(CatNipy.arranque), sin el arranque del intérprete ni la importación de
+PyQt5, y se puede ajustar con CATNIPY_PRESUPUESTO_FOTOGRAMA_MS en máquinas
+lentas.
+"""
+import json
+import os
+import subprocess
+import sys
+
+from config import DEFAULT_CONFIG
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Módulos que no deben estar importados al pintar el primer fotograma
+MODULOS_DIFERIDOS = ("engine", "numpy", "sounddevice", "pynput")
+
+# Desde la creación del widget hasta el primer pintado
+PRESUPUESTO_PRIMER_FOTOGRAMA_MS = float(os.environ.get("CATNIPY_PRESUPUESTO_FOTOGRAMA_MS", 1000.0))
+
+PROCESO = """
+import json, sys
+from PyQt5.QtCore import QEvent, QObject, QTimer
+from PyQt5.QtWidgets import QApplication
+app = QApplication([])
+from config import DEFAULT_CONFIG
+from config_store import AlmacenConfig
+from brain import CatNipy
+
+class CatNipySinDispositivos(CatNipy):
+    def crear_motor(self):
+        motor = super().crear_motor()
+        motor.iniciar = lambda: None  # Sin micrófono ni servidor X: solo importa y crea el motor
+        return motor
+
+resultado = {}
+
+class PrimerPintado(QObject):
+    def eventFilter(self, objeto, evento):
+        if evento.type() == QEvent.Paint and "pesados" not in resultado:
+            resultado["pesados"] = [m for m in sys.argv[3].split(",") if m in sys.modules]
+            resultado["motor_al_pintar"] = cat.motor is not None
+        return False
+
+def terminar():
+    if cat.motor is None:
+        QTimer.singleShot(10, terminar)
+        return
+    if sys.argv[2] == "tarde" and "pesados" not in resultado:
+        cat.show()  # El respaldo ya inició los subsistemas: este pintado no debe registrarse
+        QTimer.singleShot(10, terminar)
+        return
+    resultado["arranque"] = dict(cat.arranque)
+    cat.detener_subsistemas()
+    print(json.dumps(resultado))
+    app.quit()
+
+cat = CatNipySinDispositivos(AlmacenConfig(sys.argv[1], DEFAULT_CONFIG))
+filtro = PrimerPintado()
+cat.superficie.installEventFilter(filtro)
+if sys.argv[2] == "mostrar":
+    cat.show()
+QTimer.singleShot(10, terminar)
+app.exec_()
+"""
+
+
+def arrancar(tmp_path, modo):
+    """
+    Lanza CatNipy diferido y retorna lo que informa el proceso.
+
+    modo: "mostrar" (la ventana se muestra al crearla), "oculto" (nunca se
+    pinta) o "tarde" (se muestra después de que el respaldo inicie todo)
+    """
+    ruta_config = tmp_path / "config.json"
+    ruta_config.write_text(json.dumps(dict(DEFAULT_CONFIG, arranque_diferido=True, metricas_intervalo=0)))
+    entorno = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    proceso = subprocess.run(
+        [sys.executable, "-c", PROCESO, str(ruta_config), modo, ",".join(MODULOS_DIFERIDOS)],
+        cwd=RAIZ, env=entorno, capture_output=True, text=True, timeout=60)
+    assert proceso.returncode == 0, proceso.stderr[-2000:]
+    return json.loads(proceso.stdout.strip().splitlines()[-1])
+
+
+def test_primer_fotograma_antes_de_importar_subsistemas(tmp_path):
+    resultado = arrancar(tmp_path, "mostrar")
+    assert resultado["pesados"] == []
+    assert not resultado["motor_al_pintar"]
+    arranque = resultado["arranque"]
+    assert arranque["diferido"]
+    assert arranque["primer_fotograma_ms"] is not None
+    assert arranque["primer_fotograma_ms"] <= arranque["subsistemas_ms"]
+    assert arranque["primer_fotograma_ms"] < PRESUPUESTO_PRIMER_FOTOGRAMA_MS
+
+
+def test_respaldo_sin_pintado_no_registra_primer_fotograma(tmp_path):
+    resultado = arrancar(tmp_path, "oculto")
+    assert "pesados" not in resultado  # La ventana nunca se pintó
+    assert resultado["arranque"]["primer_fotograma_ms"] is None
+    assert resultado["arranque"]["subsistemas_ms"] is not None
+
+
+def test_pintado_tras_el_respaldo_no_registra_primer_fotograma(tmp_path):
+    resultado = arrancar(tmp_path, "tarde")
+    assert resultado["motor_al_pintar"]  # Se pintó después de iniciar los subsistemas
+    assert resultado["arranque"]["primer_fotograma_ms"] is None
@@ -0,0 +1,45 @@
+"""Pruebas del atlas de sprites (atlas.py / build_atlas.py) con copias de las imágenes."""
+import json
+import os
+import shutil
+
+from atlas import CARPETAS_SPRITES, AtlasSprites, script_dir
+from build_atlas import construir
+
+
+def copiar_sprites(destino):
+    for carpeta in CARPETAS_SPRITES:
+        shutil.copytree(os.path.join(script_dir, carpeta), destino / carpeta)
+
+
+def test_sprite_modificado_regenera_el_atlas(app, tmp_path):
+    copiar_sprites(tmp_path)
+    imagen, indice = str(tmp_path / "atlas.png"), str(tmp_path / "atlas.json")
+    construir(imagen_destino=imagen, indice_destino=indice, base=tmp_path)
+
+    sprites = AtlasSprites.cargar(imagen, indice, base=tmp_path)
+    assert sprites.origen == "atlas" and not sprites.regenerado and sprites.lecturas == 1
+
+    ruta = tmp_path / "assets/motions/cat_idle.png"
+    info = os.stat(ruta)
+    os.utime(ruta, ns=(info.st_atime_ns, info.st_mtime_ns + 10**9))   # Se edita el sprite
+    sprites = AtlasSprites.cargar(imagen, indice, base=tmp_path)
+    assert sprites.origen == "atlas" and sprites.regenerado
+    with open(indice) as f:
+        assert json.load(f)["fuentes"]["cat_idle"][0] == info.st_mtime_ns + 10**9
+
+    assert not AtlasSprites.cargar(imagen, indice, base=tmp_path).regenerado
+
+
+def test_sprite_nuevo_o_indice_antiguo_regenera(app, tmp_path):
+    copiar_sprites(tmp_path)
+    imagen, indice = str(tmp_path / "atlas.png"), str(tmp_path / "atlas.json")
+    datos = construir(imagen_destino=imagen, indice_destino=indice, base=tmp_path)
+    del datos["fuentes"]                                  # Índice generado antes de guardar las fuentes
+    with open(indice, "w") as f:
+        json.dump(datos, f)
+    assert AtlasSprites.cargar(imagen, indice, base=tmp_path).regenerado
+
+    shutil.copy(tmp_path / "assets/motions/cat_idle.png", tmp_path / "assets/motions/cat_extra.png")
+    sprites = AtlasSprites.cargar(imagen, indice, base=tmp_path)
+    assert sprites.regenerado and "cat_extra" in sprites
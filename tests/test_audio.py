@@ -0,0 +1,116 @@
+"""Pruebas de la ruta de detección de audio (audio.py), sin micrófono."""
+import numpy as np
+
+from audio import BufferNiveles, DetectorHabla, EstimadorPisoRuido, FormatoCaptura, ProcesadorAudio
+from vad import crear_detector
+
+FORMATO = FormatoCaptura()
+DURACION_BLOQUE = FORMATO.blocksize / FORMATO.samplerate
+
+
+def procesador_auto():
+    """ProcesadorAudio con umbral automático y los parámetros por defecto de config.py"""
+    procesador = ProcesadorAudio(
+        FORMATO,
+        crear_detector("energia", FORMATO.samplerate_efectivo),
+        DetectorHabla(0.01),
+        BufferNiveles(),
+        EstimadorPisoRuido(margen=3.0),
+    )
+    procesador.configurar(0.01, 0.6, 0.25, "energia", True, 3.0)
+    return procesador
+
+
+def alimentar(procesador, rms, segundos, rng):
+    """Entrega bloques de ruido gaussiano con el RMS indicado durante `segundos`"""
+    for _ in range(int(segundos / DURACION_BLOQUE)):
+        bloque = rng.normal(0.0, rms, (FORMATO.blocksize, 1)).astype(np.float32)
+        procesador.procesar(bloque, FORMATO.blocksize, 0.0)
+
+
+def test_escalon_de_ganancia_mientras_habla_libera():
+    rng = np.random.default_rng(0)
+    procesador = procesador_auto()
+    alimentar(procesador, 0.001, 5.0, rng)        # Habitación silenciosa: el piso se asienta
+    alimentar(procesador, 0.05, 1.0, rng)         # Voz
+    assert procesador.detector_habla.hablando
+    alimentar(procesador, 0.005, 120.0, rng)      # Escalón de ruido/ganancia sostenido, sin voz
+    assert not procesador.detector_habla.hablando
+    assert procesador.piso_ruido.piso > 0.004
+
+
+def test_voz_con_pausas_no_eleva_el_piso():
+    rng = np.random.default_rng(1)
+    procesador = procesador_auto()
+    alimentar(procesador, 0.001, 5.0, rng)
+    for _ in range(20):                           # 30 s de frases con pausas breves entre palabras
+        alimentar(procesador, 0.05, 1.2, rng)
+        alimentar(procesador, 0.001, 0.3, rng)
+    assert procesador.piso_ruido.piso < 0.002
+
+
+def test_silencio_digital_no_toca_piso_ni_vad():
+    procesador = procesador_auto()
+    ceros = np.zeros((FORMATO.blocksize, 1), dtype=np.float32)
+    for _ in range(10):
+        procesador.procesar(ceros, FORMATO.blocksize, 1.0)
+    assert procesador.bloques_silencio == 10
+    assert procesador.piso_ruido.piso is None
+    assert procesador.niveles.ultimo() == (0.0, 0.0, 1.0)
+    assert not procesador.detector_habla.hablando
+
+
+def test_ruido_alrededor_del_umbral_no_parpadea():
+    detector = DetectorHabla(0.01, factor_liberacion=0.6, retencion=0.25)
+    rng = np.random.default_rng(2)
+    transiciones = [detector.procesar(nivel, DURACION_BLOQUE)
+                    for nivel in rng.uniform(0.007, 0.013, 300)]   # ±30% alrededor del ataque
+    assert transiciones.count(True) == 1                           # Entra una vez y no vuelve a salir
+    assert transiciones.count(False) == 0
+    assert detector.transiciones == 1
+
+
+def test_retencion_mantiene_el_habla_en_pausas_cortas():
+    detector = DetectorHabla(0.01, factor_liberacion=0.6, retencion=0.25)
+    assert detector.procesar(0.05, DURACION_BLOQUE) is True
+    pausa = int(0.2 / DURACION_BLOQUE)                             # Pausa entre palabras < retención
+    assert all(detector.procesar(0.0, DURACION_BLOQUE) is None for _ in range(pausa))
+    assert detector.hablando
+    assert detector.procesar(0.05, DURACION_BLOQUE) is None        # La voz reinicia la retención
+    assert all(detector.procesar(0.0, DURACION_BLOQUE) is None for _ in range(pausa))
+    assert detector.hablando
+
+
+def test_liberacion_tras_la_retencion():
+    detector = DetectorHabla(0.01, factor_liberacion=0.6, retencion=0.25)
+    detector.procesar(0.05, DURACION_BLOQUE)
+    bloques_retencion = int(np.ceil(0.25 / DURACION_BLOQUE))
+    resultados = [detector.procesar(0.005, DURACION_BLOQUE) for _ in range(bloques_retencion)]
+    assert resultados[:-1] == [None] * (bloques_retencion - 1)     # Por debajo de la liberación
+    assert resultados[-1] is False
+    assert not detector.hablando
+    assert detector.transiciones == 2
+    assert detector.procesar(0.009, DURACION_BLOQUE) is None       # Bajo el ataque: sigue en silencio
+
+
+def test_diezmado_filtra_antes_de_submuestrear():
+    formato = FormatoCaptura(32000, 2, "int16", 1024, 2)
+    procesador = ProcesadorAudio(
+        formato,
+        crear_detector("energia_zcr", formato.samplerate_efectivo),
+        DetectorHabla(0.01),
+        BufferNiveles(),
+    )
+    t = np.arange(formato.blocksize) / formato.samplerate
+
+    # Ruido en la Nyquist original: a saltos se plegaría a continua con el RMS completo
+    bloque = np.zeros((formato.blocksize, 2), dtype=np.int16)
+    bloque[:, 0] = np.where(np.arange(formato.blocksize) % 2, -8000, 8000)
+    procesador.procesar(bloque, formato.blocksize, 0.0)
+    assert procesador.niveles.ultimo()[0] < 1e-6
+
+    # La banda de voz apenas se atenúa
+    bloque[:, 0] = (8000 * np.sin(2 * np.pi * 300 * t)).astype(np.int16)
+    procesador.procesar(bloque, formato.blocksize, 1.0)
+    esperado = 8000 / 32768 / np.sqrt(2)
+    assert abs(procesador.niveles.ultimo()[0] - esperado) / esperado < 0.01
@@ -0,0 +1,121 @@
+"""Pruebas del gato (brain.py) dentro del proceso, sin pantalla ni dispositivos."""
+import json
+import time
+
+import numpy as np
+import pytest
+
+from capture_process import NUM_CAMPOS, CapturaAislada
+from config import DEFAULT_CONFIG
+from input_bus import TECLA_PRESIONADA
+
+
+def procesar_eventos(app, segundos, hasta=lambda: False):
+    limite = time.monotonic() + segundos
+    while time.monotonic() < limite and not hasta():
+        app.processEvents()
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def gato(app, tmp_path):
+    from brain import CatNipy
+    from config_store import AlmacenConfig
+    from engine import MotorDeteccion
+
+    class MotorSinDispositivos(MotorDeteccion):
+        def iniciar(self):
+            pass
+
+    ruta = tmp_path / "config.json"
+    ruta.write_text(json.dumps({"metricas_intervalo": 0}))
+    almacen = AlmacenConfig(str(ruta), DEFAULT_CONFIG)
+    cat = CatNipy(almacen, motor=MotorSinDispositivos(almacen.actual))
+    yield cat
+    cat.detener_subsistemas()
+    cat.animacion.detener()
+    cat.reloj.detener()
+    cat.teclas_timer.stop()
+    cat.deleteLater()
+
+
+def test_reloj_suelta_tecla_sin_liberacion(app, gato, monkeypatch):
+    monkeypatch.setattr("input_bus.INACTIVIDAD_TECLAS_MS", 400)
+    gato.bus_entrada.publicar(TECLA_PRESIONADA, "a")   # pynput pierde la liberación de "a"
+    gato.motor._despertar()
+    procesar_eventos(app, 1.0, lambda: gato.animacion.teclado.estado == "typing_handdown")
+    assert gato.animacion.teclado.estado == "typing_handdown"
+    procesar_eventos(app, 0.1)
+    assert not gato.reloj.activo                        # En reposo: solo queda el plazo de las teclas
+    assert gato.teclas_timer.isActive()
+    procesar_eventos(app, 1.0, lambda: gato.animacion.teclado.estado != "typing_handdown")
+    assert gato.animacion.teclado.estado == "typing_handup"
+    assert gato.bus_entrada.estadisticas()["recuperaciones"] == 1
+
+
+class CapturaFalsa(CapturaAislada):
+    """CapturaAislada sin proceso hijo: el estado compartido es un array local"""
+    fallar = False
+
+    def iniciar(self):
+        if self.fallar:
+            raise OSError("sin memoria compartida")
+        self.estado = np.zeros(NUM_CAMPOS)
+
+
+@pytest.fixture
+def gato_aislado(app, tmp_path, monkeypatch):
+    from brain import CatNipy
+    from config_store import AlmacenConfig
+    from engine import MotorDeteccion
+    from metrics import RegistroMetricas
+
+    class MotorSinDispositivos(MotorDeteccion):
+        def iniciar(self):
+            pass
+
+    monkeypatch.setattr("metrics._registro", RegistroMetricas())
+    monkeypatch.setattr("capture_process.CapturaAislada", CapturaFalsa)
+    monkeypatch.setattr(CatNipy, "crear_motor", lambda self: MotorSinDispositivos(self.config))
+    ruta = tmp_path / "config.json"
+    ruta.write_text(json.dumps({"metricas_intervalo": 0, "captura_aislada": True, "arranque_diferido": False}))
+    creados = []
+
+    def crear(fallar=False):
+        CapturaFalsa.fallar = fallar
+        cat = CatNipy(AlmacenConfig(str(ruta), DEFAULT_CONFIG))
+        creados.append(cat)
+        return cat
+    yield crear
+    CapturaFalsa.fallar = False
+    for cat in creados:
+        cat.detener_subsistemas()
+        cat.animacion.detener()
+        cat.reloj.detener()
+        cat.deleteLater()
+
+
+def test_captura_aislada_sin_motor_ni_contadores_a_cero(app, gato_aislado):
+    from capture_process import BLOQUES, MOVIMIENTOS, TECLAS_PRESIONADAS
+    from metrics import metricas
+
+    gato = gato_aislado()
+    assert gato.motor is None and gato.ahorro is None
+    procesar_eventos(app, 0.05)                         # Primera lectura: referencia de los contadores
+    gato.captura.estado[[BLOQUES, TECLAS_PRESIONADAS, MOVIMIENTOS]] = (50, 3, 7)
+    procesar_eventos(app, 0.1)
+    medidores = metricas().instantanea()["medidores"]
+    assert medidores["captura"] == {"bloques": 50, "teclas": 3, "clics": 0, "movimientos": 7}
+    assert not {"entrada", "habla.transiciones", "energia.modos"} & set(medidores)
+    assert gato.animacion.teclado.estado == "typing_handdown"
+    gato.report_stats()
+    gato.almacen_config.publicar(gato.config.con_cambios(volumen_umbral=0.02, ahorro_minutos=1))
+
+
+def test_captura_aislada_fallida_usa_el_motor(app, gato_aislado):
+    from metrics import metricas
+
+    gato = gato_aislado(fallar=True)
+    assert gato.captura is None and gato.motor is not None
+    assert gato.bus_entrada is gato.motor.bus_entrada
+    assert "entrada" in metricas().instantanea()["medidores"]
@@ -0,0 +1,57 @@
+"""Pruebas del servidor de difusión de estado (broadcast.py)."""
+import os
+import socket
+
+import pytest
+
+from broadcast import ServidorEstado, liberar_socket_huerfano
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="requiere sockets Unix")
+
+
+def test_socket_huerfano_se_reemplaza(tmp_path):
+    ruta = str(tmp_path / "catnipy.sock")
+    huerfano = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    huerfano.bind(ruta)
+    huerfano.close()                                  # Queda el archivo sin nadie escuchando
+    servidor = ServidorEstado(f"unix:{ruta}")
+    servidor.iniciar()
+    servidor.detener()
+    assert not os.path.exists(ruta)
+
+
+def test_archivo_que_no_es_socket_no_se_borra(tmp_path):
+    ruta = tmp_path / "catnipy.sock"
+    ruta.write_text("datos")
+    with pytest.raises(FileExistsError):
+        ServidorEstado(f"unix:{ruta}").iniciar()
+    assert ruta.read_text() == "datos"
+
+
+def test_servidor_activo_no_se_roba(tmp_path):
+    ruta = str(tmp_path / "catnipy.sock")
+    primero = ServidorEstado(f"unix:{ruta}")
+    primero.iniciar()
+    try:
+        with pytest.raises(FileExistsError):
+            liberar_socket_huerfano(ruta)
+        with pytest.raises(FileExistsError):
+            ServidorEstado(f"unix:{ruta}").iniciar()
+        assert os.path.exists(ruta)
+    finally:
+        primero.detener()
+    assert not os.path.exists(ruta)
+
+
+def test_detener_no_borra_un_socket_ajeno(tmp_path):
+    ruta = str(tmp_path / "catnipy.sock")
+    servidor = ServidorEstado(f"unix:{ruta}")
+    servidor.iniciar()
+    os.unlink(ruta)                                   # Otro proceso ocupa la ruta mientras tanto
+    ajeno = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    ajeno.bind(ruta)
+    try:
+        servidor.detener()
+        assert os.path.exists(ruta)
+    finally:
+        ajeno.close()
@@ -0,0 +1,45 @@
+"""Pruebas de la carga y validación de la configuración (config.py, config_store.py)."""
+import json
+
+import pytest
+
+from config import Configuracion, DEFAULT_CONFIG
+
+
+@pytest.mark.parametrize("contenido", ["[]", '"x"', "3", "{roto"])
+def test_archivo_que_no_es_un_objeto_usa_los_valores_por_defecto(tmp_path, contenido):
+    ruta = tmp_path / "config.json"
+    ruta.write_text(contenido)
+    assert Configuracion.cargar(str(ruta), DEFAULT_CONFIG) == Configuracion(DEFAULT_CONFIG)
+
+
+def test_valores_numericos_se_recortan_o_se_reemplazan(tmp_path):
+    ruta = tmp_path / "config.json"
+    ruta.write_text(json.dumps({"fps_ui": 0, "escala": 40, "volumen_umbral": "alto",
+                                "habla_retencion": True, "umbral_auto_margen": 2.5}))
+    cfg = Configuracion.cargar(str(ruta), DEFAULT_CONFIG)
+    assert cfg.fps_ui == 1 and isinstance(cfg.fps_ui, int)
+    assert cfg.escala == 4.0
+    assert cfg.volumen_umbral == DEFAULT_CONFIG["volumen_umbral"]
+    assert cfg.habla_retencion == DEFAULT_CONFIG["habla_retencion"]
+    assert cfg.umbral_auto_margen == 2.5
+
+
+def test_recarga_no_publica_un_archivo_invalido_y_recorta_fps(app, tmp_path):
+    from animation import RelojAnimacion
+    from config_store import AlmacenConfig
+
+    ruta = tmp_path / "config.json"
+    ruta.write_text(json.dumps({"volumen_umbral": 0.008}))
+    almacen = AlmacenConfig(str(ruta), DEFAULT_CONFIG)
+    reloj = RelojAnimacion(30, lambda: False)
+    almacen.cambiada.connect(lambda cfg, cambios: reloj.cambiar_fps(cfg.fps_ui))
+
+    ruta.write_text("[]")
+    assert not almacen.recargar()
+    assert almacen.actual.volumen_umbral == 0.008
+
+    ruta.write_text(json.dumps({"volumen_umbral": 0.008, "fps_ui": 0}))
+    assert almacen.recargar()                      # Sin ZeroDivisionError en cambiar_fps
+    assert almacen.actual.fps_ui == 1
+    assert reloj.timer.interval() == 1000
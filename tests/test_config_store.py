@@ -0,0 +1,45 @@
+"""Pruebas del almacén de configuración (config_store.py) y su uso desde la ventana."""
+import json
+
+from config import DEFAULT_CONFIG
+from config_store import AlmacenConfig
+
+
+def almacen_con(tmp_path, valores):
+    ruta = tmp_path / "config.json"
+    ruta.write_text(json.dumps(valores))
+    return AlmacenConfig(str(ruta), DEFAULT_CONFIG), ruta
+
+
+def test_guardar_solo_escribe_claves_del_archivo_y_publicadas(app, tmp_path):
+    almacen, ruta = almacen_con(tmp_path, {"volumen_umbral": 0.008, "clave_propia": 1})
+    almacen.publicar(almacen.actual.con_cambios(escala=1.5))
+    assert almacen.guardar()
+    assert json.loads(ruta.read_text()) == {"volumen_umbral": 0.008, "clave_propia": 1, "escala": 1.5}
+
+
+def test_cerrar_la_app_no_deshace_una_edicion_a_mano(app, tmp_path):
+    from settings import SettingsWindow
+
+    almacen, ruta = almacen_con(tmp_path, {"volumen_umbral": 0.005})
+    ventana = SettingsWindow(almacen=almacen)
+    ventana.show()
+    ventana.close()                                    # Abrir y cerrar sin tocar nada
+    ruta.write_text(json.dumps({"volumen_umbral": 0.0125}))
+    almacen.recargar()                                 # Lo que haría el vigilante
+    assert almacen.actual.volumen_umbral == 0.0125
+    assert not ventana.cambios_pendientes
+    ventana.publicar_cambios()                         # Lo que hace CatNipy.guardar_config al salir
+    almacen.guardar()
+    assert json.loads(ruta.read_text())["volumen_umbral"] == 0.0125
+
+
+def test_ventana_publica_solo_lo_editado(app, tmp_path):
+    from settings import SettingsWindow
+
+    almacen, ruta = almacen_con(tmp_path, {"volumen_umbral": 0.005})
+    ventana = SettingsWindow(almacen=almacen)
+    ventana.show()
+    ventana.cambiar_escala(1)
+    ventana.close()
+    assert json.loads(ruta.read_text()) == {"volumen_umbral": 0.005, "escala": almacen.actual.escala}
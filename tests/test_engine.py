@@ -0,0 +1,90 @@
+"""Pruebas del motor de detección sin Qt (engine.py), sin micrófono."""
+import threading
+import time
+
+from audio import AdaptadorBloque
+from config import Configuracion, DEFAULT_CONFIG
+from engine import MotorDeteccion, ejecutar
+from input_bus import REPOSO_TECLADO_MS, TECLA_PRESIONADA
+
+
+class StreamFalso:
+    def stop(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class MotorSinDispositivo(MotorDeteccion):
+    """Motor cuyo abrir_stream falla mientras `fallos` sea mayor que 0"""
+    def __init__(self, cfg):
+        super().__init__(cfg)
+        self.fallos = 0
+        self.aperturas = []
+
+    def abrir_stream(self, formato):
+        self.aperturas.append(formato.blocksize)
+        if self.fallos:
+            self.fallos -= 1
+            raise OSError("dispositivo ocupado")
+        return StreamFalso()
+
+
+def motor_adaptando():
+    motor = MotorSinDispositivo(Configuracion(DEFAULT_CONFIG))
+    motor.adaptador_bloque = AdaptadorBloque(128, 1024)
+    motor.procesador.cambiar_bloque(128)
+    motor.stream = StreamFalso()
+    motor.adaptador_bloque.evaluar = lambda bloque: bloque * 2
+    return motor
+
+
+def test_reapertura_fallida_deja_el_motor_sin_stream_y_reintenta():
+    motor = motor_adaptando()
+    motor.fallos = 3                       # Falla el bloque nuevo, el anterior y un reintento
+    motor.adaptar_bloque()
+    assert motor.stream is None
+    assert motor.procesador.formato.blocksize == 128
+    motor.adaptar_bloque()                 # Siguiente revisión: sigue fallando
+    assert motor.stream is None
+    motor.adaptar_bloque()                 # El dispositivo vuelve
+    assert motor.stream is not None
+    assert motor.adaptador_bloque is None  # Deja de adaptar tras el problema
+    assert motor.aperturas == [256, 128, 128, 128]
+
+
+def test_reinicio_correcto_adopta_el_bloque_nuevo():
+    motor = motor_adaptando()
+    motor.adaptar_bloque()
+    assert motor.stream is not None
+    assert motor.procesador.formato.blocksize == 256
+
+
+class SalidaMemoria:
+    def __init__(self):
+        self.estados = []
+
+    def escribir(self, estado, ahora):
+        self.estados.append(estado.como_dict(ahora))
+
+
+def test_bucle_libera_tecla_sin_liberacion_sin_mas_eventos(monkeypatch):
+    monkeypatch.setattr("input_bus.INACTIVIDAD_TECLAS_MS", 100)
+    motor = MotorSinDispositivo(Configuracion(DEFAULT_CONFIG))
+    salida = SalidaMemoria()
+    parar = threading.Event()
+    hilo = threading.Thread(target=ejecutar, args=(motor, salida), kwargs={"parar": parar}, daemon=True)
+    hilo.start()
+    try:
+        motor.bus_entrada.publicar(TECLA_PRESIONADA, "a")  # pynput pierde la liberación de "a"
+        motor._despertar()
+        limite = time.monotonic() + 0.1 + REPOSO_TECLADO_MS / 1000.0 + 2.0
+        while time.monotonic() < limite and not (salida.estados and not salida.estados[-1]["escribiendo"]):
+            time.sleep(0.01)
+    finally:
+        parar.set()
+        motor._despertar()
+        hilo.join(2.0)
+    assert [e["escribiendo"] for e in salida.estados] == [True, False]
+    assert motor.bus_entrada.estadisticas()["recuperaciones"] == 1
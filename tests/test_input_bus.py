@@ -0,0 +1,49 @@
+"""Pruebas del bus de eventos de entrada (input_bus.py)."""
+from input_bus import (BusEntrada, CLIC_PRESIONADO, INACTIVIDAD_TECLAS_MS, TECLA_LIBERADA,
+                       TECLA_PRESIONADA)
+
+
+def test_auto_repeticion_plegada():
+    bus = BusEntrada()
+    for _ in range(5):
+        bus.publicar(TECLA_PRESIONADA, "a")
+    lote = bus.drenar()
+    assert (lote.pulsaciones, lote.repeticiones, lote.tecla_abajo) == (1, 4, True)
+    bus.publicar(TECLA_LIBERADA, "a")
+    assert not bus.drenar().tecla_abajo
+
+
+def test_liberacion_perdida_se_recupera_por_inactividad(monkeypatch):
+    reloj = [100.0]
+    monkeypatch.setattr("input_bus.time.monotonic", lambda: reloj[0])
+    bus = BusEntrada()
+    bus.publicar(TECLA_PRESIONADA, "a")             # pynput pierde la liberación de "a"
+    assert bus.drenar().tecla_abajo
+    reloj[0] += INACTIVIDAD_TECLAS_MS / 2000.0
+    assert bus.drenar().vacio                        # Dentro del retardo de auto-repetición
+    reloj[0] += INACTIVIDAD_TECLAS_MS / 1000.0
+    lote = bus.drenar()
+    assert (lote.liberaciones, lote.tecla_abajo) == (1, False)
+    assert bus.estadisticas()["recuperaciones"] == 1
+
+    bus.publicar(TECLA_PRESIONADA, "b")
+    bus.publicar(TECLA_LIBERADA, "b")
+    assert not bus.drenar().tecla_abajo
+
+
+def test_desbordamiento_vacia_teclas_y_cuenta_descartados():
+    bus = BusEntrada(capacidad=8)
+    bus.publicar(TECLA_PRESIONADA, "a")
+    bus.publicar(CLIC_PRESIONADO, "izquierdo")
+    assert bus.drenar().tecla_abajo
+    bus.publicar(TECLA_LIBERADA, "a")                # Se descarta al desbordarse la cola
+    for _ in range(10):
+        bus.publicar(TECLA_PRESIONADA, "b")
+    lote = bus.drenar()
+    assert lote.pulsaciones == 1 and lote.tecla_abajo
+    assert not lote.boton_abajo
+    bus.publicar(TECLA_LIBERADA, "b")
+    assert not bus.drenar().tecla_abajo              # "a" ya no queda presionada
+    estadisticas = bus.estadisticas()
+    assert estadisticas["descartados"] == 3
+    assert estadisticas["recibidos"] == 14
@@ -0,0 +1,37 @@
+"""Pruebas del registro de métricas (metrics.py)."""
+import json
+import os
+
+import pytest
+
+from metrics import RegistroMetricas, leer_instantanea
+
+
+def test_guardar_escribe_instantanea_completa(tmp_path):
+    registro = RegistroMetricas()
+    registro.contador("prueba.eventos").incrementar(3)
+    ruta = tmp_path / "metricas.json"
+    registro.guardar(str(ruta))
+    assert leer_instantanea(str(ruta))["contadores"]["prueba.eventos"] == 3
+    assert os.listdir(tmp_path) == ["metricas.json"]  # Sin temporales olvidados
+
+
+def test_guardar_no_escribe_a_traves_de_un_enlace(tmp_path):
+    victima = tmp_path / "victima"
+    victima.write_text("intacto")
+    ruta = tmp_path / "metricas.json"
+    ruta.symlink_to(victima)
+    RegistroMetricas().guardar(str(ruta))
+    assert victima.read_text() == "intacto"
+    assert not ruta.is_symlink()
+    json.loads(ruta.read_text())
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="solo POSIX")
+def test_guardar_rechaza_directorio_enlazado(tmp_path):
+    real = tmp_path / "real"
+    real.mkdir()
+    enlace = tmp_path / "enlace"
+    enlace.symlink_to(real)
+    with pytest.raises(PermissionError):
+        RegistroMetricas().guardar(str(enlace / "metricas.json"))
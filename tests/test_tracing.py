@@ -0,0 +1,33 @@
+"""Pruebas de las trazas trace-event (tracing.py)."""
+import tracing
+
+
+def traza_vacia(monkeypatch, limite):
+    monkeypatch.setattr(tracing, "_activo", True)
+    monkeypatch.setattr(tracing, "_eventos", [])
+    monkeypatch.setattr(tracing, "_hilos", {})
+    monkeypatch.setattr(tracing, "LIMITE_EVENTOS", limite)
+
+
+def test_tramos_anidados_son_eventos_completos(monkeypatch):
+    traza_vacia(monkeypatch, 100)
+    with tracing.tramo("exterior"):
+        with tracing.tramo("interior"):
+            tracing.instante("marca")
+    eventos = {e["name"]: e for e in tracing.eventos_json() if e["ph"] != "M"}
+    exterior, interior = eventos["exterior"], eventos["interior"]
+    assert exterior["ph"] == interior["ph"] == "X"
+    assert exterior["ts"] <= interior["ts"]
+    assert interior["ts"] + interior["dur"] <= exterior["ts"] + exterior["dur"]
+    assert eventos["marca"]["ph"] == "i"
+
+
+def test_truncar_no_deja_tramos_abiertos(monkeypatch):
+    traza_vacia(monkeypatch, 7)
+    funcion = tracing.envolver(lambda: None, "callback", "audio")
+    for _ in range(10):
+        with tracing.tramo("fotograma"):
+            funcion()
+    eventos = [e for e in tracing.eventos_json() if e["ph"] != "M"]
+    assert len(eventos) == 7
+    assert all(e["ph"] == "X" and e["dur"] >= 0 for e in eventos)
@@ -0,0 +1,189 @@
+"""
+Trazas de los caminos críticos en formato Chrome trace-event (Perfetto, chrome://tracing).
+
+Cuando el gato se entrecorta, la traza muestra en una línea de tiempo por
+hilo qué se estaba ejecutando: el callback de audio, los listeners de
+pynput, los cambios de estado, los pintados o una recarga de configuración.
+
+Es opcional (`python brain.py --trace traza.json` o la variable de entorno
+CATNIPY_TRAZA) y no cuesta nada desactivada: instrumentar() solo reemplaza
+los métodos por envoltorios cuando la traza está activa; si no, las clases
+quedan intactas y no hay ni una comprobación por llamada.
+
+Detalles técnicos:
+    - Cada evento es una tupla que se añade a una lista (list.append es
+      atómico con el GIL): sin bloqueos en el hilo de audio
+    - Tramos completos "X" (inicio y duración en un único evento que se
+      añade al terminar el tramo) con el identificador nativo del hilo, y
+      eventos instantáneos "i" para hechos puntuales. Un tramo nunca queda
+      abierto en la traza, ni siquiera al truncarla en LIMITE_EVENTOS
+    - Marcas de tiempo de time.perf_counter_ns(), en microsegundos
+    - Como máximo LIMITE_EVENTOS eventos; después se deja de registrar
+    - guardar() escribe el JSON al salir (atexit) con el nombre de cada hilo
+
+Uso:
+    import tracing
+    tracing.activar("traza.json")
+    tracing.instrumentar(CatNipy, ["audio_callback"], "audio")
+    with tracing.tramo("recarga", "config"):
+        ...
+    tracing.instante("reinicio del stream", "audio", blocksize=256)
+"""
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+
+from log import obtener_logger
+
+logger = obtener_logger("traza")
+
+VARIABLE_ENTORNO = "CATNIPY_TRAZA"
+LIMITE_EVENTOS = 2_000_000
+
+_activo = False
+_ruta = None
+_eventos = []
+_hilos = {}  # tid nativo -> nombre
+
+
+def activo():
+    return _activo
+
+
+def activar(ruta):
+    """Empieza a registrar eventos; se guardan en ruta al salir"""
+    global _activo, _ruta
+    if _activo:
+        return
+    _ruta = ruta
+    _activo = True
+    atexit.register(guardar)
+    logger.warning("Traza activada: %s", ruta)
+
+
+def activar_desde_entorno():
+    """Activa la traza si CATNIPY_TRAZA tiene una ruta; retorna si quedó activa"""
+    ruta = os.environ.get(VARIABLE_ENTORNO)
+    if ruta:
+        activar(ruta)
+    return _activo
+
+
+def _registrar(fase, nombre, categoria, argumentos=None, inicio_ns=None):
+    """Añade un evento; con inicio_ns es un tramo "X" que termina ahora"""
+    if len(_eventos) >= LIMITE_EVENTOS:
+        return
+    tid = threading.get_native_id()
+    if tid not in _hilos:
+        hilo = threading.current_thread().name
+        # Los hilos creados fuera de Python (PortAudio) aparecen como "Dummy-N"
+        _hilos[tid] = categoria if hilo.startswith("Dummy") else hilo
+    ahora = time.perf_counter_ns()
+    if inicio_ns is None:
+        _eventos.append((fase, nombre, categoria, ahora, 0, tid, argumentos))
+    else:
+        _eventos.append((fase, nombre, categoria, inicio_ns, ahora - inicio_ns, tid, argumentos))
+
+
+def instante(nombre, categoria="catnipy", **argumentos):
+    if _activo:
+        _registrar("i", nombre, categoria, argumentos or None)
+
+
+class _Tramo:
+    __slots__ = ("nombre", "categoria", "inicio_ns")
+
+    def __init__(self, nombre, categoria):
+        self.nombre = nombre
+        self.categoria = categoria
+        self.inicio_ns = None
+
+    def __enter__(self):
+        self.inicio_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        _registrar("X", self.nombre, self.categoria, inicio_ns=self.inicio_ns)
+        return False
+
+
+class _TramoNulo:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_TRAMO_NULO = _TramoNulo()
+
+
+def tramo(nombre, categoria="catnipy"):
+    """Context manager que registra un tramo (uno nulo compartido si la traza está inactiva)"""
+    return _Tramo(nombre, categoria) if _activo else _TRAMO_NULO
+
+
+def envolver(funcion, nombre, categoria):
+    @functools.wraps(funcion)
+    def trazada(*args, **kwargs):
+        inicio = time.perf_counter_ns()
+        try:
+            return funcion(*args, **kwargs)
+        finally:
+            _registrar("X", nombre, categoria, inicio_ns=inicio)
+    return trazada
+
+
+def instrumentar(clase, metodos, categoria):
+    """
+    Reemplaza los métodos de la clase por versiones trazadas (solo con la traza activa).
+
+    Llamar antes de crear las instancias cuyos métodos enlazados se entregan
+    como callbacks (p. ej. audio_callback a sounddevice).
+    """
+    if not _activo:
+        return
+    for metodo in metodos:
+        original = getattr(clase, metodo)
+        if getattr(original, "_trazado", False):
+            continue
+        trazado = envolver(original, f"{clase.__name__}.{metodo}", categoria)
+        trazado._trazado = True
+        setattr(clase, metodo, trazado)
+
+
+def eventos_json():
+    """Lista de eventos en formato trace-event, con metadatos de proceso e hilos"""
+    pid = os.getpid()
+    salida = [{"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": "CatNipy"}}]
+    salida.extend({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": nombre}}
+                  for tid, nombre in list(_hilos.items()))
+    for fase, nombre, categoria, ns, duracion_ns, tid, argumentos in list(_eventos):
+        evento = {"name": nombre, "cat": categoria, "ph": fase, "ts": ns / 1000.0, "pid": pid, "tid": tid}
+        if fase == "X":
+            evento["dur"] = duracion_ns / 1000.0
+        elif fase == "i":
+            evento["s"] = "t"  # Instantáneo con alcance de hilo
+        if argumentos:
+            evento["args"] = argumentos
+        salida.append(evento)
+    return salida
+
+
+def guardar(ruta=None):
+    """Escribe la traza (por defecto en la ruta de activar()); retorna el número de eventos"""
+    ruta = ruta or _ruta
+    if not ruta:
+        return 0
+    eventos = eventos_json()
+    with open(ruta, "w") as f:
+        json.dump({"traceEvents": eventos, "displayTimeUnit": "ms"}, f)
+    if len(_eventos) >= LIMITE_EVENTOS:
+        logger.warning("Traza truncada en %d eventos", LIMITE_EVENTOS)
+    logger.warning("Traza guardada en %s (%d eventos)", ruta, len(eventos))
+    return len(eventos)
@@ -0,0 +1,221 @@
+"""
+Detectores de actividad de voz (VAD) vectorizados con NumPy.
+
+Todos los detectores comparten la misma interfaz: reciben las muestras mono
+de un bloque junto con su RMS (ya calculado por el callback de audio) y
+retornan un "nivel de voz" que se compara con volumen_umbral. Un detector que
+considera que el bloque no es voz retorna 0.0, de modo que la calibración del
+umbral es la misma para todos ellos.
+
+Selección desde config.json:
+    "detector_voz": "energia" | "energia_zcr" | "espectral"
+
+Ejecutar este archivo directamente mide el coste por bloque de cada detector:
+    python vad.py [samplerate] [blocksize]
+(por defecto, el formato de captura de audio.FormatoCaptura: 16000 Hz, 512 muestras)
+"""
+import sys
+import time
+
+import numpy as np
+
+from log import obtener_logger
+
+logger = obtener_logger("vad")
+
+
+class DetectorVoz:
+    """
+    Interfaz base de los detectores de voz.
+
+    Detalles técnicos:
+        - nivel(): cálculo propio de cada detector, sin asignaciones grandes
+        - medir(): envoltura que cronometra cada bloque con perf_counter_ns
+          y acumula el tiempo para compararlo con presupuesto_us
+        - presupuesto_us: coste máximo por bloque que se considera aceptable
+          para que el hilo de audio no sea lo más costoso del proceso
+    """
+    nombre = "base"
+    presupuesto_us = 50.0
+
+    def __init__(self, samplerate):
+        self.samplerate = samplerate
+        self.bloques = 0
+        self.tiempo_total_ns = 0
+
+    def nivel(self, muestras, rms):
+        raise NotImplementedError
+
+    def medir(self, muestras, rms):
+        """Calcula el nivel de voz registrando el coste del bloque"""
+        inicio = time.perf_counter_ns()
+        resultado = self.nivel(muestras, rms)
+        self.tiempo_total_ns += time.perf_counter_ns() - inicio
+        self.bloques += 1
+        return resultado
+
+    @property
+    def tiempo_medio_us(self):
+        """Tiempo medio por bloque en microsegundos"""
+        if self.bloques == 0:
+            return 0.0
+        return self.tiempo_total_ns / self.bloques / 1000.0
+
+    @property
+    def excede_presupuesto(self):
+        return self.tiempo_medio_us > self.presupuesto_us
+
+    def estadisticas(self):
+        return {
+            "detector": self.nombre,
+            "bloques": self.bloques,
+            "tiempo_medio_us": round(self.tiempo_medio_us, 2),
+            "presupuesto_us": self.presupuesto_us,
+        }
+
+
+class DetectorEnergia(DetectorVoz):
+    """Solo energía: el nivel de voz es directamente el RMS (comportamiento clásico)"""
+    nombre = "energia"
+    presupuesto_us = 5.0
+
+    def nivel(self, muestras, rms):
+        return rms
+
+
+class DetectorEnergiaZCR(DetectorVoz):
+    """
+    Energía más tasa de cruces por cero (ZCR).
+
+    Algoritmo:
+        1. Cuenta los cambios de signo entre muestras consecutivas
+        2. Convierte la tasa en una frecuencia dominante aproximada:
+           f ≈ cruces_por_segundo / 2
+        3. Solo acepta el bloque si esa frecuencia está en el rango de la voz;
+           el zumbido de ventiladores (grave) y el siseo o los golpes de
+           teclas (agudos, muchos cruces) quedan descartados
+    """
+    nombre = "energia_zcr"
+    presupuesto_us = 20.0
+    frecuencia_min = 80.0    # Hz
+    frecuencia_max = 3000.0  # Hz
+
+    def nivel(self, muestras, rms):
+        n = len(muestras)
+        if n < 2:
+            return 0.0
+        signos = np.signbit(muestras)
+        cruces = np.count_nonzero(signos[1:] != signos[:-1])
+        frecuencia = cruces * self.samplerate / (2.0 * n)
+        if self.frecuencia_min <= frecuencia <= self.frecuencia_max:
+            return rms
+        return 0.0
+
+
+class DetectorEspectral(DetectorVoz):
+    """
+    Proporción de energía en la banda de voz mediante rfft.
+
+    Algoritmo:
+        1. Aplica una ventana de Hann y calcula el espectro con np.fft.rfft
+        2. Suma la potencia en la banda de voz (100-3400 Hz) y la divide
+           por la potencia total del bloque
+        3. Acepta el bloque si la proporción supera proporcion_min
+
+    La ventana y la máscara de la banda se calculan una vez por tamaño de
+    bloque y se reutilizan en los siguientes.
+    """
+    nombre = "espectral"
+    presupuesto_us = 120.0
+    banda = (100.0, 3400.0)  # Hz
+    proporcion_min = 0.5
+
+    def __init__(self, samplerate):
+        super().__init__(samplerate)
+        self._n = 0
+        self._ventana = None
+        self._mascara = None
+
+    def _preparar(self, n):
+        self._n = n
+        self._ventana = np.hanning(n).astype(np.float32)
+        frecuencias = np.fft.rfftfreq(n, 1.0 / self.samplerate)
+        self._mascara = (frecuencias >= self.banda[0]) & (frecuencias <= self.banda[1])
+
+    def nivel(self, muestras, rms):
+        n = len(muestras)
+        if n != self._n:
+            self._preparar(n)
+        espectro = np.fft.rfft(muestras * self._ventana)
+        potencia = espectro.real ** 2 + espectro.imag ** 2
+        total = potencia.sum()
+        if total <= 0.0:
+            return 0.0
+        if potencia[self._mascara].sum() / total >= self.proporcion_min:
+            return rms
+        return 0.0
+
+
+DETECTORES = {
+    DetectorEnergia.nombre: DetectorEnergia,
+    DetectorEnergiaZCR.nombre: DetectorEnergiaZCR,
+    DetectorEspectral.nombre: DetectorEspectral,
+}
+
+
+def crear_detector(nombre, samplerate):
+    """
+    Crea el detector indicado en la configuración.
+
+    Parámetros:
+        nombre (str): Clave de DETECTORES ("energia", "energia_zcr", "espectral")
+        samplerate (int): Frecuencia de muestreo de las muestras que recibirá
+
+    Retorna:
+        DetectorVoz: Detector solicitado, o DetectorEnergia si el nombre no existe
+    """
+    clase = DETECTORES.get(nombre)
+    if clase is None:
+        logger.warning("Detector de voz desconocido '%s', usando 'energia'", nombre)
+        clase = DetectorEnergia
+    return clase(samplerate)
+
+
+def medir_presupuestos(samplerate, blocksize, repeticiones=2000):
+    """
+    Mide el coste por bloque de cada detector con ruido sintético.
+
+    Retorna:
+        dict: {nombre: {"tiempo_medio_us", "presupuesto_us", "porcentaje_bloque"}}
+              donde porcentaje_bloque es el coste relativo a la duración del bloque
+    """
+    rng = np.random.default_rng(0)
+    muestras = (rng.standard_normal(blocksize) * 0.01).astype(np.float32)
+    rms = float(np.sqrt(np.dot(muestras, muestras) / blocksize))
+    duracion_bloque_us = blocksize / samplerate * 1e6
+
+    resultados = {}
+    for nombre, clase in DETECTORES.items():
+        detector = clase(samplerate)
+        detector.nivel(muestras, rms)  # Calentamiento (prepara cachés)
+        for _ in range(repeticiones):
+            detector.medir(muestras, rms)
+        resultados[nombre] = {
+            "tiempo_medio_us": round(detector.tiempo_medio_us, 2),
+            "presupuesto_us": detector.presupuesto_us,
+            "porcentaje_bloque": round(100.0 * detector.tiempo_medio_us / duracion_bloque_us, 3),
+        }
+    return resultados
+
+
+if __name__ == "__main__":
+    from audio import FormatoCaptura  # Aquí y no arriba: audio.py importa este módulo
+    formato = FormatoCaptura()
+    samplerate = int(sys.argv[1]) if len(sys.argv) > 1 else int(formato.samplerate_efectivo)
+    blocksize = int(sys.argv[2]) if len(sys.argv) > 2 else formato.blocksize // formato.diezmado
+    print(f"Coste por bloque ({blocksize} muestras a {samplerate} Hz):")
+    for nombre, datos in medir_presupuestos(samplerate, blocksize).items():
+        estado = "OK" if datos["tiempo_medio_us"] <= datos["presupuesto_us"] else "EXCEDE"
+        print(f"  {nombre:12s} {datos['tiempo_medio_us']:8.2f} us "
+              f"(presupuesto {datos['presupuesto_us']:.0f} us, "
+              f"{datos['porcentaje_bloque']:.3f}% del bloque) {estado}")